@@ -0,0 +1,37 @@
+"""
+Unsafe wrapper for JobsApp that suppresses exceptions.
+
+Registers `_jobs` command in the AppRegistry. This unsafe version returns
+error messages as strings instead of raising them.
+"""
+
+from apps.jobs import JobsApp
+from apps.registry import AppRegistry
+
+
+class _JobsApp(JobsApp):
+    """
+    Unsafe version of JobsApp that catches exceptions.
+
+    Argument errors are returned as output instead of raising.
+    """
+
+    def run(self, args, stdin=None):
+        """
+        Execute the _jobs application with error suppression.
+
+        Args:
+            args (list): Should be empty.
+            stdin (str, optional): Ignored for jobs.
+
+        Returns:
+            dict or str: The jobs action, or an error message.
+        """
+        try:
+            return super().run(args, stdin)
+        except Exception as error:
+            return f"{error}\n"
+
+
+# Register the unsafe _jobs app
+AppRegistry.register("_jobs", _JobsApp)
@@ -0,0 +1,38 @@
+"""
+Unsafe wrapper for WaitApp that suppresses exceptions.
+
+Registers `_wait` command in the AppRegistry. This unsafe version returns
+error messages as strings, including the ones for unknown jobs reported
+by the executor, so that sequences continue when waiting fails.
+"""
+
+from apps.wait import WaitApp
+from apps.registry import AppRegistry
+
+
+class _WaitApp(WaitApp):
+    """
+    Unsafe version of WaitApp that catches exceptions.
+
+    Invalid job numbers are returned as output instead of raising.
+    """
+
+    def run(self, args, stdin=None):
+        """
+        Execute the _wait application with error suppression.
+
+        Args:
+            args (list): Job numbers.
+            stdin (str, optional): Ignored for wait.
+
+        Returns:
+            dict or str: The wait action, or an error message.
+        """
+        try:
+            return super().run(args, stdin)
+        except Exception as error:
+            return f"{error}\n"
+
+
+# Register the unsafe _wait app
+AppRegistry.register("_wait", _WaitApp)
@@ -4,11 +4,19 @@ Base interface for all shell applications (apps) in PKU Shell.
 Defines the common structure for application execution, including:
 - Standardized `run` method
 - Optional `stdin` support
+- Optional streaming `run_stream` method
+- Optional bytes-mode `run_bytes` method
+- Optional hints for running CPU-bound apps in worker processes
+- Bounded warm caches kept by reused app instances
+- Access to files relative to the session's working directory
 - Utility method to identify unsafe variants (prefixed with '_')
 """
 
+import threading
 from abc import ABC, abstractmethod
-from typing import List, Optional
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Iterable, Iterator, List, Optional
+from apps.files import FileAccess, current as current_files
 
 
 class BaseApp(ABC):
@@ -17,10 +25,38 @@ class BaseApp(ABC):
 
     All apps must implement the `run` method, which defines how the app behaves
     given a list of arguments and optional standard input.
+
+    The registry creates one instance per command name and reuses it for
+    every command, possibly from several pipeline threads at once. Apps
+    must therefore not keep the state of a command in attributes. The
+    only state kept between commands is the warm cache of `warm`, whose
+    values must depend on their key alone, so that dropping them with
+    `reset` never changes an app's output. Apps that cannot follow this
+    contract set `thread_local`, to get one instance per thread.
+
+    Apps must not use the process working directory either: files are
+    opened, listed and checked through `files`, relative to the working
+    directory of the session running the app.
     """
 
+    # CPU-bound apps run in worker processes when PKU_SHELL_PROCESSES is
+    # set (see executor.processes)
+    cpu_bound = False
+
+    # Apps whose instances must not be shared between threads
+    thread_local = False
+
+    # Number of values kept by `warm`; 0 disables the cache
+    cache_size = 0
+
+    # Builtins that act on the shell session (cd, wait, jobs): command
+    # substitutions running them are never evaluated concurrently
+    stateful = False
+
     def __init__(self):
         self.name = self.__class__.__name__
+        self._cache = OrderedDict()
+        self._cache_lock = threading.Lock()
 
     @abstractmethod
     def run(self, args: List[str], stdin: Optional[str] = None) -> str:
@@ -36,6 +72,194 @@ class BaseApp(ABC):
         """
         ...
 
+    def run_stream(
+        self,
+        args: List[str],
+        lines: Iterator[str]
+    ) -> Iterator[str]:
+        """
+        Run the application on streamed input (optional).
+
+        Apps that implement this method can run in a streaming pipeline,
+        which passes data between stages without buffering it. The
+        output must be the same as `run` would return for the same
+        input: joining the yielded chunks gives `run(args, stdin)` when
+        `lines` is `stdin.splitlines(keepends=True)`.
+
+        Args:
+            args (List[str]): Command-line arguments.
+            lines (Iterator[str]): Input lines, with their line endings.
+
+        Yields:
+            str: Chunks of output.
+        """
+        raise NotImplementedError(f"{self.name} does not support streaming")
+
+    def run_bytes(
+        self,
+        args: List[str],
+        lines: Iterator[bytes]
+    ) -> Iterator[bytes]:
+        """
+        Run the application on streamed bytes (optional).
+
+        Apps that implement this method can run in a pipeline in bytes
+        mode (PKU_SHELL_BYTES=1), which passes bytes between stages and
+        reads files in binary mode, never decoding them. It behaves like
+        `run_stream` on bytes: lines end at "\\n", "\\r\\n" or "\\r", and
+        offsets and sizes are in bytes.
+
+        Args:
+            args (List[str]): Command-line arguments.
+            lines (Iterator[bytes]): Input lines, with their line endings.
+
+        Yields:
+            bytes: Chunks of output.
+        """
+        raise NotImplementedError(f"{self.name} does not support bytes")
+
+    def can_split_input(self, args: List[str]) -> bool:
+        """
+        Check whether `run` can be applied to chunks of stdin separately.
+
+        Apps that return True must implement `combine_outputs`, and may
+        override `run_chunk`. The
+        arguments are validated here, raising the same errors as `run`,
+        as `run` may never be called on an empty input.
+
+        Args:
+            args (List[str]): Command-line arguments.
+
+        Returns:
+            bool: True if the output of `run` on the whole stdin can be
+            built from its outputs on consecutive chunks of whole lines.
+        """
+        return False
+
+    def run_chunk(self, args: List[str], chunk: str) -> Any:
+        """
+        Process one chunk of stdin, for `combine_outputs`.
+
+        By default, this is `run` on the chunk. The result must be
+        picklable, as chunks may be processed in worker processes.
+
+        Args:
+            args (List[str]): Command-line arguments.
+            chunk (str): Consecutive whole lines of stdin.
+
+        Returns:
+            Any: Partial result for the chunk.
+        """
+        return self.run(args, chunk)
+
+    def combine_outputs(
+        self,
+        args: List[str],
+        outputs: Iterable[Any]
+    ) -> Iterator[str]:
+        """
+        Combine the results of `run_chunk` on consecutive chunks of stdin.
+
+        Args:
+            args (List[str]): Command-line arguments.
+            outputs (Iterable[Any]): Results of `run_chunk` on each
+                chunk, in input order.
+
+        Yields:
+            str: Chunks of the output of `run` on the whole stdin.
+        """
+        raise NotImplementedError(f"{self.name} does not split its input")
+
+    @property
+    def files(self) -> FileAccess:
+        """File access of the session running the app."""
+        return current_files()
+
+    def warm(self, key: Hashable, build: Callable[[], Any]) -> Any:
+        """
+        Return a value from the app's warm cache, building it if needed.
+
+        The cache keeps the `cache_size` most recently used values. An
+        exception raised by `build` is propagated and nothing is cached.
+
+        Args:
+            key (Hashable): Key of the value, e.g. a pattern argument.
+            build (Callable[[], Any]): Builds the value from the key.
+
+        Returns:
+            Any: The cached or newly built value.
+        """
+        if not self.cache_size:
+            return build()
+        with self._cache_lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                return self._cache[key]
+        value = build()
+        with self._cache_lock:
+            self._cache[key] = value
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return value
+
+    def reset(self):
+        """Drop the warm state of the app."""
+        with self._cache_lock:
+            self._cache.clear()
+
+    @classmethod
+    def supports_stream(cls) -> bool:
+        """
+        Check whether the app implements `run_stream`.
+
+        A subclass that overrides `run` but not `run_stream` (such as
+        the unsafe variants) does not support streaming, as the
+        inherited `run_stream` would bypass its `run`.
+
+        Returns:
+            bool: True if `run_stream` can be used instead of `run`.
+        """
+        return cls._implements("run_stream")
+
+    @classmethod
+    def supports_bytes(cls) -> bool:
+        """
+        Check whether the app implements `run_bytes`.
+
+        Like `supports_stream`, subclasses that override `run` only
+        do not support it.
+
+        Returns:
+            bool: True if the app can run in bytes mode.
+        """
+        return cls._implements("run_bytes")
+
+    @classmethod
+    def supports_split(cls) -> bool:
+        """
+        Check whether the app implements `combine_outputs`.
+
+        Like `supports_stream`, subclasses that override `run` only
+        do not support it.
+
+        Returns:
+            bool: True if `can_split_input` and `combine_outputs` match
+            the app's `run`.
+        """
+        return cls._implements("combine_outputs")
+
+    @classmethod
+    def _implements(cls, method: str) -> bool:
+        """Check that `method` is overridden along with the app's `run`."""
+        def owner(name):
+            return next(k for k in cls.__mro__ if name in vars(k))
+
+        method_owner = owner(method)
+        return (
+            method_owner is not BaseApp
+            and issubclass(method_owner, owner("run"))
+        )
+
     def is_unsafe(self) -> bool:
         """
         Check whether the app is an unsafe variant.
@@ -9,6 +9,8 @@ errors gracefully.
 from apps.base import BaseApp
 from apps.registry import AppRegistry
 
+CHUNK_SIZE = 64 * 1024
+
 
 class CatApp(BaseApp):
     """
@@ -48,6 +50,74 @@ class CatApp(BaseApp):
 
         return self.combine_output(output)
 
+    def run_stream(self, args, lines):
+        """
+        Execute the cat command on streamed input.
+
+        Files are read in chunks, so memory use does not depend on
+        their size.
+
+        Args:
+            args (List[str]): List of filenames to read.
+            lines (Iterator[str]): Input lines, used when no file is given.
+
+        Yields:
+            str: Chunks of the files or of stdin.
+
+        Raises:
+            ValueError: If a file is missing or permission is denied.
+        """
+        return self.iter_chunks(args, lines, "r")
+
+    def run_bytes(self, args, lines):
+        """
+        Execute the cat command on streamed bytes.
+
+        Files are read in binary mode, so their contents are passed on
+        without being decoded.
+
+        Args:
+            args (List[str]): List of filenames to read.
+            lines (Iterator[bytes]): Input lines, used when no file is
+                given.
+
+        Yields:
+            bytes: Chunks of the files or of stdin.
+
+        Raises:
+            ValueError: If a file is missing or permission is denied.
+        """
+        return self.iter_chunks(args, lines, "rb")
+
+    def iter_chunks(self, args, lines, mode):
+        """
+        Lazily read the files, or stdin if no file is given.
+
+        Args:
+            args (List[str]): List of filenames to read.
+            lines (Iterator): Input lines, used when no file is given.
+            mode (str): Mode the files are opened in, "r" or "rb".
+
+        Yields:
+            Chunks of the files or of stdin.
+
+        Raises:
+            ValueError: If a file is missing or permission is denied.
+        """
+        if not args:
+            yield from lines
+            return
+
+        for filename in args:
+            try:
+                f = self.files.open(filename, mode)
+            except FileNotFoundError:
+                raise ValueError(f"cat: {filename}: No such file")
+            except PermissionError:
+                raise ValueError(f"cat: {filename}: Permission denied")
+            with f:
+                yield from iter(lambda: f.read(CHUNK_SIZE), f.read(0))
+
     def read_file(self, filename):
         """
         Read content from a file with error handling.
@@ -62,7 +132,7 @@ class CatApp(BaseApp):
             ValueError: If the file is not found or permission is denied.
         """
         try:
-            with open(filename, "r") as f:
+            with self.files.open(filename, "r") as f:
                 return f.read()
         except FileNotFoundError:
             raise ValueError(f"cat: {filename}: No such file")
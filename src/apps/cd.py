@@ -19,6 +19,8 @@ class CdApp(BaseApp):
     trigger directory change in context.
     """
 
+    stateful = True
+
     def run(self, args, stdin=None):
         """
         Execute the cd command.
@@ -50,9 +52,9 @@ class CdApp(BaseApp):
         Raises:
             ValueError: If the directory doesn't exist or is not accessible.
         """
-        if not os.path.isdir(path):
+        if not self.files.isdir(path):
             raise ValueError(f"cd: {path}: No such directory")
-        if not os.access(path, os.X_OK):
+        if not self.files.access(path, os.X_OK):
             raise ValueError(f"cd: {path}: Permission denied")
 
 
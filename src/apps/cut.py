@@ -2,7 +2,8 @@
 Implementation of the `cut` shell application for PKU Shell.
 
 Supports byte-range selection using the `-b` option.
-Allows reading from files or standard input (stdin).
+Allows reading from files or standard input (stdin). Text input is cut
+by characters; in bytes mode (see `CutApp.run_bytes`), by bytes.
 """
 
 from apps.base import BaseApp
@@ -17,7 +18,27 @@ class CutApp(BaseApp):
     flexible range syntax.
     """
 
+    cache_size = 64
+
     def parse_byte_ranges(self, ranges):
+        """
+        Parse byte ranges, or reuse them from the warm cache.
+
+        Args:
+            ranges (str): Byte ranges (e.g., '1-3,5,7-', '-4').
+
+        Returns:
+            Tuple[Tuple[int, int], ...]: Normalized (start, end) byte
+            positions.
+
+        Raises:
+            ValueError: If range format is invalid.
+        """
+        return self.warm(
+            ranges, lambda: tuple(self.build_byte_ranges(ranges))
+        )
+
+    def build_byte_ranges(self, ranges):
         """
         Parse a comma-separated string of byte ranges into tuples.
 
@@ -86,7 +107,7 @@ class CutApp(BaseApp):
         """
         if file:
             try:
-                with open(file, 'r') as f:
+                with self.files.open(file, 'r') as f:
                     return f.readlines()
             except FileNotFoundError:
                 raise ValueError(f"cut: {file}: No such file")
@@ -106,18 +127,31 @@ class CutApp(BaseApp):
         Returns:
             List[str]: Resulting lines after cutting.
         """
-        result = []
-        for line in lines:
-            cut_line = ''
-            for start, end in byte_ranges:
-                if end == float('inf'):
-                    end = len(line) - 1
-                start = max(0, start)
-                end = min(len(line) - 1, end)
-                if start <= end:
-                    cut_line += line[start:end + 1]
-            result.append(cut_line.rstrip("\n") if cut_line else "")
-        return result
+        return [self.cut_line(line, byte_ranges) for line in lines]
+
+    def cut_line(self, line, byte_ranges):
+        """
+        Apply byte-range extraction on a single line.
+
+        Args:
+            line (AnyStr): Input line.
+            byte_ranges (List[Tuple[int, int]]): Parsed byte ranges.
+
+        Returns:
+            AnyStr: Selected characters (or bytes) of the line, without
+            its newline.
+        """
+        cut_line = line[:0]
+        for start, end in byte_ranges:
+            if end == float('inf'):
+                end = len(line) - 1
+            start = max(0, start)
+            end = min(len(line) - 1, end)
+            if start <= end:
+                cut_line += line[start:end + 1]
+        if not cut_line:
+            return cut_line
+        return cut_line.rstrip("\n" if isinstance(line, str) else b"\n")
 
     def run(self, args, stdin=None):
         """
@@ -147,6 +181,83 @@ class CutApp(BaseApp):
         result = self.cut_lines(lines, byte_ranges)
         return "\n".join(result) + ("\n" if result else "")
 
+    def run_stream(self, args, lines):
+        """
+        Execute the cut command with `-b` option on streamed input.
+
+        Args:
+            args (List[str]): Arguments passed to cut.
+            lines (Iterator[str]): Input lines from pipe.
+
+        Yields:
+            str: Processed lines.
+
+        Raises:
+            ValueError: If required args are missing or invalid.
+        """
+        return self.iter_cut(args, lines, "r")
+
+    def run_bytes(self, args, lines):
+        """
+        Execute the cut command with `-b` option on streamed bytes.
+
+        Unlike `run`, which selects characters, this selects bytes.
+
+        Args:
+            args (List[str]): Arguments passed to cut.
+            lines (Iterator[bytes]): Input lines from pipe.
+
+        Yields:
+            bytes: Processed lines.
+
+        Raises:
+            ValueError: If required args are missing or invalid.
+        """
+        return self.iter_cut(args, lines, "rb")
+
+    def iter_cut(self, args, lines, mode):
+        """
+        Lazily cut the lines of a file or of streamed stdin.
+
+        Args:
+            args (List[str]): Arguments passed to cut.
+            lines (Iterator[AnyStr]): Input lines from pipe.
+            mode (str): Mode the file is opened in, "r" or "rb".
+
+        Yields:
+            AnyStr: Processed lines.
+
+        Raises:
+            ValueError: If required args are missing or invalid.
+        """
+        if len(args) < 2:
+            raise ValueError("cut: missing required arguments")
+
+        option = args[0]
+        if not option.startswith("-b"):
+            raise ValueError("cut: invalid option")
+
+        byte_ranges = self.parse_byte_ranges(args[1])
+        newline = "\n" if mode == "r" else b"\n"
+        file = args[2] if len(args) > 2 else None
+        if file:
+            try:
+                f = self.files.open(file, mode)
+            except FileNotFoundError:
+                raise ValueError(f"cut: {file}: No such file")
+            with f:
+                for line in f:
+                    yield self.cut_line(line, byte_ranges) + newline
+            return
+
+        empty = True
+        for line in lines:
+            empty = False
+            # stdin lines are cut without their line break, as in `run`
+            yield self.cut_line(line.splitlines()[0], byte_ranges) + newline
+        if empty:
+            raise ValueError("cut: no input provided")
+
 
 # Register the safe `cut` app
 AppRegistry.register("cut", CutApp)
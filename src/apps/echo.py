@@ -29,6 +29,19 @@ class EchoApp(BaseApp):
         """
         return " ".join(args) + "\n"
 
+    def run_stream(self, args, lines):
+        """
+        Execute the echo command in a streaming pipeline.
+
+        Args:
+            args (List[str]): Strings to be echoed.
+            lines (Iterator[str]): Ignored for echo.
+
+        Yields:
+            str: Arguments joined with spaces and ending with a newline.
+        """
+        yield self.run(args)
+
 
 # Register the safe `echo` app
 AppRegistry.register("echo", EchoApp)
@@ -0,0 +1,140 @@
+"""
+File access for PKU Shell applications.
+
+Applications never use the process working directory: every path they
+open, list or check is resolved against the working directory of the
+shell session running them, through that session's `FileAccess`. The
+session's `FileAccess` is made current by the executor while its apps
+run (`using`), and apps get it with `current()` or `BaseApp.files`.
+This lets many sessions run at the same time, on threads of one
+process, each with its own working directory.
+"""
+
+import os
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import IO, Iterator, List, Optional, Tuple
+
+_current: ContextVar[Optional["FileAccess"]] = ContextVar(
+    "pku_shell_files", default=None
+)
+
+
+class FileAccess:
+    """
+    Working directory of a session, and file operations relative to it.
+
+    Paths given to the methods are resolved against `cwd` unless they
+    are absolute; the process working directory is never changed.
+    """
+
+    __slots__ = ("cwd",)
+
+    def __init__(self, cwd: Optional[str] = None):
+        """
+        Create the file access of a session.
+
+        Args:
+            cwd (Optional[str]): Absolute working directory; defaults to
+                the process working directory.
+        """
+        self.cwd = cwd or os.getcwd()
+
+    def resolve(self, path: str) -> str:
+        """
+        Resolve a path against the working directory.
+
+        Args:
+            path (str): Absolute or relative path.
+
+        Returns:
+            str: Absolute path.
+        """
+        return os.path.join(self.cwd, path)
+
+    def open(self, path: str, mode: str = "r", **kwargs) -> IO:
+        """
+        Open a file relative to the working directory.
+
+        Args:
+            path (str): Path of the file.
+            mode (str): Mode, as for the built-in `open`.
+            **kwargs: Other arguments of the built-in `open`.
+
+        Returns:
+            IO: The open file.
+        """
+        return open(self.resolve(path), mode, **kwargs)
+
+    def isdir(self, path: str) -> bool:
+        """Check whether a path is a directory."""
+        return os.path.isdir(self.resolve(path))
+
+    def exists(self, path: str) -> bool:
+        """Check whether a path exists."""
+        return os.path.exists(self.resolve(path))
+
+    def access(self, path: str, mode: int) -> bool:
+        """Check the permissions of a path, as `os.access`."""
+        return os.access(self.resolve(path), mode)
+
+    def listdir(self, path: str = ".") -> List[str]:
+        """List the entries of a directory."""
+        return os.listdir(self.resolve(path))
+
+    def walk(self, path: str) -> Iterator[Tuple[str, List[str], List[str]]]:
+        """
+        Walk a directory tree, as `os.walk` on the resolved path.
+
+        Args:
+            path (str): Root of the tree.
+
+        Yields:
+            Tuple[str, List[str], List[str]]: Absolute directory path,
+            its subdirectories and its files.
+        """
+        return os.walk(self.resolve(path))
+
+    def chdir(self, path: str):
+        """
+        Change the working directory of the session.
+
+        Args:
+            path (str): New working directory.
+
+        Raises:
+            FileNotFoundError: If the path is not a directory.
+        """
+        new_path = os.path.normpath(self.resolve(path))
+        if not os.path.isdir(new_path):
+            raise FileNotFoundError(f"Directory not found: {new_path}")
+        self.cwd = new_path
+
+
+def current() -> FileAccess:
+    """
+    Return the file access of the running session.
+
+    Apps run outside a session, e.g. called directly, use the process
+    working directory.
+
+    Returns:
+        FileAccess: File access apps must use for paths.
+    """
+    files = _current.get()
+    return files if files is not None else FileAccess()
+
+
+@contextmanager
+def using(files: FileAccess):
+    """
+    Make a file access current while a block runs.
+
+    Args:
+        files (FileAccess): File access of the session.
+    """
+    token = _current.set(files)
+    try:
+        yield files
+    finally:
+        _current.reset(token)
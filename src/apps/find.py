@@ -25,6 +25,46 @@ class FindApp(BaseApp):
         Returns:
             str: Matching file paths, each on a new line.
 
+        Raises:
+            ValueError: If arguments are missing or
+            path is invalid.
+        """
+        path, pattern = self.parse_args(args)
+        return self.find_files(path, pattern)
+
+    def run_stream(self, args, lines):
+        """
+        Execute the find command, yielding paths as they are found.
+
+        Args:
+            args (List[str]): Arguments including optional path
+            and required `-name` [pattern].
+            lines (Iterator[str]): Ignored.
+
+        Yields:
+            str: Matching file paths, separated by newlines as in `run`.
+
+        Raises:
+            ValueError: If arguments are missing or
+            path is invalid.
+        """
+        path, pattern = self.parse_args(args)
+        separator = ""
+        for match in self.iter_files(path, pattern):
+            yield separator + match
+            separator = "\n"
+
+    def parse_args(self, args):
+        """
+        Extract the search path and the -name pattern.
+
+        Args:
+            args (List[str]): Arguments including optional path
+            and required `-name` [pattern].
+
+        Returns:
+            Tuple[str, str]: Root directory and glob pattern.
+
         Raises:
             ValueError: If arguments are missing or
             path is invalid.
@@ -56,10 +96,10 @@ class FindApp(BaseApp):
             else path_arg
         )
 
-        if not os.path.isdir(path):
+        if not self.files.isdir(path):
             raise ValueError(f"find: {path}: No such directory")
 
-        return self.find_files(path, pattern)
+        return path, pattern
 
     def find_files(self, path, pattern):
         """
@@ -73,21 +113,31 @@ class FindApp(BaseApp):
         Returns:
             str: Relative paths of matched files, each on a separate line.
         """
-        result = []
-        for root, dirs, files in os.walk(path):
+        return "\n".join(self.iter_files(path, pattern))
+
+    def iter_files(self, path, pattern):
+        """
+        Lazily traverse the file tree, yielding the matching files.
+
+        Args:
+            path (str): Root directory to begin the search.
+            pattern (str): Glob pattern to match filenames.
+
+        Yields:
+            str: Relative paths of matched files.
+        """
+        root_dir = self.files.resolve(path)
+        for root, dirs, files in self.files.walk(path):
             for filename in files:
                 if fnmatch.fnmatch(filename, pattern):
                     full_path = os.path.join(root, filename)
                     rel_path = os.path.relpath(
-                        full_path, start=path
+                        full_path, start=root_dir
                     ).replace("\\", "/")
                     if path == ".":
-                        result.append(f"./{rel_path}")
+                        yield f"./{rel_path}"
                     else:
-                        result.append(
-                            os.path.join(path, rel_path).replace("\\", "/")
-                        )
-        return "\n".join(result)
+                        yield os.path.join(path, rel_path).replace("\\", "/")
 
 
 AppRegistry.register("find", FindApp)
@@ -16,6 +16,9 @@ class GrepApp(BaseApp):
     Supports regular expression matching in file contents or standard input.
     """
 
+    cpu_bound = True
+    cache_size = 64
+
     def run(self, args, stdin=None):
         """
         Execute the grep command.
@@ -37,14 +40,9 @@ class GrepApp(BaseApp):
         if not args:
             raise ValueError("grep: no input provided")
 
-        pattern = args[0]
+        regex_pattern = self.compile_pattern(args[0])
         files = args[1:]
 
-        try:
-            regex_pattern = re.compile(pattern)
-        except re.error as e:
-            raise ValueError(f"grep: invalid regular expression: {e}")
-
         if not files:
             if stdin is None:
                 raise ValueError("grep: no input provided")
@@ -52,6 +50,152 @@ class GrepApp(BaseApp):
 
         return self.search_files(files, regex_pattern)
 
+    def run_stream(self, args, lines):
+        """
+        Execute the grep command on streamed input.
+
+        Args:
+            args (List[str]):
+                First argument is the regex pattern; the rest are filenames.
+            lines (Iterator[str]):
+                Input lines (used when no file is provided).
+
+        Yields:
+            str:
+                Matching lines, separated by newlines as in `run`.
+
+        Raises:
+            ValueError:
+                If pattern is missing or files are not found.
+        """
+        return self.iter_output(args, lines, "r")
+
+    def run_bytes(self, args, lines):
+        """
+        Execute the grep command on streamed bytes.
+
+        The pattern is compiled as a bytes pattern and matched against
+        undecoded lines; files are read in binary mode.
+
+        Args:
+            args (List[str]):
+                First argument is the regex pattern; the rest are filenames.
+            lines (Iterator[bytes]):
+                Input lines (used when no file is provided).
+
+        Yields:
+            bytes:
+                Matching lines, separated by newlines as in `run`.
+
+        Raises:
+            ValueError:
+                If pattern is missing or files are not found.
+        """
+        return self.iter_output(args, lines, "rb")
+
+    def iter_output(self, args, lines, mode):
+        """
+        Lazily search files, or stdin, for text or bytes matches.
+
+        Args:
+            args (List[str]): Pattern, then filenames.
+            lines (Iterator): Input lines, used when no file is given.
+            mode (str): "r" to search text, "rb" to search bytes.
+
+        Yields:
+            Matching lines, separated by newlines as in `run`.
+
+        Raises:
+            ValueError: If pattern is missing or files are not found.
+        """
+        if not args:
+            raise ValueError("grep: no input provided")
+
+        pattern = args[0] if mode == "r" else args[0].encode()
+        regex_pattern = self.compile_pattern(pattern)
+        files = args[1:]
+        if files:
+            matches = self.iter_file_matches(files, regex_pattern, mode)
+        else:
+            matches = self.iter_line_matches(lines, regex_pattern)
+
+        newline = "\n" if mode == "r" else b"\n"
+        separator = newline[:0]
+        for match in matches:
+            yield separator + match
+            separator = newline
+
+    def iter_line_matches(self, lines, regex_pattern):
+        """
+        Lazily search for matches in streamed input lines.
+
+        Args:
+            lines (Iterator[AnyStr]): Input lines, with their line endings.
+            regex_pattern (re.Pattern): Compiled regex pattern, of the
+                same type as the lines.
+
+        Yields:
+            AnyStr: Matching lines, without their line endings.
+        """
+        search = regex_pattern.search
+        for line in lines:
+            line = line.splitlines()[0]
+            if search(line):
+                yield line
+
+    def can_split_input(self, args):
+        """
+        Check whether grep can search chunks of stdin separately.
+
+        Args:
+            args (List[str]): Command-line arguments.
+
+        Returns:
+            bool: True if grep searches stdin, i.e. no file is given.
+
+        Raises:
+            ValueError: If pattern is missing or invalid.
+        """
+        if not args:
+            raise ValueError("grep: no input provided")
+        self.compile_pattern(args[0])
+        return len(args) == 1
+
+    def combine_outputs(self, args, outputs):
+        """
+        Join the matches found in consecutive chunks of stdin.
+
+        Args:
+            args (List[str]): Command-line arguments.
+            outputs (Iterable[str]): Matches of each chunk.
+
+        Yields:
+            str: Matching lines, separated by newlines as in `run`.
+        """
+        separator = ""
+        for output in outputs:
+            if output:
+                yield separator + output
+                separator = "\n"
+
+    def compile_pattern(self, pattern):
+        """
+        Compile the regex pattern, or reuse it from the warm cache.
+
+        Args:
+            pattern (AnyStr): Regular expression, as text or bytes.
+
+        Returns:
+            re.Pattern: Compiled regex pattern.
+
+        Raises:
+            ValueError: If the regular expression is invalid.
+        """
+        try:
+            return self.warm(pattern, lambda: re.compile(pattern))
+        except re.error as e:
+            raise ValueError(f"grep: invalid regular expression: {e}")
+
     def search_files(self, files, regex_pattern):
         """
         Search for matches in the given list of files.
@@ -63,21 +207,33 @@ class GrepApp(BaseApp):
         Returns:
             str: Matching lines, possibly prefixed with filenames.
         """
-        result = []
+        result = list(self.iter_file_matches(files, regex_pattern))
+        return "\n".join(result) if result else ""
+
+    def iter_file_matches(self, files, regex_pattern, mode="r"):
+        """
+        Lazily search for matches in the given list of files.
+
+        Args:
+            files (List[str]): List of file paths to search in.
+            regex_pattern (re.Pattern): Compiled regex pattern.
+            mode (str): "r" for a text pattern, "rb" for a bytes one.
+
+        Yields:
+            AnyStr: Matching lines, possibly prefixed with filenames.
+        """
         for file in files:
             try:
-                with open(file, "r") as f:
-                    for line in f:
-                        if regex_pattern.search(line):
-                            match = (
-                                f"{file}:{line.strip()}"
-                                if len(files) > 1
-                                else line.strip()
-                            )
-                            result.append(match)
+                f = self.files.open(file, mode)
             except FileNotFoundError:
                 raise ValueError(f"grep: {file}: No such file")
-        return "\n".join(result) if result else ""
+            prefix = f"{file}:" if len(files) > 1 else ""
+            if mode != "r":
+                prefix = prefix.encode()
+            with f:
+                for line in f:
+                    if regex_pattern.search(line):
+                        yield prefix + line.strip()
 
     def search_stdin(self, input_data, regex_pattern):
         """
@@ -4,6 +4,7 @@ Implementation of the `head` application for PKU Shell.
 Reads and returns the first N lines of a file or standard input.
 """
 
+from itertools import islice
 from apps.base import BaseApp
 from apps.registry import AppRegistry
 
@@ -39,6 +40,63 @@ class HeadApp(BaseApp):
         lines = self.read_input(file, stdin)
         return self.get_head(lines, num_lines)
 
+    def run_stream(self, args, lines):
+        """
+        Execute the head command on streamed input.
+
+        Args:
+            args (List[str]): Command-line arguments.
+            lines (Iterator[str]): Input lines, used when no file is given.
+
+        Yields:
+            str: First N lines of input.
+
+        Raises:
+            ValueError: If input is invalid,
+            file is missing, or flags are incorrect.
+        """
+        return self.iter_head(args, lines, "r")
+
+    def run_bytes(self, args, lines):
+        """
+        Execute the head command on streamed bytes.
+
+        Args:
+            args (List[str]): Command-line arguments.
+            lines (Iterator[bytes]): Input lines, used when no file is
+                given.
+
+        Yields:
+            bytes: First N lines of input, read in binary mode.
+
+        Raises:
+            ValueError: If input is invalid,
+            file is missing, or flags are incorrect.
+        """
+        return self.iter_head(args, lines, "rb")
+
+    def iter_head(self, args, lines, mode):
+        """
+        Lazily read the first N lines of a file or streamed stdin.
+
+        Stops reading its input after the first N lines.
+
+        Args:
+            args (List[str]): Command-line arguments.
+            lines (Iterator[AnyStr]): Input lines, used when no file is
+                given.
+            mode (str): Mode the file is opened in, "r" or "rb".
+
+        Yields:
+            AnyStr: First N lines of input.
+        """
+        num_lines, file = self.parse_args(args) if args else (10, None)
+        source = self.iter_input(file, lines, mode)
+        if num_lines == 0:
+            # Still open the file or check for input, like `run`
+            next(source, None)
+        yield from islice(source, num_lines)
+
     def parse_args(self, args):
         """
         Parse arguments and extract number of lines and filename.
@@ -67,6 +125,10 @@ class HeadApp(BaseApp):
             except ValueError:
                 raise ValueError("head: invalid number of lines")
             file = args[2]
+        elif len(args) == 2 and args[0] == "-n" and args[1].isdigit():
+            # `-n N` without a file reads stdin; other two-argument
+            # forms are still reported as wrong flags
+            num_lines = int(args[1])
         elif len(args) >= 2 and args[0].startswith("-"):
             raise ValueError("head: wrong flags")
         else:
@@ -92,7 +154,7 @@ class HeadApp(BaseApp):
         """
         if file:
             try:
-                with open(file, "r") as f:
+                with self.files.open(file, "r") as f:
                     return f.readlines()
             except FileNotFoundError:
                 raise ValueError(f"head: {file}: No such file")
@@ -103,6 +165,40 @@ class HeadApp(BaseApp):
         else:
             raise ValueError("head: no input provided")
 
+    def iter_input(self, file, lines, mode="r"):
+        """
+        Lazily read lines from file or streamed stdin.
+
+        Args:
+            file (str): File path to read.
+            lines (Iterator[AnyStr]): Input lines, used when no file is
+                given.
+            mode (str): Mode the file is opened in, "r" or "rb".
+
+        Yields:
+            AnyStr: Lines of input.
+
+        Raises:
+            ValueError: If file is missing or permission is denied,
+            or there is no input.
+        """
+        if file:
+            try:
+                f = self.files.open(file, mode)
+            except FileNotFoundError:
+                raise ValueError(f"head: {file}: No such file")
+            except PermissionError:
+                raise ValueError(f"head: {file}: Permission denied")
+            with f:
+                yield from f
+            return
+
+        first = next(lines, None)
+        if first is None:
+            raise ValueError("head: no input provided")
+        yield first
+        yield from lines
+
     def get_head(self, lines, num_lines):
         """
         Return the first `num_lines` from the input.
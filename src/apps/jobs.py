@@ -0,0 +1,41 @@
+"""
+Implementation of the `jobs` shell builtin for PKU Shell.
+
+Lists the background jobs of the session with their state.
+"""
+
+from apps.base import BaseApp
+from apps.registry import AppRegistry
+
+
+class JobsApp(BaseApp):
+    """
+    Application that implements the `jobs` builtin.
+
+    Like `cd`, it returns an action dictionary: the executor lists the
+    jobs of the session (see executor.jobs).
+    """
+
+    stateful = True
+
+    def run(self, args, stdin=None):
+        """
+        Execute the jobs command.
+
+        Args:
+            args (List[str]): Must be empty.
+            stdin (str, optional): Ignored for jobs.
+
+        Returns:
+            dict: {"action": "jobs"}.
+
+        Raises:
+            ValueError: If any arguments are provided.
+        """
+        if args:
+            raise ValueError("jobs: too many arguments")
+        return {"action": "jobs"}
+
+
+# Register the safe `jobs` app
+AppRegistry.register("jobs", JobsApp)
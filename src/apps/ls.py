@@ -6,7 +6,6 @@ Lists non-hidden files and directories in the given path.
 
 from apps.base import BaseApp
 from apps.registry import AppRegistry
-import os
 
 
 class LsApp(BaseApp):
@@ -36,17 +35,17 @@ class LsApp(BaseApp):
         if len(args) > 1:
             raise ValueError("ls: wrong number of command line arguments")
 
-        path = args[0] if args else os.getcwd()
+        path = args[0] if args else self.files.cwd
 
         if not isinstance(path, str) or not path.strip():
             raise ValueError("ls: path cannot be empty or invalid")
 
-        if not os.path.isdir(path):
+        if not self.files.isdir(path):
             raise ValueError(f"ls: cannot access '{path}': No such directory")
 
         result = []
         try:
-            for item in os.listdir(path):
+            for item in self.files.listdir(path):
                 if not item.startswith("."):
                     result.append(item)
         except PermissionError:
@@ -6,7 +6,6 @@ Returns the current working directory.
 
 from apps.base import BaseApp
 from apps.registry import AppRegistry
-import os
 
 
 class PwdApp(BaseApp):
@@ -33,7 +32,7 @@ class PwdApp(BaseApp):
         """
         if args:
             raise ValueError("pwd: too many arguments")
-        return os.getcwd() + "\n"
+        return self.files.cwd + "\n"
 
 
 AppRegistry.register("pwd", PwdApp)
@@ -2,9 +2,11 @@
 Application registry for PKU Shell.
 
 This module maintains a global registry of available shell applications,
-mapping command names to their corresponding class implementations.
+mapping command names to their corresponding class implementations, and
+the app instances reused by every command.
 """
 
+import threading
 from typing import Dict, Type
 from apps.base import BaseApp
 
@@ -16,9 +18,15 @@ class AppRegistry:
     This class maps command names (e.g., 'echo', 'cat') to their corresponding
     application classes (subclasses of BaseApp). It supports dynamic
     registration and lookup of applications.
+
+    Each command name has one app instance, created on first use, or one
+    per thread for apps that set `thread_local`.
     """
 
     _registry: Dict[str, Type[BaseApp]] = {}
+    _instances: Dict[str, BaseApp] = {}
+    _local = threading.local()
+    _generation = 0
 
     @classmethod
     def register(cls, name: str, app_cls: Type[BaseApp]):
@@ -30,21 +38,120 @@ class AppRegistry:
             app_cls (Type[BaseApp]): The class that implements the application.
         """
         cls._registry[name] = app_cls
+        cls.reset()
+
+    @classmethod
+    def unregister(cls, name: str):
+        """
+        Remove the application registered under a command name.
+
+        Args:
+            name (str): The shell command name.
+        """
+        cls._registry.pop(name, None)
+        cls.reset()
 
     @classmethod
     def get(cls, name: str) -> BaseApp:
         """
-        Retrieve an application instance by command name.
+        Retrieve the application instance for a command name.
+
+        The instance is shared by every command (see `BaseApp`), or by
+        the commands of the calling thread for `thread_local` apps.
 
         Args:
             name (str): The shell command name.
 
         Returns:
-            BaseApp: An instance of the corresponding application class.
+            BaseApp: The instance of the corresponding application class.
 
         Raises:
             Exception: If the command name is not registered.
         """
-        if name not in cls._registry:
+        app_cls = cls._registry.get(name)
+        if app_cls is None:
             raise Exception(f"Unknown command: {name}")
-        return cls._registry[name]()
+        instances = cls._instances
+        if app_cls.thread_local:
+            local = cls._local
+            if getattr(local, "generation", None) != cls._generation:
+                local.instances = {}
+                local.generation = cls._generation
+            instances = local.instances
+        app = instances.get(name)
+        if app is None:
+            app = instances[name] = app_cls()
+        return app
+
+    @classmethod
+    def reset(cls):
+        """
+        Drop every app instance and its warm state.
+
+        New instances are created on next use; thread-local ones are
+        dropped by each thread on its next lookup.
+        """
+        for app in list(cls._instances.values()):
+            app.reset()
+        cls._instances = {}
+        cls._generation += 1
+
+    @classmethod
+    def supports_stream(cls, name: str) -> bool:
+        """
+        Check whether a command can run in a streaming pipeline.
+
+        Args:
+            name (str): The shell command name.
+
+        Returns:
+            bool: True if the command is registered and its application
+            implements `run_stream`.
+        """
+        app_cls = cls._registry.get(name)
+        return app_cls is not None and app_cls.supports_stream()
+
+    @classmethod
+    def supports_bytes(cls, name: str) -> bool:
+        """
+        Check whether a command can run in a pipeline in bytes mode.
+
+        Args:
+            name (str): The shell command name.
+
+        Returns:
+            bool: True if the command is registered and its application
+            implements `run_bytes`.
+        """
+        app_cls = cls._registry.get(name)
+        return app_cls is not None and app_cls.supports_bytes()
+
+    @classmethod
+    def is_stateful(cls, name: str) -> bool:
+        """
+        Check whether a command acts on the shell session.
+
+        Args:
+            name (str): The shell command name.
+
+        Returns:
+            bool: True if the command is registered and its application
+            is `stateful`.
+        """
+        app_cls = cls._registry.get(name)
+        return app_cls is not None and app_cls.stateful
+
+    @classmethod
+    def supports_split(cls, name: str) -> bool:
+        """
+        Check whether a command can run on chunks of its input.
+
+        Args:
+            name (str): The shell command name.
+
+        Returns:
+            bool: True if the command is registered and its application
+            implements `combine_outputs`.
+        """
+        app_cls = cls._registry.get(name)
+        return app_cls is not None and app_cls.supports_split()
@@ -5,6 +5,7 @@ Supports sorting lines from files or standard input with
 optional reverse ordering.
 """
 
+import heapq
 from apps.base import BaseApp
 from apps.registry import AppRegistry
 
@@ -18,6 +19,8 @@ class SortApp(BaseApp):
     - Sorting in ascending (default) or descending (-r) order
     """
 
+    cpu_bound = True
+
     def run(self, args, stdin=None):
         """
         Execute the sort application.
@@ -33,6 +36,75 @@ class SortApp(BaseApp):
         lines = self.read_input(file, stdin)
         return self.process_sort(lines, options)
 
+    def run_bytes(self, args, lines):
+        """
+        Execute the sort application on streamed bytes.
+
+        Lines are compared as bytes, which orders UTF-8 text as `run`
+        orders the decoded text.
+
+        Args:
+            args (List[str]): Command-line arguments, e.g., ['-r', 'file.txt']
+            lines (Iterator[bytes]): Input lines from a pipeline
+
+        Yields:
+            bytes: Sorted input
+        """
+        options, file = self.parse_args(args)
+        if file:
+            lines = self.read_file(file, "rb")
+        else:
+            lines = list(lines)
+            if not lines:
+                raise ValueError("sort: missing input")
+        yield b"".join(sorted(lines, reverse=options["reverse"]))
+
+    def can_split_input(self, args):
+        """
+        Check whether sort can sort chunks of stdin separately.
+
+        Args:
+            args (List[str]): Command-line arguments.
+
+        Returns:
+            bool: True if sort reads stdin, i.e. no file is given.
+
+        Raises:
+            ValueError: On invalid arguments.
+        """
+        _, file = self.parse_args(args)
+        return not file
+
+    def run_chunk(self, args, chunk):
+        """
+        Sort the lines of one chunk of stdin.
+
+        Args:
+            args (List[str]): Command-line arguments.
+            chunk (str): Consecutive whole lines of stdin.
+
+        Returns:
+            List[str]: Sorted lines of the chunk.
+        """
+        options, _ = self.parse_args(args)
+        return sorted(
+            chunk.splitlines(keepends=True), reverse=options["reverse"]
+        )
+
+    def combine_outputs(self, args, outputs):
+        """
+        Merge the sorted chunks of stdin.
+
+        Args:
+            args (List[str]): Command-line arguments.
+            outputs (Iterable[List[str]]): Sorted lines of each chunk.
+
+        Yields:
+            str: All lines in sorted order.
+        """
+        options, _ = self.parse_args(args)
+        yield "".join(heapq.merge(*outputs, reverse=options["reverse"]))
+
     def parse_args(self, args):
         """
         Parse command-line arguments.
@@ -78,18 +150,34 @@ class SortApp(BaseApp):
             ValueError: If file is missing or unreadable
         """
         if file:
-            try:
-                with open(file, "r") as f:
-                    return f.readlines()
-            except FileNotFoundError:
-                raise ValueError(f"sort: {file}: No such file")
-            except PermissionError:
-                raise ValueError(f"sort: {file}: Permission denied")
+            return self.read_file(file, "r")
         elif stdin:
             return stdin.splitlines(keepends=True)
         else:
             raise ValueError("sort: missing input")
 
+    def read_file(self, file, mode):
+        """
+        Read the lines of a file.
+
+        Args:
+            file (str): File path to read.
+            mode (str): Mode the file is opened in, "r" or "rb".
+
+        Returns:
+            List[AnyStr]: Lines of the file
+
+        Raises:
+            ValueError: If file is missing or unreadable
+        """
+        try:
+            with self.files.open(file, mode) as f:
+                return f.readlines()
+        except FileNotFoundError:
+            raise ValueError(f"sort: {file}: No such file")
+        except PermissionError:
+            raise ValueError(f"sort: {file}: Permission denied")
+
     def process_sort(self, lines, options):
         """
         Sort the input lines.
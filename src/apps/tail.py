@@ -5,6 +5,7 @@ Returns the last N lines of input from a file or stdin.
 Supports the '-n' flag to specify number of lines.
 """
 
+from collections import deque
 from apps.base import BaseApp
 from apps.registry import AppRegistry
 
@@ -37,6 +38,51 @@ class TailApp(BaseApp):
         lines = self.read_input(file, stdin)
         return self.get_tail(lines, num_lines)
 
+    def run_stream(self, args, lines):
+        """
+        Execute the tail application on streamed input.
+
+        Only the last N lines are kept in memory.
+
+        Args:
+            args (List[str]): Command-line arguments.
+            lines (Iterator[str]): Input lines, used when no file is given.
+
+        Yields:
+            str: Last N lines of the input.
+        """
+        return self.iter_tail(args, lines, "r")
+
+    def run_bytes(self, args, lines):
+        """
+        Execute the tail application on streamed bytes.
+
+        Args:
+            args (List[str]): Command-line arguments.
+            lines (Iterator[bytes]): Input lines, used when no file is
+                given.
+
+        Yields:
+            bytes: Last N lines of the input, read in binary mode.
+        """
+        return self.iter_tail(args, lines, "rb")
+
+    def iter_tail(self, args, lines, mode):
+        """
+        Read a file or streamed stdin, keeping only its last N lines.
+
+        Args:
+            args (List[str]): Command-line arguments.
+            lines (Iterator[AnyStr]): Input lines, used when no file is
+                given.
+            mode (str): Mode the file is opened in, "r" or "rb".
+
+        Yields:
+            AnyStr: Last N lines of the input.
+        """
+        num_lines, file = self.parse_args(args) if args else (10, None)
+        yield from deque(self.iter_input(file, lines, mode), maxlen=num_lines)
+
     def parse_args(self, args):
         """
         Parse command-line arguments.
@@ -62,6 +108,10 @@ class TailApp(BaseApp):
             except ValueError:
                 raise ValueError("tail: invalid number of lines")
             file = args[2]
+        elif len(args) == 2 and args[0] == "-n" and args[1].isdigit():
+            # `-n N` without a file reads stdin; other two-argument
+            # forms are still reported as wrong flags
+            num_lines = int(args[1])
         elif len(args) >= 2 and args[0].startswith("-"):
             raise ValueError("tail: wrong flags")
         else:
@@ -83,7 +133,7 @@ class TailApp(BaseApp):
         """
         if file:
             try:
-                with open(file, "r") as f:
+                with self.files.open(file, "r") as f:
                     return f.readlines()
             except FileNotFoundError:
                 raise ValueError(f"tail: {file}: No such file")
@@ -94,6 +144,40 @@ class TailApp(BaseApp):
         else:
             raise ValueError("tail: no input provided")
 
+    def iter_input(self, file, lines, mode="r"):
+        """
+        Lazily read lines from file or streamed stdin.
+
+        Args:
+            file (str): File path to read.
+            lines (Iterator[AnyStr]): Input lines, used when no file is
+                given.
+            mode (str): Mode the file is opened in, "r" or "rb".
+
+        Yields:
+            AnyStr: Lines of input.
+
+        Raises:
+            ValueError: If file is missing or permission is denied,
+            or there is no input.
+        """
+        if file:
+            try:
+                f = self.files.open(file, mode)
+            except FileNotFoundError:
+                raise ValueError(f"tail: {file}: No such file")
+            except PermissionError:
+                raise ValueError(f"tail: {file}: Permission denied")
+            with f:
+                yield from f
+            return
+
+        first = next(lines, None)
+        if first is None:
+            raise ValueError("tail: no input provided")
+        yield first
+        yield from lines
+
     def get_tail(self, lines, num_lines):
         """
         Get the last N lines from the input.
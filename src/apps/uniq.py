@@ -18,6 +18,8 @@ class UniqApp(BaseApp):
     - Supports `-i` flag for case-insensitive comparison
     """
 
+    cpu_bound = True
+
     def run(self, args, stdin=None):
         """
         Execute the uniq application.
@@ -33,6 +35,64 @@ class UniqApp(BaseApp):
         lines = self.read_input(file, stdin)
         return self.process_uniq(lines, options)
 
+    def run_stream(self, args, lines):
+        """
+        Execute the uniq application on streamed input.
+
+        Args:
+            args (List[str]): Command-line arguments.
+            lines (Iterator[str]): Input lines from pipe.
+
+        Yields:
+            str: Lines with adjacent duplicates removed.
+        """
+        return self.iter_input_uniq(args, lines, "r")
+
+    def run_bytes(self, args, lines):
+        """
+        Execute the uniq application on streamed bytes.
+
+        With `-i`, only ASCII letters are compared without case.
+
+        Args:
+            args (List[str]): Command-line arguments.
+            lines (Iterator[bytes]): Input lines from pipe.
+
+        Yields:
+            bytes: Lines with adjacent duplicates removed.
+        """
+        return self.iter_input_uniq(args, lines, "rb")
+
+    def iter_input_uniq(self, args, lines, mode):
+        """
+        Lazily remove adjacent duplicates from a file or streamed stdin.
+
+        Args:
+            args (List[str]): Command-line arguments.
+            lines (Iterator[AnyStr]): Input lines from pipe.
+            mode (str): Mode the file is opened in, "r" or "rb".
+
+        Yields:
+            AnyStr: Lines with adjacent duplicates removed.
+        """
+        options, file = self.parse_args(args)
+        if file:
+            try:
+                f = self.files.open(file, mode)
+            except FileNotFoundError:
+                raise ValueError(f"uniq: {file}: No such file")
+            except PermissionError:
+                raise ValueError(f"uniq: {file}: Permission denied")
+            with f:
+                yield from self.iter_uniq(f, options)
+            return
+
+        first = next(lines, None)
+        if first is None:
+            raise ValueError("uniq: missing input")
+        yield first
+        yield from self.iter_uniq(lines, options, first.strip())
+
     def parse_args(self, args):
         """
         Parse command-line arguments for `uniq`.
@@ -82,7 +142,7 @@ class UniqApp(BaseApp):
         """
         if file:
             try:
-                with open(file, "r") as f:
+                with self.files.open(file, "r") as f:
                     return f.readlines()
             except FileNotFoundError:
                 raise ValueError(f"uniq: {file}: No such file")
@@ -106,21 +166,31 @@ class UniqApp(BaseApp):
         Returns:
             str: Filtered output string.
         """
+        return "".join(self.iter_uniq(lines, options))
+
+    def iter_uniq(self, lines, options, prev_line=None):
+        """
+        Lazily remove adjacent duplicates from the lines.
+
+        Args:
+            lines (Iterable[AnyStr]): Input lines.
+            options (dict): Options parsed from CLI.
+            prev_line (AnyStr, optional): Stripped line preceding `lines`.
+
+        Yields:
+            AnyStr: Lines that differ from the previous one.
+        """
         ignore_case = options.get("ignore_case", False)
-        result = []
-        prev_line = None
 
         for line in lines:
             comp_line = line.strip()
             if ignore_case:
                 if prev_line is None or comp_line.lower() != prev_line.lower():
-                    result.append(line)
+                    yield line
             else:
                 if prev_line is None or comp_line != prev_line:
-                    result.append(line)
+                    yield line
             prev_line = comp_line
 
-        return "".join(result)
-
 
 AppRegistry.register("uniq", UniqApp)
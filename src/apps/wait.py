@@ -0,0 +1,61 @@
+"""
+Implementation of the `wait` shell builtin for PKU Shell.
+
+Waits for background jobs (started with `&`) and outputs what they
+printed, in job order.
+"""
+
+from apps.base import BaseApp
+from apps.registry import AppRegistry
+
+
+class WaitApp(BaseApp):
+    """
+    Application that implements the `wait` builtin.
+
+    Like `cd`, it returns an action dictionary: the executor waits for
+    the jobs of the session (see executor.jobs).
+    """
+
+    stateful = True
+
+    def run(self, args, stdin=None):
+        """
+        Execute the wait command.
+
+        Args:
+            args (List[str]): Job numbers, as `N` or `%N`; all jobs if
+                empty.
+            stdin (str, optional): Ignored for wait.
+
+        Returns:
+            dict: {"action": "wait", "jobs": numbers or None}.
+
+        Raises:
+            ValueError: If an argument is not a job number.
+        """
+        if not args:
+            return {"action": "wait", "jobs": None}
+        return {"action": "wait", "jobs": [self.parse_job(a) for a in args]}
+
+    def parse_job(self, arg):
+        """
+        Parse a job number.
+
+        Args:
+            arg (str): `N` or `%N`.
+
+        Returns:
+            int: The job number.
+
+        Raises:
+            ValueError: If the argument is not a positive number.
+        """
+        number = arg[1:] if arg.startswith("%") else arg
+        if not number.isdigit() or int(number) == 0:
+            raise ValueError(f"wait: {arg}: not a valid job")
+        return int(number)
+
+
+# Register the safe `wait` app
+AppRegistry.register("wait", WaitApp)
@@ -42,6 +42,76 @@ class WcApp(BaseApp):
         output = self.format_output(counts, options)
         return output.strip() if output else ""
 
+    def run_stream(self, args, lines):
+        """
+        Execute the wc application on streamed input.
+
+        Counts are accumulated line by line, so the input is never held
+        in memory as a whole.
+
+        Args:
+            args (List[str]): Command-line arguments.
+            lines (Iterator[str]): Input lines from pipe.
+
+        Yields:
+            str: Formatted counts based on specified flags.
+        """
+        return self.iter_counts(args, lines, "r")
+
+    def run_bytes(self, args, lines):
+        """
+        Execute the wc application on streamed bytes.
+
+        Files are read in binary mode. Words and characters are counted
+        as in `run` on UTF-8 text, but only lines that are not ASCII are
+        decoded to count them.
+
+        Args:
+            args (List[str]): Command-line arguments.
+            lines (Iterator[bytes]): Input lines from pipe.
+
+        Yields:
+            bytes: Formatted counts based on specified flags.
+        """
+        for output in self.iter_counts(args, lines, "rb"):
+            yield output.encode()
+
+    def iter_counts(self, args, lines, mode):
+        """
+        Count the lines, words and characters of files or streamed stdin.
+
+        Args:
+            args (List[str]): Command-line arguments.
+            lines (Iterator[AnyStr]): Input lines from pipe.
+            mode (str): Mode the files are opened in, "r" or "rb".
+
+        Yields:
+            str: Formatted counts based on specified flags.
+        """
+        options, files = self.parse_arguments(args)
+
+        if not any(options.values()):
+            options = {"lines": True, "words": True, "chars": True}
+
+        add_counts = self.add_counts if mode == "r" else self.add_byte_counts
+        counts = {"lines": 0, "words": 0, "chars": 0}
+        if files:
+            for file in files:
+                try:
+                    f = self.files.open(file, mode)
+                except FileNotFoundError:
+                    raise ValueError(f"wc: {file}: No such file")
+                with f:
+                    add_counts(counts, f)
+            # `run` joins the contents of the files with newlines
+            counts["lines"] += len(files) - 1
+            counts["chars"] += len(files) - 1
+        else:
+            add_counts(counts, lines)
+
+        output = self.format_output(counts, options)
+        yield output.strip() if output else ""
+
     def parse_arguments(self, args):
         """
         Parse wc command-line flags and filenames.
@@ -90,7 +160,7 @@ class WcApp(BaseApp):
             data = []
             for file in files:
                 try:
-                    with open(file, "r") as f:
+                    with self.files.open(file, "r") as f:
                         data.append(f.read())
                 except FileNotFoundError:
                     raise ValueError(f"wc: {file}: No such file")
@@ -116,6 +186,45 @@ class WcApp(BaseApp):
             "chars": len(content)
         }
 
+    def add_counts(self, counts, lines):
+        """
+        Add the counts of each line to running totals.
+
+        Args:
+            counts (dict): Totals for 'lines', 'words', and 'chars'.
+            lines (Iterable[str]): Lines to count.
+        """
+        newlines = words = chars = 0
+        for line in lines:
+            newlines += line.count("\n")
+            words += len(line.split())
+            chars += len(line)
+        counts["lines"] += newlines
+        counts["words"] += words
+        counts["chars"] += chars
+
+    def add_byte_counts(self, counts, lines):
+        """
+        Add the counts of each bytes line to running totals.
+
+        ASCII lines are counted as they are; other lines are decoded
+        from UTF-8 to count their words and characters like text.
+
+        Args:
+            counts (dict): Totals for 'lines', 'words', and 'chars'.
+            lines (Iterable[bytes]): Lines to count.
+        """
+        newlines = words = chars = 0
+        for line in lines:
+            newlines += line.count(b"\n")
+            if not line.isascii():
+                line = line.decode(errors="replace")
+            words += len(line.split())
+            chars += len(line)
+        counts["lines"] += newlines
+        counts["words"] += words
+        counts["chars"] += chars
+
     def format_output(self, counts, options):
         """
         Format the output based on enabled flags.
@@ -0,0 +1,345 @@
+"""
+Buffers between the stages of buffered pipelines in PKU Shell.
+
+A buffered stage writes its whole output before the next stage reads it.
+`ChunkBuffer` keeps the strings written to it as a list of chunks,
+without copying them, and the next stage reads them from the same
+buffer: a stage reading all of its input with `read()` gets the very
+string the previous stage wrote when it wrote a single one, as apps
+returning their output do. Only reads of part of the input (e.g. by
+streamed stages) slice the chunks.
+
+Buffers start in memory and spill to a temporary file once they hold
+more than `PKU_SHELL_SPILL_SIZE` characters (64 Mi by default), or once
+the buffers of a session would hold more than its `MemoryBudget`
+(`PKU_SHELL_MEMORY_BUDGET` characters; unlimited by default). The next
+stage then reads from the file through the same buffer. Spills are
+counted per session and in `stats`.
+"""
+
+import io
+import os
+import tempfile
+import threading
+from collections import Counter
+from typing import List, Optional
+
+# Set PKU_SHELL_SPILL_SIZE to the number of characters a buffer keeps
+# in memory before it spills to a temporary file
+SPILL_SIZE = int(os.environ.get("PKU_SHELL_SPILL_SIZE", 64 * 1024 * 1024))
+# Set PKU_SHELL_MEMORY_BUDGET to the number of characters the buffers
+# of a session may keep in memory together (0, the default, for no limit)
+MEMORY_BUDGET = int(os.environ.get("PKU_SHELL_MEMORY_BUDGET", 0))
+
+# Spills of all sessions: "spills" counts buffers spilled to a file and
+# "spilled" the characters they wrote to it. Updated under _stats_lock,
+# as buffers of background jobs and substitutions spill concurrently
+stats: Counter = Counter()
+_stats_lock = threading.Lock()
+
+
+class MemoryBudget:
+    """
+    Number of characters the pipeline buffers of a session may keep in
+    memory, and the spills of its buffers.
+    """
+
+    __slots__ = ("limit", "used", "spills", "spilled", "_lock")
+
+    def __init__(self, limit: Optional[int] = None):
+        """
+        Create a budget.
+
+        Args:
+            limit (Optional[int]): Number of characters; MEMORY_BUDGET
+                by default, 0 for no limit.
+        """
+        self.limit = (MEMORY_BUDGET if limit is None else limit) or None
+        self.used = 0
+        self.spills = 0
+        self.spilled = 0
+        # Background jobs and substitutions share their session's budget
+        self._lock = threading.Lock()
+
+    def reserve(self, size: int) -> bool:
+        """
+        Reserve memory for characters, if the budget allows it.
+
+        Args:
+            size (int): Number of characters.
+
+        Returns:
+            bool: True if reserved, False if over the budget.
+        """
+        with self._lock:
+            if self.limit is not None and self.used + size > self.limit:
+                return False
+            self.used += size
+            return True
+
+    def release(self, size: int):
+        """Give back memory reserved for characters."""
+        with self._lock:
+            self.used -= size
+
+    def count_spill(self, size: int, new_file: bool = False):
+        """
+        Count characters a buffer wrote to its spill file.
+
+        Args:
+            size (int): Number of characters.
+            new_file (bool): Whether the buffer has just spilled.
+        """
+        with self._lock:
+            self.spills += new_file
+            self.spilled += size
+
+
+class ChunkBuffer(io.TextIOBase):
+    """
+    Text stream holding its content as written chunks until it spills
+    to a temporary file.
+
+    Written strings are stored by reference and read back in order; the
+    position can be saved with `tell` and restored with `seek`. Closing
+    the buffer gives back its memory to the budget and deletes its file.
+    """
+
+    def __init__(
+        self,
+        budget: Optional[MemoryBudget] = None,
+        spill_size: Optional[int] = None
+    ):
+        """
+        Create an empty buffer.
+
+        Args:
+            budget (Optional[MemoryBudget]): Budget of the session; by
+                default the buffer only spills past `spill_size`.
+            spill_size (Optional[int]): Number of characters kept in
+                memory before spilling; SPILL_SIZE by default.
+        """
+        super().__init__()
+        self._budget = budget
+        self._spill_size = SPILL_SIZE if spill_size is None else spill_size
+        self._chunks: List[str] = []
+        self._size = 0
+        # Read position: index of a chunk and offset in it
+        self._index = 0
+        self._offset = 0
+        # Once spilled: the file, whether it was last written, and the
+        # read position while it is
+        self._file = None
+        self._writing = False
+        self._file_position = 0
+
+    @property
+    def spilled(self) -> bool:
+        """Whether the content of the buffer is in a temporary file."""
+        return self._file is not None
+
+    def readable(self) -> bool:
+        return True
+
+    def writable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def write(self, text: str) -> int:
+        """
+        Append text to the buffer, without copying it while in memory.
+
+        Args:
+            text (str): Text to append.
+
+        Returns:
+            int: Number of characters written.
+        """
+        if self.closed:
+            raise ValueError("I/O operation on closed buffer")
+        if not text:
+            return 0
+        if self._file is None:
+            if self._size + len(text) <= self._spill_size and (
+                self._budget is None or self._budget.reserve(len(text))
+            ):
+                self._chunks.append(text)
+                self._size += len(text)
+                return len(text)
+            self._spill()
+        self._to_write()
+        self._file.write(text)
+        self._count_spill(len(text))
+        return len(text)
+
+    def read(self, size: int = -1) -> str:
+        """
+        Read up to `size` characters, or all that is left.
+
+        Args:
+            size (int): Maximum number of characters; all if negative
+                or None.
+
+        Returns:
+            str: The text read; "" at the end of the buffer.
+        """
+        if self.closed:
+            raise ValueError("I/O operation on closed buffer")
+        if self._file is not None:
+            self._to_read()
+            return self._file.read(size)
+        chunks = self._chunks
+        if size is None or size < 0:
+            rest = chunks[self._index:]
+            if rest and self._offset:
+                rest[0] = rest[0][self._offset:]
+            self._index, self._offset = len(chunks), 0
+            # Joining a single string returns it unchanged
+            return "".join(rest)
+        parts = []
+        while size > 0 and self._index < len(chunks):
+            chunk = chunks[self._index]
+            end = min(self._offset + size, len(chunk))
+            parts.append(chunk[self._offset:end])
+            size -= end - self._offset
+            if end == len(chunk):
+                self._index, self._offset = self._index + 1, 0
+            else:
+                self._offset = end
+        return "".join(parts)
+
+    def readline(self, size: int = -1) -> str:
+        """
+        Read up to and including the next "\\n".
+
+        Args:
+            size (int): Maximum number of characters; unlimited if
+                negative or None.
+
+        Returns:
+            str: The line read; "" at the end of the buffer.
+        """
+        if self.closed:
+            raise ValueError("I/O operation on closed buffer")
+        if self._file is not None:
+            self._to_read()
+            return self._file.readline(-1 if size is None else size)
+        parts = []
+        left = -1 if size is None else size
+        while left and self._index < len(self._chunks):
+            chunk = self._chunks[self._index]
+            end = chunk.find("\n", self._offset) + 1 or len(chunk)
+            if left > 0:
+                end = min(end, self._offset + left)
+                left -= end - self._offset
+            parts.append(chunk[self._offset:end])
+            if end == len(chunk):
+                self._index, self._offset = self._index + 1, 0
+            else:
+                self._offset = end
+            if parts[-1].endswith("\n"):
+                break
+        return "".join(parts)
+
+    def tell(self) -> int:
+        """Return the read position, an opaque number once spilled."""
+        if self.closed:
+            raise ValueError("I/O operation on closed buffer")
+        if self._file is not None:
+            self._to_read()
+            return self._file.tell()
+        return sum(map(len, self._chunks[:self._index])) + self._offset
+
+    def seek(self, position: int, whence: int = io.SEEK_SET) -> int:
+        """
+        Move the read position.
+
+        Args:
+            position (int): Position as returned by `tell`; only 0 is
+                supported relative to the end.
+            whence (int): io.SEEK_SET, or io.SEEK_END with position 0.
+
+        Returns:
+            int: The new position.
+        """
+        if self.closed:
+            raise ValueError("I/O operation on closed buffer")
+        if self._file is not None:
+            self._to_read()
+            return self._file.seek(position, whence)
+        if whence == io.SEEK_END and position == 0:
+            self._index, self._offset = len(self._chunks), 0
+            return self.tell()
+        if whence != io.SEEK_SET or position < 0:
+            raise io.UnsupportedOperation("unsupported seek")
+        self._index, self._offset = 0, 0
+        for chunk in self._chunks:
+            if position < len(chunk):
+                break
+            position -= len(chunk)
+            self._index += 1
+        self._offset = position if self._index < len(self._chunks) else 0
+        return self.tell()
+
+    def getvalue(self) -> str:
+        """Return the whole content of the buffer, like StringIO."""
+        if self.closed:
+            raise ValueError("I/O operation on closed buffer")
+        if self._file is not None:
+            position = self.tell()
+            self._file.seek(0)
+            value = self._file.read()
+            self._file.seek(position)
+            return value
+        return "".join(self._chunks)
+
+    def close(self):
+        """Give back the buffer's memory and delete its file."""
+        if not self.closed:
+            if self._budget is not None:
+                self._budget.release(self._size)
+            self._chunks = []
+            self._size = 0
+            if self._file is not None:
+                self._file.close()
+        super().close()
+
+    def _spill(self):
+        """Move the unread content of the buffer to a temporary file."""
+        # Any str can be written, including lone surrogates
+        self._file = tempfile.TemporaryFile(
+            "w+", encoding="utf-8", errors="surrogatepass", newline=""
+        )
+        self._writing = True
+        rest = self._chunks[self._index:]
+        if rest and self._offset:
+            rest[0] = rest[0][self._offset:]
+        self._file.writelines(rest)
+        self._count_spill(sum(map(len, rest)), new_file=True)
+        if self._budget is not None:
+            self._budget.release(self._size)
+        self._chunks = []
+        self._size = 0
+        self._index = self._offset = 0
+
+    def _count_spill(self, size: int, new_file: bool = False):
+        """Count characters written to the file, in the stats and budget."""
+        with _stats_lock:
+            stats.update(spills=int(new_file), spilled=size)
+        if self._budget is not None:
+            self._budget.count_spill(size, new_file)
+
+    def _to_write(self):
+        """Move to the end of the file, keeping the read position."""
+        if not self._writing:
+            self._file_position = self._file.tell()
+            self._file.seek(0, io.SEEK_END)
+            self._writing = True
+
+    def _to_read(self):
+        """Move back to the read position in the file."""
+        if self._writing:
+            self._file.seek(self._file_position)
+            self._writing = False
@@ -0,0 +1,120 @@
+"""
+Copy-on-write environment variables for PKU Shell.
+
+Every execution context has its own environment, but copying the whole
+process environment for each command and pipeline stage is costly. An
+`Environment` is instead a stack of layers: its own overlay of changes,
+on top of the overlays of the environments it was copied from and, at
+the bottom, `os.environ`. Copying an environment only adds a layer, and
+its overlay is copied only when the environment is changed after being
+shared.
+
+Changes are never written to `os.environ`. Since the bottom layer is
+read live, changes made to `os.environ` by the shell itself are seen by
+every environment that does not override them.
+"""
+
+import os
+from collections.abc import MutableMapping
+from typing import Dict, Iterator, Mapping, Optional, Tuple
+
+# Marks a variable deleted in an overlay
+_DELETED = object()
+
+
+class Environment(MutableMapping):
+    """
+    Copy-on-write mapping of environment variables.
+
+    Lookups go through the environment's overlay, then the overlays it
+    was copied from, newest first, then the base mapping. A shared
+    overlay is never modified: it is copied by the next write.
+    """
+
+    __slots__ = ("_overlay", "_layers", "_base", "_shared")
+
+    def __init__(
+        self,
+        base: Optional[Mapping[str, str]] = None,
+        layers: Tuple[Dict[str, object], ...] = ()
+    ):
+        """
+        Create an environment without changes.
+
+        Args:
+            base (Optional[Mapping[str, str]]): Bottom layer; defaults
+                to `os.environ`.
+            layers (Tuple[Dict[str, object], ...]): Shared overlays,
+                newest first.
+        """
+        self._overlay: Dict[str, object] = {}
+        self._layers = layers
+        self._base = os.environ if base is None else base
+        self._shared = False
+
+    def copy(self) -> "Environment":
+        """
+        Return an independent copy of the environment in O(1).
+
+        Returns:
+            Environment: Environment with the same variables, whose
+            changes do not affect this one, nor the other way round.
+        """
+        layers = self._layers
+        if self._overlay:
+            layers = (self._overlay,) + layers
+            self._shared = True
+        return Environment(self._base, layers)
+
+    def _lookup(self, key: str) -> object:
+        """Return the value of `key`, `_DELETED` if unset."""
+        if key in self._overlay:
+            return self._overlay[key]
+        for layer in self._layers:
+            if key in layer:
+                return layer[key]
+        return self._base.get(key, _DELETED)
+
+    def _writable(self) -> Dict[str, object]:
+        """Return the overlay, copying it first if it is shared."""
+        if self._shared:
+            self._overlay = dict(self._overlay)
+            self._shared = False
+        return self._overlay
+
+    def __getitem__(self, key: str) -> str:
+        value = self._lookup(key)
+        if value is _DELETED:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key: str, value: str):
+        self._writable()[key] = value
+
+    def __delitem__(self, key: str):
+        if self._lookup(key) is _DELETED:
+            raise KeyError(key)
+        self._writable()[key] = _DELETED
+
+    def __contains__(self, key: object) -> bool:
+        return self._lookup(key) is not _DELETED
+
+    def _items(self) -> Dict[str, object]:
+        """Merge the layers into one dictionary, with deleted markers."""
+        merged = dict(self._base)
+        for layer in reversed(self._layers):
+            merged.update(layer)
+        merged.update(self._overlay)
+        return merged
+
+    def __iter__(self) -> Iterator[str]:
+        return (
+            key for key, value in self._items().items()
+            if value is not _DELETED
+        )
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def __repr__(self) -> str:
+        return f"Environment({dict(self)!r})"
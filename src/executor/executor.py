@@ -1,48 +1,130 @@
 import os
 import io
-from typing import List, Dict, Any, Union
+from functools import partial
+from typing import (
+    IO, AnyStr, Callable, Dict, Iterable, Iterator, List, Optional, Union
+)
+from apps.base import BaseApp
+from apps.files import FileAccess, using
 from apps.registry import AppRegistry
+from parser.nodes import (
+    Node, Arg, Background, Call, Fused, Pipeline, Sequence, Substitution
+)
+from executor.buffers import ChunkBuffer, MemoryBudget
+from executor.environment import Environment
+from executor.fused import OPERATORS, FusedOperator
+from executor.globbing import DirectoryCache, expand_glob
+from executor.jobs import JobTable
+from executor.output import DecodingWriter, OutputSink
+from executor.streaming import (
+    CommandError, batch_chunks, iter_byte_lines, iter_lines, read_chunks
+)
+from executor.threaded import run_threaded
+from executor import processes, substitution, tracing
+
+# Set PKU_SHELL_STREAMING=0 to always buffer pipeline stages
+STREAMING = os.environ.get("PKU_SHELL_STREAMING", "1") != "0"
+# Set PKU_SHELL_THREADS=1 to run streamed stages on worker threads
+THREADED = os.environ.get("PKU_SHELL_THREADS", "0") == "1"
+# Set PKU_SHELL_BYTES=1 to pass bytes between streamed stages that
+# support it, decoding only the pipeline's output
+BYTES = os.environ.get("PKU_SHELL_BYTES", "0") == "1"
 
 
 class ExecutionContext:
     """Maintains shell execution state including working directory and IO."""
-    def __init__(self):
-        self.working_dir = os.getcwd()
+
+    __slots__ = (
+        "files", "dir_cache", "stdin", "stdout", "stderr", "env", "jobs",
+        "budget", "pipeline_position", "pipeline_total", "last_exit_status",
+    )
+
+    def __init__(
+        self,
+        dir_cache: Optional[DirectoryCache] = None,
+        working_dir: Optional[str] = None,
+        env: Optional[Environment] = None,
+        files: Optional[FileAccess] = None,
+        jobs: Optional[JobTable] = None,
+        budget: Optional[MemoryBudget] = None
+    ):
+        self.files = files or FileAccess(working_dir)
+        self.dir_cache = dir_cache or DirectoryCache()
         self.stdin = None
         self.stdout = None
         self.stderr = None
-        self.env = os.environ.copy()
+        self.env = env if env is not None else Environment()
+        self.jobs = jobs if jobs is not None else JobTable()
+        self.budget = budget if budget is not None else MemoryBudget()
         self.pipeline_position = 0
         self.pipeline_total = 1
         self.last_exit_status = 0
 
+    def child(self, stdin=None, stdout=None) -> "ExecutionContext":
+        """
+        Create the context of a pipeline stage.
+
+        The child shares the directory cache, working directory (its
+        `files`), jobs, memory budget and stderr of this context; its
+        environment is a copy-on-write copy, so nothing is copied unless
+        one of them changes it.
+
+        Args:
+            stdin (Optional[TextIO]): Input of the stage.
+            stdout (Optional[TextIO]): Output of the stage.
+
+        Returns:
+            ExecutionContext: Context of the stage.
+        """
+        child = ExecutionContext(
+            self.dir_cache, env=self.env.copy(), files=self.files,
+            jobs=self.jobs, budget=self.budget
+        )
+        child.stdin = stdin
+        child.stdout = stdout
+        child.stderr = self.stderr
+        return child
+
+    @property
+    def working_dir(self) -> str:
+        """Working directory of the session."""
+        return self.files.cwd
+
+    @working_dir.setter
+    def working_dir(self, path: str):
+        self.files.cwd = path
+
     def change_directory(self, path: str):
         """Change directory with validation"""
-        new_path = os.path.abspath(os.path.join(self.working_dir, path))
-        if not os.path.isdir(new_path):
-            raise FileNotFoundError(f"Directory not found: {new_path}")
-        self.working_dir = new_path
-        os.chdir(new_path)
+        self.files.chdir(path)
 
     def resolve_path(self, path: str) -> str:
         """Resolve relative paths against current directory"""
-        if os.path.isabs(path):
-            return path
-        return os.path.join(self.working_dir, path)
+        return self.files.resolve(path)
+
+    def expand_glob(self, pattern: str) -> Iterator[str]:
+        """Yield the matches of a glob pattern in the working directory"""
+        return expand_glob(pattern, self.working_dir, self.dir_cache)
 
 
 def evaluate_arg(
-    arg: Dict[str, Any],
-    context: ExecutionContext
+    arg: Union[Arg, Substitution],
+    context: ExecutionContext,
+    substituted: Optional[Dict[int, str]] = None
 ) -> Union[str, List[str]]:
-    """Evaluate command arguments and substitutions."""
-    if arg["type"] == "arg":
-        val = arg["value"]
-        if isinstance(val, list):
+    """
+    Evaluate command arguments and substitutions.
+
+    `substituted` maps the ids of substitutions already evaluated (see
+    evaluate_substitutions) to their results.
+    """
+    if isinstance(arg, Arg):
+        val = arg.value
+        if isinstance(val, tuple):
             evaluated = []
             for v in val:
-                if isinstance(v, dict):
-                    ev = evaluate_arg(v, context)
+                if isinstance(v, Node):
+                    ev = evaluate_arg(v, context, substituted)
                     if isinstance(ev, list):
                         evaluated.extend(ev)
                     else:
@@ -50,19 +132,23 @@ def evaluate_arg(
                 else:
                     evaluated.append(str(v))
             return "".join(evaluated).strip()
-        elif isinstance(val, dict):
-            ev = evaluate_arg(val, context)
+        elif isinstance(val, Node):
+            ev = evaluate_arg(val, context, substituted)
             return ev if isinstance(ev, str) else str(ev)
         else:
             return str(val)
 
-    elif arg["type"] == "substitution":
-        sub_out = []
-        execute_ast(arg["command"], sub_out, context)
-        result = "".join(sub_out).strip()
+    elif isinstance(arg, Substitution):
+        if substituted and id(arg) in substituted:
+            return substituted[id(arg)]
+        with tracing.span("Substitution", "ast") as span:
+            sub_out = []
+            execute_ast(arg.command, sub_out, context)
+            result = "".join(sub_out).strip()
+            span.add_out(len(result))
         return result.replace("\n", " ")
 
-    raise ValueError(f"Unhandled argument type: {arg['type']}")
+    raise ValueError(f"Unhandled argument type: {type(arg).__name__}")
 
 
 def run_command(
@@ -75,11 +161,19 @@ def run_command(
         app = AppRegistry.get(cmd_name)
 
         input_content = context.stdin.read() if context.stdin else None
-        result = app.run(cmd_args, stdin=input_content)
+        if tracing.enabled():
+            with tracing.span(cmd_name, "app", argv=cmd_args) as span:
+                result = run_app(
+                    app, cmd_name, cmd_args, input_content, context
+                )
+                span.add_in(len(input_content or ""))
+                if isinstance(result, str):
+                    span.add_out(len(result))
+        else:
+            result = run_app(app, cmd_name, cmd_args, input_content, context)
 
-        if isinstance(result, dict) and result.get("action") == "chdir":
-            context.change_directory(result["target"])
-            return 0
+        if isinstance(result, dict):
+            return run_action(app, result, context)
 
         return result
 
@@ -87,61 +181,477 @@ def run_command(
         raise Exception(f"Error executing {cmd_name}: {str(e)}")
 
 
-def run_pipeline(
-    pipeline_ast: Dict[str, Any],
+def run_app(
+    app: BaseApp,
+    cmd_name: str,
+    cmd_args: List[str],
+    input_content: Optional[str],
     context: ExecutionContext
+):
+    """Run an app, in a worker process if it is CPU-bound."""
+    if app.cpu_bound and processes.enabled():
+        return processes.run_app(
+            app, cmd_name, cmd_args, input_content, context.working_dir
+        )
+    with using(context.files):
+        return app.run(cmd_args, stdin=input_content)
+
+
+def run_action(app, action: dict, context: ExecutionContext):
+    """
+    Carry out the shell action requested by a builtin app.
+
+    Builtins that change the shell state, such as `cd`, return an
+    action instead of output. Unsafe variants report errors as output.
+    """
+    kind = action.get("action")
+    if kind == "chdir":
+        context.change_directory(action["target"])
+        return 0
+    try:
+        if kind == "wait":
+            return context.jobs.wait(action["jobs"])
+        if kind == "jobs":
+            return context.jobs.describe()
+    except ValueError as e:
+        if app.is_unsafe():
+            return f"{e}\n"
+        raise
+    raise ValueError(f"Unknown action: {kind}")
+
+
+def run_background(pipeline_ast: Pipeline, context: ExecutionContext):
+    """
+    Start a pipeline as a background job (see executor.jobs).
+
+    The job gets a snapshot of the working directory and environment,
+    no stdin, and its output is kept until it is waited for. Like a
+    subshell, it has its own empty job table: `wait` in the job cannot
+    wait for the job itself.
+    """
+    job_context = ExecutionContext(
+        context.dir_cache,
+        env=context.env.copy(),
+        files=FileAccess(context.working_dir),
+        jobs=JobTable(),
+        budget=context.budget,
+    )
+    with tracing.span("Background", "ast"):
+        context.jobs.submit(
+            partial(run_pipeline, pipeline_ast, job_context)
+        )
+
+
+def run_pipeline(
+    pipeline_ast: Pipeline,
+    context: ExecutionContext,
+    output: Optional[IO[str]] = None
 ) -> str:
-    """Execute pipeline of commands connected with |."""
-    commands = pipeline_ast.get("commands", [])
+    """
+    Execute pipeline of commands connected with |.
+
+    Args:
+        pipeline_ast (Pipeline): The pipeline.
+        context (ExecutionContext): Context of the pipeline.
+        output (Optional[IO[str]]): Stream the last stage writes its
+            output to as it runs; by default the output is returned.
+
+    Returns:
+        str: Output of the pipeline, or "" if written to `output`.
+    """
+    commands = pipeline_ast.commands
     if not commands:
         return ""
 
     context.pipeline_total = len(commands)
+    if STREAMING and BYTES and all(can_run_bytes(cmd) for cmd in commands):
+        mode, run = "bytes", run_bytes_pipeline
+    elif STREAMING and all(can_stream(cmd) for cmd in commands):
+        mode, run = "streamed", run_stream_pipeline
+    else:
+        mode, run = "buffered", run_buffered_pipeline
+    if not tracing.enabled():
+        return run(commands, context, output)
+    with tracing.span("Pipeline", "ast", mode=mode) as span:
+        if output is None:
+            result = run(commands, context)
+            span.add_out(len(result))
+        else:
+            start = output.tell()
+            result = run(commands, context, output)
+            span.add_out(output.tell() - start)
+    return result
+
+
+def run_buffered_pipeline(
+    commands: List[Union[Call, Fused]],
+    context: ExecutionContext,
+    output: Optional[IO[str]] = None
+) -> str:
+    """
+    Execute pipeline stages one after the other, buffering output.
+
+    The output of each stage is kept in a ChunkBuffer until the next
+    stage has run; buffers spill to temporary files past their spill
+    size or the session's memory budget (see executor.buffers). Stages
+    that can stream write their output and read their input as they
+    run, unless STREAMING is off.
+    """
     input_stream = context.stdin or io.StringIO()
-    final_output = io.StringIO()
+    buffers = []
+    try:
+        for i, cmd in enumerate(commands):
+            context.pipeline_position = i
+            if output is not None and i == len(commands) - 1:
+                output_stream = output
+            else:
+                # The next stage reads the strings this one writes,
+                # uncopied while in memory
+                output_stream = ChunkBuffer(context.budget)
+                buffers.append(output_stream)
+
+            cmd_context = context.child(input_stream, output_stream)
+            run_buffered_stage(cmd, cmd_context)
+            if i > 0:
+                # Read by this stage: give back its memory or file
+                input_stream.close()
+            input_stream = output_stream
+
+        return "" if output is not None else output_stream.read()
+    finally:
+        for buffer in buffers:
+            buffer.close()
 
-    for i, cmd in enumerate(commands):
-        context.pipeline_position = i
-        output_stream = io.StringIO() if i < len(commands)-1 else final_output
 
-        cmd_context = ExecutionContext()
-        cmd_context.working_dir = context.working_dir
-        cmd_context.stdin = input_stream
-        cmd_context.stdout = output_stream
-        cmd_context.stderr = context.stderr
-        cmd_context.env = context.env.copy()
+def run_buffered_stage(cmd: Union[Call, Fused], context: ExecutionContext):
+    """
+    Run a stage of a buffered pipeline, streamed if it can stream.
 
-        execute_call(cmd, [], cmd_context)
+    A streamed call is traced in a "Call" span, as `execute_call` traces
+    the calls it runs.
+    """
+    if STREAMING and can_stream(cmd):
+        if isinstance(cmd, Fused):
+            stream_buffered_stage(cmd, context)
+        else:
+            tracing.traced(
+                "Call", "ast", stream_buffered_stage, cmd, context
+            )
+    elif isinstance(cmd, Fused):
+        execute_fused(cmd, context)
+    else:
+        execute_call(cmd, [], context)
 
-        if i < len(commands)-1:
-            input_stream = io.StringIO(output_stream.getvalue())
 
+def stream_buffered_stage(
+    cmd: Union[Call, Fused],
+    context: ExecutionContext
+):
+    """Stream a stage of a buffered pipeline from its input to output."""
+    runner = stream_runner(cmd, context)
+    # Written in batches, not one buffer chunk per line
+    run_stages(
+        [lambda lines: batch_chunks(runner(lines))],
+        read_chunks(context.stdin), context.stdout, iter_lines, context
+    )
+
+
+def can_stream(call_ast: Union[Call, Fused]) -> bool:
+    """
+    Check whether a pipeline stage can run in a streaming pipeline.
+
+    A stage streams if it has no redirections or substitutions and its
+    command is a literal name whose app implements `run_stream`, or if
+    it is a fused operator implementing `run_stream`.
+    """
+    if isinstance(call_ast, Fused):
+        return OPERATORS[call_ast.operator].supports_stream()
+    name = literal_command(call_ast)
+    return name is not None and AppRegistry.supports_stream(name)
+
+
+def can_run_bytes(call_ast: Union[Call, Fused]) -> bool:
+    """
+    Check whether a pipeline stage can run in a pipeline in bytes mode.
+
+    Like `can_stream`, for apps implementing `run_bytes`. A fused stage
+    whose operator does not implement `run_bytes` runs as the stages it
+    replaces, if they all can.
+    """
+    if isinstance(call_ast, Fused):
+        return OPERATORS[call_ast.operator].supports_bytes() or all(
+            can_run_bytes(cmd) for cmd in call_ast.commands
+        )
+    name = literal_command(call_ast)
+    return name is not None and AppRegistry.supports_bytes(name)
+
+
+def literal_command(call_ast: Call) -> Optional[str]:
+    """
+    Return the command name of a stage that may run streamed.
+
+    Returns:
+        Optional[str]: The command name, or None if the stage has
+        redirections or substitutions, or its name is not a literal.
+    """
+    if call_ast.redirections or not call_ast.args:
+        return None
+    for arg in call_ast.args:
+        if not isinstance(arg, Arg):
+            return None
+        if isinstance(arg.value, tuple):
+            if any(isinstance(v, Node) for v in arg.value):
+                return None
+        elif not isinstance(arg.value, str):
+            return None
+    name = call_ast.args[0]
+    if not isinstance(name.value, str) or name.glob:
+        return None
+    return name.value
+
+
+def stream_stage(
+    cmd_name: str,
+    cmd_args: List[str],
+    lines: Iterator[AnyStr],
+    binary: bool = False
+) -> Iterator[AnyStr]:
+    """
+    Run one streaming stage, reporting errors like run_command.
+
+    With `binary`, the stage runs the app's `run_bytes` on bytes lines.
+    """
+    span = tracing.NULL_SPAN
+    if tracing.enabled():
+        span = tracing.span(cmd_name, "app", argv=cmd_args, streamed=True)
+        lines = tracing.count_in(span, lines)
+    try:
+        app = AppRegistry.get(cmd_name)
+        if binary:
+            chunks = app.run_bytes(cmd_args, lines)
+        elif (
+            app.cpu_bound
+            and processes.enabled()
+            and app.supports_split()
+            and app.can_split_input(cmd_args)
+        ):
+            chunks = processes.split_lines(app, cmd_name, cmd_args, lines)
+        else:
+            chunks = app.run_stream(cmd_args, lines)
+        yield from tracing.count_out(span, chunks)
+    except CommandError:
+        # Raised by an earlier stage while this one read its input
+        raise
+    except Exception as e:
+        span.fail(e)
+        raise CommandError(f"Error executing {cmd_name}: {str(e)}")
+    finally:
+        span.end()
+
+
+def stream_runner(
+    stage: Union[Call, Fused],
+    context: ExecutionContext,
+    binary: bool = False
+) -> Callable[[Iterator[AnyStr]], Iterator[AnyStr]]:
+    """Return the function running a stage on its input lines."""
+    if isinstance(stage, Fused):
+        operator = OPERATORS[stage.operator]
+        args = [expand_args(cmd, context)[1:] for cmd in stage.commands]
+        return partial(stream_fused, operator, args, binary=binary)
+    args = expand_args(stage, context)
+    return partial(stream_stage, args[0], args[1:], binary=binary)
+
+
+def stream_fused(
+    operator: FusedOperator,
+    args: List[List[str]],
+    lines: Iterator[AnyStr],
+    binary: bool = False
+) -> Iterator[AnyStr]:
+    """Run a fused operator as a streaming stage, on text or bytes."""
+    run = operator.run_bytes if binary else operator.run_stream
+    with tracing.span(operator.name, "app", argv=args, streamed=True) as span:
+        chunks = run(args, tracing.count_in(span, lines))
+        yield from tracing.count_out(span, chunks)
+
+
+def run_stream_pipeline(
+    commands: List[Union[Call, Fused]],
+    context: ExecutionContext,
+    output: Optional[IO[str]] = None
+) -> str:
+    """
+    Execute a pipeline whose stages all implement `run_stream`.
+
+    Stages are chained generators: each one pulls lines from the
+    previous one as it needs them, so no stage output is buffered.
+    Like SIGPIPE in Unix shells, once the last stage is done the
+    earlier ones are stopped, closing their files: their remaining
+    output, and any error they would have raised, are discarded. An
+    error stops the pipeline in the same way. With THREADED, each
+    stage runs on a worker thread instead (see executor.threaded).
+    """
+    runners = [stream_runner(cmd, context) for cmd in commands]
+    chunks = read_chunks(context.stdin or io.StringIO())
+    if output is not None:
+        run_stages(runners, chunks, output, iter_lines, context)
+        return ""
+    final_output = io.StringIO()
+    run_stages(runners, chunks, final_output, iter_lines, context)
     return final_output.getvalue()
 
 
+def run_bytes_pipeline(
+    commands: List[Union[Call, Fused]],
+    context: ExecutionContext,
+    output: Optional[IO[str]] = None
+) -> str:
+    """
+    Execute a streaming pipeline in bytes mode.
+
+    Stages pass bytes lines to each other through the `run_bytes` of
+    their apps or fused operators, and the pipeline's stdin is encoded
+    as UTF-8. Only the output of the last stage is decoded, with
+    undecodable bytes replaced.
+    """
+    runners = []
+    for cmd in commands:
+        if isinstance(cmd, Fused):
+            operator = OPERATORS[cmd.operator]
+            if operator.supports_bytes():
+                runners.append(stream_runner(cmd, context, binary=True))
+                continue
+            stages = cmd.commands
+        else:
+            stages = [cmd]
+        runners.extend(
+            stream_runner(stage, context, binary=True) for stage in stages
+        )
+    chunks = (
+        chunk.encode()
+        for chunk in read_chunks(context.stdin or io.StringIO())
+    )
+    if output is not None:
+        writer = DecodingWriter(output)
+        run_stages(runners, chunks, writer, iter_byte_lines, context)
+        writer.close()
+        return ""
+    final_output = io.BytesIO()
+    run_stages(runners, chunks, final_output, iter_byte_lines, context)
+    return final_output.getvalue().decode(errors="replace")
+
+
+def run_stages(
+    runners: List[Callable[[Iterator[AnyStr]], Iterator[AnyStr]]],
+    chunks: Iterable[AnyStr],
+    final_output: IO[AnyStr],
+    split_lines: Callable[[Iterable[AnyStr]], Iterator[AnyStr]],
+    context: ExecutionContext
+):
+    """
+    Chain streaming stages, writing the last one's output.
+
+    Args:
+        runners (List[Callable]): Function running each stage on its
+            input lines.
+        chunks (Iterable[AnyStr]): Input of the first stage.
+        final_output (IO[AnyStr]): Stream the output is written to.
+        split_lines (Callable): Splits chunks into lines, for text
+            (`iter_lines`) or bytes (`iter_byte_lines`).
+        context (ExecutionContext): Context of the pipeline.
+    """
+    with using(context.files):
+        if THREADED:
+            run_threaded(runners, chunks, final_output, split_lines)
+            return
+
+        stages = []
+        for runner in runners:
+            chunks = runner(split_lines(batch_chunks(chunks)))
+            stages.append(chunks)
+
+        try:
+            for chunk in chunks:
+                final_output.write(chunk)
+        finally:
+            for stage in reversed(stages):
+                stage.close()
+
+
 from executor.redirection import RedirectionHandler  # noqa: E402
 
 
+def evaluate_substitutions(
+    call_ast: Call,
+    context: ExecutionContext
+) -> Optional[Dict[int, str]]:
+    """
+    Evaluate the substitutions of a call concurrently, when they are
+    independent (see executor.substitution).
+
+    Returns:
+        Optional[Dict[int, str]]: Result of each substitution by id, or
+        None if they are to be evaluated one at a time.
+    """
+    if not substitution.enabled():
+        return None
+    subs = substitution.find_substitutions(call_ast.args)
+    if (
+        len(subs) < 2
+        or not substitution.at_end(context.stdin)
+        or not all(substitution.is_independent(sub) for sub in subs)
+    ):
+        return None
+    tasks = [
+        partial(evaluate_arg, sub, context.child(io.StringIO()))
+        for sub in subs
+    ]
+    results = substitution.run_all(tasks)
+    return {id(sub): result for sub, result in zip(subs, results)}
+
+
+def expand_args(call_ast: Call, context: ExecutionContext) -> List[str]:
+    """
+    Evaluate the arguments of a command call, expanding globs.
+
+    Apps take their arguments as a list, like argv. Glob matches are
+    generated one at a time and appended to that list as they are
+    found, without an intermediate list of the matches.
+    """
+    substituted = evaluate_substitutions(call_ast, context)
+    args = []
+    for arg in call_ast.args:
+        if isinstance(arg, Arg) and arg.glob:
+            start = len(args)
+            with tracing.span("glob", "glob", pattern=arg.value) as span:
+                args.extend(context.expand_glob(arg.value))
+                if span:
+                    span.args["matches"] = len(args) - start
+            if len(args) > start:
+                continue
+        val = evaluate_arg(arg, context, substituted)
+        args.extend(val) if isinstance(val, list) else args.append(val)
+    return args
+
+
 def execute_call(
-    call_ast: Dict[str, Any],
+    call_ast: Call,
     out: List[str],
     context: ExecutionContext
 ):
     """Execute a command call with potential redirections."""
+    tracing.traced("Call", "ast", _execute_call, call_ast, context)
+
+
+def _execute_call(call_ast: Call, context: ExecutionContext):
+    """Set up the redirections of a call and run its command."""
     redir_handler = RedirectionHandler(call_ast, context)
     redir_handler.setup_redirections()
     context.stdin = redir_handler.get_input_stream()
     context.stdout = redir_handler.get_output_stream()
 
-    args = []
-    for arg in call_ast.get("args", []):
-        if (isinstance(arg, dict) and
-                arg.get("type") in
-                ["input_redirection", "output_redirection"]):
-            continue
-        val = evaluate_arg(arg, context)
-        args.extend(val) if isinstance(val, list) else args.append(val)
-
+    args = expand_args(call_ast, context)
     if not args:
         redir_handler.cleanup()
         return
@@ -157,30 +667,76 @@ def execute_call(
         redir_handler.cleanup()
 
 
+def execute_fused(fused_ast: Fused, context: ExecutionContext):
+    """Execute a fused operator as a buffered pipeline stage."""
+    operator = OPERATORS[fused_ast.operator]
+    args = [expand_args(cmd, context)[1:] for cmd in fused_ast.commands]
+    stdin = context.stdin.read() if context.stdin else ""
+    with tracing.span(operator.name, "app", argv=args) as span:
+        with using(context.files):
+            result = operator.run(args, stdin)
+        span.add_in(len(stdin))
+        span.add_out(len(result))
+    if context.stdout and result:
+        context.stdout.write(result)
+
+
 def execute_sequence(
-    sequence_ast: Dict[str, Any],
+    sequence_ast: Sequence,
     out: List[str],
     context: ExecutionContext
 ):
     """Execute commands in sequence (separated by ;)."""
-    for cmd in sequence_ast.get("commands", []):
+    tracing.traced(
+        "Sequence", "ast", _execute_statements, sequence_ast, out, context
+    )
+
+
+def _execute_statements(
+    sequence_ast: Sequence,
+    out: List[str],
+    context: ExecutionContext
+):
+    """Execute the statements of a sequence, stopping at an error."""
+    for cmd in sequence_ast.statements:
         try:
-            if cmd.get("type") == "call":
+            if isinstance(cmd, Call):
                 execute_call(cmd, out, context)
-            elif cmd.get("type") == "pipeline":
-                result = run_pipeline(cmd, context)
-                if result and out is not None:
-                    out.append(result)
+            elif isinstance(cmd, Pipeline):
+                output_pipeline(cmd, out, context)
+            elif isinstance(cmd, Background):
+                run_background(cmd.command, context)
             else:
-                err_msg = f"Unknown command type in sequence:{cmd.get('type')}"
+                err_msg = (
+                    f"Unknown command type in sequence:{type(cmd).__name__}"
+                )
                 raise ValueError(err_msg)
         except Exception:
             out.clear()
             break
 
 
+def output_pipeline(
+    pipeline_ast: Pipeline,
+    out: List[str],
+    context: ExecutionContext
+):
+    """
+    Run a pipeline of a statement, adding its output to `out`.
+
+    An output sink (see executor.output) gets the output as the last
+    stage writes it; other outputs get it once the pipeline is done.
+    """
+    if isinstance(out, OutputSink):
+        run_pipeline(pipeline_ast, context, out)
+        return
+    result = run_pipeline(pipeline_ast, context)
+    if result and out is not None:
+        out.append(result)
+
+
 def execute_ast(
-    ast: Dict[str, Any],
+    ast: Sequence,
     out: List[str],
     context: ExecutionContext
 ):
@@ -188,17 +744,24 @@ def execute_ast(
     if hasattr(ast, "data") and ast.data == "start":
         ast = ast.children[0]
 
-    if ast.get("type") != "statement_list":
+    if not isinstance(ast, Sequence):
         raise ValueError("AST root must be statement_list")
 
-    for stmt in ast.get("statements", []):
-        if stmt.get("type") == "pipeline":
-            result = run_pipeline(stmt, context)
-            if result and out is not None:
-                out.append(result)
-        elif stmt.get("type") == "sequence":
+    tracing.traced("Sequence", "ast", _execute_root, ast, out, context)
+
+
+def _execute_root(ast: Sequence, out: List[str], context: ExecutionContext):
+    """Execute the statements of the root sequence."""
+    for stmt in ast.statements:
+        if isinstance(stmt, Pipeline):
+            output_pipeline(stmt, out, context)
+        elif isinstance(stmt, Background):
+            run_background(stmt.command, context)
+        elif isinstance(stmt, Sequence):
             execute_sequence(stmt, out, context)
-        elif stmt.get("type") == "call":
+        elif isinstance(stmt, Call):
             execute_call(stmt, out, context)
         else:
-            raise ValueError(f"Unknown statement type: {stmt.get('type')}")
+            raise ValueError(
+                f"Unknown statement type: {type(stmt).__name__}"
+            )
@@ -0,0 +1,493 @@
+"""
+Fused pipeline operators for PKU Shell.
+
+Some common pipelines do more work than their output needs: `cat f |
+grep x` passes the whole file through an extra stage, `sort | head`
+sorts every line to keep a few, `grep x | wc -l` builds every match only
+to count them and `sort | uniq` sorts duplicates that are then dropped.
+The pipeline optimizer (executor.optimizer) replaces such runs of stages
+with one fused operator from this module.
+
+A fused operator gives exactly the output of the stages it replaces,
+and the same errors, reported as coming from the same stage. Operators
+only accept stages whose arguments they can check before running, so
+the remaining errors are those of their input.
+"""
+
+import re
+import heapq
+from collections import Counter
+from contextlib import contextmanager
+from typing import AnyStr, Dict, Iterator, List, Sequence, Tuple
+from apps.registry import AppRegistry
+from executor.streaming import (
+    CommandError, BYTE_LINE_BREAKS, LINE_BREAKS
+)
+
+Args = Sequence[List[str]]
+
+
+@contextmanager
+def stage(cmd_name: str):
+    """
+    Report errors raised in a block as errors of a replaced stage.
+
+    Args:
+        cmd_name (str): Name of the stage's command.
+
+    Raises:
+        CommandError: Prefixed like the errors of `run_command`.
+    """
+    try:
+        yield
+    except CommandError:
+        # Raised by an earlier stage of the pipeline
+        raise
+    except Exception as e:
+        raise CommandError(f"Error executing {cmd_name}: {str(e)}")
+
+
+def is_pattern(pattern: str) -> bool:
+    """Check whether grep accepts a regular expression."""
+    try:
+        re.compile(pattern)
+    except re.error:
+        return False
+    return True
+
+
+class FusedOperator:
+    """
+    Replacement for a run of consecutive pipeline stages.
+
+    Subclasses set `name` and `commands`, the command names of the stages
+    they replace, and implement `accepts` and `run`. Operators that can
+    run in a streaming pipeline also implement `run_stream`, and those
+    that can run in bytes mode `run_bytes`.
+    """
+
+    name = ""
+    commands: Tuple[str, ...] = ()
+
+    def accepts(self, args: Args) -> bool:
+        """
+        Check whether the operator can replace stages with these args.
+
+        Args:
+            args (Args): Arguments of each stage, without the command.
+
+        Returns:
+            bool: True if the stages cannot fail except on their input.
+        """
+        raise NotImplementedError
+
+    def run(self, args: Args, stdin: str) -> str:
+        """
+        Run the operator on buffered input.
+
+        Args:
+            args (Args): Arguments of each stage, without the command.
+            stdin (str): Input of the first stage.
+
+        Returns:
+            str: Output of the last stage.
+
+        Raises:
+            CommandError: The error of the failing stage.
+        """
+        raise NotImplementedError
+
+    def run_stream(self, args: Args, lines: Iterator[str]) -> Iterator[str]:
+        """
+        Run the operator in a streaming pipeline.
+
+        Args:
+            args (Args): Arguments of each stage, without the command.
+            lines (Iterator[str]): Input lines of the first stage.
+
+        Yields:
+            str: Output chunks of the last stage.
+
+        Raises:
+            CommandError: The error of the failing stage.
+        """
+        raise NotImplementedError
+
+    def run_bytes(
+        self,
+        args: Args,
+        lines: Iterator[bytes]
+    ) -> Iterator[bytes]:
+        """
+        Run the operator in a pipeline in bytes mode.
+
+        Args:
+            args (Args): Arguments of each stage, without the command.
+            lines (Iterator[bytes]): Input lines of the first stage.
+
+        Yields:
+            bytes: Output chunks of the last stage, as the `run_bytes`
+            of the stages it replaces would give.
+
+        Raises:
+            CommandError: The error of the failing stage.
+        """
+        raise NotImplementedError
+
+    @classmethod
+    def supports_stream(cls) -> bool:
+        """Check whether the operator implements `run_stream`."""
+        return cls.run_stream is not FusedOperator.run_stream
+
+    @classmethod
+    def supports_bytes(cls) -> bool:
+        """Check whether the operator implements `run_bytes`."""
+        return cls.run_bytes is not FusedOperator.run_bytes
+
+
+class CatGrep(FusedOperator):
+    """
+    `cat FILE... | grep PATTERN`: grep the files' chunks directly.
+
+    Chunks are split into lines in bulk, without their line endings,
+    instead of being passed through a stage and split again by grep.
+    """
+
+    name = "cat|grep"
+    commands = ("cat", "grep")
+
+    def accepts(self, args: Args) -> bool:
+        cat_args, grep_args = args[:2]
+        return (
+            bool(cat_args)
+            and len(grep_args) == 1
+            and is_pattern(grep_args[0])
+        )
+
+    def run(self, args: Args, stdin: str) -> str:
+        return "".join(self.run_stream(args, iter(())))
+
+    def run_stream(self, args: Args, lines: Iterator[str]) -> Iterator[str]:
+        separator = ""
+        for line in self.iter_matches(args, lines):
+            yield separator + line
+            separator = "\n"
+
+    def run_bytes(
+        self,
+        args: Args,
+        lines: Iterator[bytes]
+    ) -> Iterator[bytes]:
+        separator = b""
+        for line in self.iter_matches(args, lines, binary=True):
+            yield separator + line
+            separator = b"\n"
+
+    def iter_matches(
+        self,
+        args: Args,
+        lines: Iterator[AnyStr],
+        binary: bool = False
+    ) -> Iterator[AnyStr]:
+        """
+        Lazily search the files for matches.
+
+        Args:
+            args (Args): Arguments of cat and grep.
+            lines (Iterator[AnyStr]): Input lines of cat, unused.
+            binary (bool): Whether to read and search the files as bytes.
+
+        Yields:
+            AnyStr: Matching lines, without their line endings.
+
+        Raises:
+            CommandError: If cat cannot read a file.
+        """
+        cat_args, grep_args = args[:2]
+        grep = AppRegistry.get("grep")
+        cat = AppRegistry.get("cat")
+        if binary:
+            search = grep.compile_pattern(grep_args[0].encode()).search
+            chunks = cat.run_bytes(cat_args, lines)
+            cr, line_breaks = b"\r", BYTE_LINE_BREAKS
+        else:
+            search = grep.compile_pattern(grep_args[0]).search
+            chunks = cat.run_stream(cat_args, lines)
+            cr, line_breaks = "\r", LINE_BREAKS
+        pending = cr[:0]
+        try:
+            while True:
+                with stage("cat"):
+                    chunk = next(chunks, None)
+                if chunk is None:
+                    break
+                if not chunk:
+                    continue
+                text = pending + chunk if pending else chunk
+                # Same lines as streaming.iter_lines (or iter_byte_lines),
+                # without line endings
+                matches = text.splitlines()
+                last = text[-1:]
+                if last == cr:
+                    # May be the start of "\r\n"
+                    pending = matches.pop() + last
+                elif last in line_breaks:
+                    pending = cr[:0]
+                else:
+                    pending = matches.pop()
+                yield from filter(search, matches)
+            if pending:
+                line = pending.splitlines()[0]
+                if search(line):
+                    yield line
+        finally:
+            chunks.close()
+
+
+class CatGrepCount(CatGrep):
+    """`cat FILE... | grep PATTERN | wc -l`: count the matches in files."""
+
+    name = "cat|grep|wc -l"
+    commands = ("cat", "grep", "wc")
+
+    def accepts(self, args: Args) -> bool:
+        return super().accepts(args[:2]) and list(args[2]) == ["-l"]
+
+    def run_stream(self, args: Args, lines: Iterator[str]) -> Iterator[str]:
+        matches = sum(1 for _ in self.iter_matches(args, lines))
+        yield str(max(matches - 1, 0))
+
+    def run_bytes(
+        self,
+        args: Args,
+        lines: Iterator[bytes]
+    ) -> Iterator[bytes]:
+        matches = sum(1 for _ in self.iter_matches(args, lines, binary=True))
+        yield str(max(matches - 1, 0)).encode()
+
+
+class GrepCount(FusedOperator):
+    """`grep PATTERN | wc -l`: count the matches without building them."""
+
+    name = "grep|wc -l"
+    commands = ("grep", "wc")
+
+    def accepts(self, args: Args) -> bool:
+        grep_args, wc_args = args
+        return (
+            len(grep_args) == 1
+            and is_pattern(grep_args[0])
+            and list(wc_args) == ["-l"]
+        )
+
+    def run(self, args: Args, stdin: str) -> str:
+        return self.count(args, stdin.splitlines())
+
+    def run_stream(self, args: Args, lines: Iterator[str]) -> Iterator[str]:
+        yield self.count(args, (line.rstrip(LINE_BREAKS) for line in lines))
+
+    def run_bytes(
+        self,
+        args: Args,
+        lines: Iterator[bytes]
+    ) -> Iterator[bytes]:
+        lines = (line.rstrip(BYTE_LINE_BREAKS) for line in lines)
+        yield self.count(args, lines, binary=True).encode()
+
+    def count(self, args: Args, lines, binary: bool = False) -> str:
+        """
+        Give the output of `wc -l` on the matches among the lines.
+
+        Args:
+            args (Args): Arguments of each stage, without the command.
+            lines (Iterable[AnyStr]): Lines without their line endings.
+            binary (bool): Whether the lines are bytes.
+
+        Returns:
+            str: Number of newlines in the output of grep, which joins
+            its matches with newlines.
+        """
+        pattern = args[0][0].encode() if binary else args[0][0]
+        search = AppRegistry.get("grep").compile_pattern(pattern).search
+        matches = sum(1 for _ in filter(search, lines))
+        return str(max(matches - 1, 0))
+
+
+def sort_input(args: Args, stdin: str) -> Tuple[List[str], bool]:
+    """
+    Read the input of a replaced `sort` stage, like `sort` itself.
+
+    Args:
+        args (Args): Arguments of each stage; the first one is sort's.
+        stdin (str): Input of sort.
+
+    Returns:
+        Tuple[List[str], bool]: Input lines, and whether sort reverses.
+
+    Raises:
+        CommandError: If the input is empty.
+    """
+    if not stdin:
+        raise CommandError("Error executing sort: sort: missing input")
+    return stdin.splitlines(keepends=True), args[0] == ["-r"]
+
+
+def sort_byte_lines(
+    args: Args,
+    lines: Iterator[bytes]
+) -> Tuple[List[bytes], bool]:
+    """
+    Read the input lines of a replaced `sort` stage in bytes mode.
+
+    Args:
+        args (Args): Arguments of each stage; the first one is sort's.
+        lines (Iterator[bytes]): Input lines of sort.
+
+    Returns:
+        Tuple[List[bytes], bool]: Input lines, and whether sort reverses.
+
+    Raises:
+        CommandError: If the input is empty.
+    """
+    lines = list(lines)
+    if not lines:
+        raise CommandError("Error executing sort: sort: missing input")
+    return lines, args[0] == ["-r"]
+
+
+class SortHead(FusedOperator):
+    """`sort [-r] | head [-n N]`: select the first lines with a heap."""
+
+    name = "sort|head"
+    commands = ("sort", "head")
+
+    def accepts(self, args: Args) -> bool:
+        sort_args, head_args = args
+        return list(sort_args) in ([], ["-r"]) and self.count(head_args) >= 0
+
+    def count(self, head_args: List[str]) -> int:
+        """Return the number of lines head keeps, or -1 if it may fail."""
+        if not head_args:
+            return 10
+        try:
+            num_lines, file = AppRegistry.get("head").parse_args(head_args)
+        except ValueError:
+            return -1
+        return -1 if file else num_lines
+
+    def run(self, args: Args, stdin: str) -> str:
+        lines, reverse = sort_input(args, stdin)
+        return self.select(lines, reverse, self.count(args[1]))
+
+    def run_bytes(
+        self,
+        args: Args,
+        lines: Iterator[bytes]
+    ) -> Iterator[bytes]:
+        lines, reverse = sort_byte_lines(args, lines)
+        yield self.select(lines, reverse, self.count(args[1]))
+
+    def select(
+        self,
+        lines: List[AnyStr],
+        reverse: bool,
+        num_lines: int
+    ) -> AnyStr:
+        """
+        Give the first lines of the output of sort on the lines.
+
+        Args:
+            lines (List[AnyStr]): Input lines of sort, not empty.
+            reverse (bool): Whether sort reverses.
+            num_lines (int): Number of lines head keeps.
+
+        Returns:
+            AnyStr: Output of head.
+        """
+        empty = lines[0][:0]
+        select = heapq.nlargest if reverse else heapq.nsmallest
+        # sort joins its lines: one without a line ending, or ending
+        # with "\r" before a line "\n", merges with the next one. A
+        # prefix of the sorted lines gives the first `num_lines` lines of
+        # the sorted output once it has more lines than that.
+        size = num_lines + 1
+        while True:
+            if size * 8 >= len(lines):
+                top = sorted(lines, reverse=reverse)
+            else:
+                top = select(size, lines)
+            output = empty.join(top).splitlines(keepends=True)
+            if len(output) > num_lines or len(top) == len(lines):
+                return empty.join(output[:num_lines])
+            size *= 2
+
+
+class SortUniq(FusedOperator):
+    """`sort [-r] | uniq`: sort each distinct line once."""
+
+    name = "sort|uniq"
+    commands = ("sort", "uniq")
+
+    def accepts(self, args: Args) -> bool:
+        sort_args, uniq_args = args
+        return list(sort_args) in ([], ["-r"]) and not uniq_args
+
+    def run(self, args: Args, stdin: str) -> str:
+        lines, reverse = sort_input(args, stdin)
+        return self.sort_uniq(lines, reverse, "\r", LINE_BREAKS)
+
+    def run_bytes(
+        self,
+        args: Args,
+        lines: Iterator[bytes]
+    ) -> Iterator[bytes]:
+        lines, reverse = sort_byte_lines(args, lines)
+        yield self.sort_uniq(lines, reverse, b"\r", BYTE_LINE_BREAKS)
+
+    def sort_uniq(
+        self,
+        lines: List[AnyStr],
+        reverse: bool,
+        cr: AnyStr,
+        line_breaks: AnyStr
+    ) -> AnyStr:
+        """
+        Give the output of uniq on the output of sort on the lines.
+
+        Args:
+            lines (List[AnyStr]): Input lines of sort, not empty.
+            reverse (bool): Whether sort reverses.
+            cr (AnyStr): "\\r", as text or bytes.
+            line_breaks (AnyStr): Line boundaries of the lines' type.
+
+        Returns:
+            AnyStr: Output of uniq.
+        """
+        counts = Counter(lines)
+        kept = []
+        joined = False
+        for line in sorted(counts, reverse=reverse):
+            # Copies of a line are adjacent once sorted, and uniq drops
+            # all but the first, unless sort joins the line with the
+            # one before or after it (see SortHead.select)
+            last = line[-1:]
+            joins = last == cr or last not in line_breaks
+            if joined or joins:
+                kept.append(line * counts[line])
+            else:
+                kept.append(line)
+            joined = joins
+        empty = cr[:0]
+        sorted_lines = empty.join(kept).splitlines(keepends=True)
+        uniq = AppRegistry.get("uniq").iter_uniq(
+            sorted_lines, {"ignore_case": False}
+        )
+        return empty.join(uniq)
+
+
+OPERATORS: Dict[str, FusedOperator] = {
+    operator.name: operator
+    for operator in (
+        CatGrepCount(), CatGrep(), GrepCount(), SortHead(), SortUniq()
+    )
+}
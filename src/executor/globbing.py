@@ -0,0 +1,311 @@
+"""
+Glob expansion for PKU Shell.
+
+Expands `*`, `?` and `[...]` patterns at execution time against the
+working directory of the execution context. A `**` path component
+matches any number of directories, recursively. Directory listings are
+kept in a per-session cache that is checked against directory mtimes,
+and pattern components are compiled once.
+"""
+
+import os
+import re
+import time
+import threading
+import fnmatch
+from functools import lru_cache
+from typing import Callable, Dict, FrozenSet, Iterator, NamedTuple, Tuple
+
+MAGIC_CHARS = re.compile(r"[*?[]")
+
+RECURSIVE = "**"
+
+# Listings of directories modified less than this long before the scan
+# are not cached: a change within the same mtime tick would go unnoticed.
+RACY_WINDOW_NS = 1_000_000_000
+
+
+def has_magic(pattern: str) -> bool:
+    """Return True if the pattern contains glob special characters."""
+    return MAGIC_CHARS.search(pattern) is not None
+
+
+@lru_cache(maxsize=1024)
+def compile_pattern(pattern: str) -> Callable:
+    """
+    Compile one pattern component.
+
+    Args:
+        pattern (str): A path component such as `*.txt`.
+
+    Returns:
+        The `match` method of the compiled regular expression.
+    """
+    return re.compile(fnmatch.translate(pattern)).match
+
+
+class Listing(NamedTuple):
+    """
+    Snapshot of one directory: sorted entry names, the subdirectories
+    (including symlinks to directories) and the symlinks.
+    """
+    mtime_ns: int
+    names: Tuple[str, ...]
+    dirs: FrozenSet[str]
+    links: FrozenSet[str]
+
+
+EMPTY_LISTING = Listing(0, (), frozenset(), frozenset())
+
+
+class DirectoryCache:
+    """
+    Per-session cache of directory listings.
+
+    A cached listing is reused while the directory's mtime is unchanged.
+    The cache is shared by the threads of a session (pipeline stages,
+    background jobs and substitutions): the listings and the hit and
+    miss counters are only accessed under a lock, and directories are
+    scanned outside it.
+    """
+
+    def __init__(self):
+        """Initialize an empty cache."""
+        self._listings: Dict[str, Listing] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def listdir(self, path: str) -> Listing:
+        """
+        Return the listing of a directory, scanning it if needed.
+
+        Args:
+            path (str): Absolute directory path.
+
+        Returns:
+            Listing: The directory snapshot, or an empty listing if the
+            directory cannot be read.
+        """
+        try:
+            mtime_ns = os.stat(path).st_mtime_ns
+        except OSError:
+            return EMPTY_LISTING
+
+        with self._lock:
+            listing = self._listings.get(path)
+            if listing is not None and listing.mtime_ns == mtime_ns:
+                self.hits += 1
+                return listing
+            self.misses += 1
+
+        try:
+            with os.scandir(path) as entries:
+                names = []
+                dirs = set()
+                links = set()
+                for entry in entries:
+                    names.append(entry.name)
+                    try:
+                        if entry.is_dir():
+                            dirs.add(entry.name)
+                        if entry.is_symlink():
+                            links.add(entry.name)
+                    except OSError:
+                        pass
+        except OSError:
+            return EMPTY_LISTING
+
+        listing = Listing(
+            mtime_ns, tuple(sorted(names)), frozenset(dirs), frozenset(links)
+        )
+        with self._lock:
+            if time.time_ns() - mtime_ns > RACY_WINDOW_NS:
+                self._listings[path] = listing
+            else:
+                self._listings.pop(path, None)
+        return listing
+
+    def clear(self):
+        """Drop all cached listings."""
+        with self._lock:
+            self._listings.clear()
+
+
+def _match_names(listing: Listing, pattern: str, dirs_only: bool):
+    """Yield the names of a listing matching one pattern component."""
+    include_hidden = pattern.startswith(".")
+    match = compile_pattern(pattern)
+    names = listing.names
+    if dirs_only:
+        names = (name for name in names if name in listing.dirs)
+    for name in names:
+        if not include_hidden and name.startswith("."):
+            continue
+        if match(name):
+            yield name
+
+
+def _glob_dirs(dirname: str, working_dir: str, cache: DirectoryCache):
+    """
+    Yield the directories matching a (possibly magic) directory pattern.
+
+    Args:
+        dirname (str): Directory part of a pattern.
+        working_dir (str): Directory relative patterns are resolved in.
+        cache (DirectoryCache): Session directory cache.
+
+    Yields:
+        str: Matching directory paths, in pattern form.
+    """
+    if not has_magic(dirname):
+        if os.path.isdir(os.path.join(working_dir, dirname)):
+            yield dirname
+        return
+
+    parent, pattern = os.path.split(dirname)
+    parents = _glob_dirs(parent, working_dir, cache) if parent else [""]
+    for base in parents:
+        listing = cache.listdir(os.path.join(working_dir, base or "."))
+        for name in _match_names(listing, pattern, dirs_only=True):
+            yield os.path.join(base, name)
+
+
+def _match_in(base, basename, working_dir, cache):
+    """Yield the names in directory `base` matching `basename`."""
+    search_path = os.path.join(working_dir, base or ".")
+    if has_magic(basename):
+        yield from _match_names(
+            cache.listdir(search_path), basename, dirs_only=False
+        )
+    elif os.path.lexists(os.path.join(search_path, basename)):
+        yield basename
+
+
+def _descendants(base, working_dir, cache, dirs_only):
+    """
+    Yield `base` and everything below it, for a `**` component.
+
+    Hidden entries are skipped, and symlinks to directories are listed
+    but not followed, as with bash's globstar.
+    """
+    yield base
+    listing = cache.listdir(os.path.join(working_dir, base or "."))
+    for name in listing.names:
+        is_dir = name in listing.dirs
+        if (dirs_only and not is_dir) or name.startswith("."):
+            continue
+        path = os.path.join(base, name)
+        if is_dir and name not in listing.links:
+            yield from _descendants(path, working_dir, cache, dirs_only)
+        else:
+            yield path
+
+
+def _expand_parts(base, parts, working_dir, cache):
+    """
+    Yield the paths below `base` matching the remaining components.
+
+    Args:
+        base (str): Path matched so far, in pattern form.
+        parts (tuple): Remaining pattern components.
+        working_dir (str): Directory relative patterns are resolved in.
+        cache (DirectoryCache): Session directory cache.
+
+    Yields:
+        str: Matching paths, in pattern form.
+    """
+    if not parts:
+        yield base
+        return
+    part, rest = parts[0], parts[1:]
+    if part == RECURSIVE:
+        for path in _descendants(base, working_dir, cache, bool(rest)):
+            yield from _expand_parts(path, rest, working_dir, cache)
+    elif has_magic(part):
+        listing = cache.listdir(os.path.join(working_dir, base or "."))
+        names = _match_names(listing, part, dirs_only=bool(rest))
+        if not rest:
+            yield from (os.path.join(base, name) for name in names)
+            return
+        for name in names:
+            yield from _expand_parts(
+                os.path.join(base, name), rest, working_dir, cache
+            )
+    else:
+        path = os.path.join(base, part)
+        full_path = os.path.join(working_dir, path)
+        if os.path.isdir(full_path) if rest else os.path.lexists(full_path):
+            yield from _expand_parts(path, rest, working_dir, cache)
+
+
+def _expand_recursive(pattern, working_dir, cache):
+    """Return the sorted matches of a pattern with a `**` component."""
+    absolute = os.path.isabs(pattern)
+    base = os.sep if absolute else ""
+    parts = tuple(pattern.lstrip(os.sep).split(os.sep))
+    matches = set(_expand_parts(base, parts, working_dir, cache))
+    # The starting directory itself, matched by a leading `**`
+    matches.discard(base)
+    if absolute:
+        return sorted(matches)
+    return sorted(
+        os.path.normpath(match).replace("\\", "/") for match in matches
+    )
+
+
+def expand_glob(
+    pattern: str,
+    working_dir: str,
+    cache: DirectoryCache
+) -> Iterator[str]:
+    """
+    Lazily expand a glob pattern.
+
+    Relative patterns are resolved against `working_dir` and produce
+    normalized relative paths; absolute patterns produce absolute paths.
+    Matches are yielded in sorted order. Hidden entries only match
+    components that start with a dot, and a `**` component matches zero
+    or more non-hidden directories.
+
+    Args:
+        pattern (str): The glob pattern.
+        working_dir (str): Directory relative patterns are resolved in.
+        cache (DirectoryCache): Session directory cache.
+
+    Yields:
+        str: Matching paths.
+    """
+    if RECURSIVE in pattern.split(os.sep):
+        yield from _expand_recursive(pattern, working_dir, cache)
+        return
+
+    dirname, basename = os.path.split(pattern)
+    absolute = os.path.isabs(pattern)
+
+    if not has_magic(dirname):
+        # One directory: its sorted listing gives sorted matches,
+        # so they can be streamed as they are found.
+        names = _match_in(dirname, basename, working_dir, cache)
+        if absolute:
+            for name in names:
+                yield os.path.join(dirname, name)
+            return
+        prefix = os.path.normpath(dirname).replace("\\", "/")
+        if prefix == ".":
+            yield from names
+        else:
+            for name in names:
+                yield f"{prefix}/{name}"
+        return
+
+    matches = sorted(
+        os.path.join(base, name)
+        for base in _glob_dirs(dirname, working_dir, cache)
+        for name in _match_in(base, basename, working_dir, cache)
+    )
+    for match in matches:
+        if absolute:
+            yield match
+        else:
+            yield os.path.normpath(match).replace("\\", "/")
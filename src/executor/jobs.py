@@ -0,0 +1,141 @@
+"""
+Background jobs for PKU Shell.
+
+A pipeline followed by `&` is submitted to a pool of worker threads
+shared by all sessions (PKU_SHELL_JOBS threads, 4 by default) and the
+shell goes on with the next statement. Each job runs in its own
+execution context, with a snapshot of the working directory and
+environment, and its output is captured separately. The `wait` builtin
+emits the output of finished jobs in job order, and `jobs` lists them.
+"""
+
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, Optional
+
+WORKERS = int(os.environ.get("PKU_SHELL_JOBS", "4"))
+
+_pool: Optional[ThreadPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def get_pool() -> ThreadPoolExecutor:
+    """
+    Return the pool background jobs run in, starting it on first use.
+
+    Returns:
+        ThreadPoolExecutor: Pool of WORKERS threads.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(
+                max_workers=WORKERS, thread_name_prefix="pku-shell-job"
+            )
+        return _pool
+
+
+class Job:
+    """A background job: its number and the future of its output."""
+
+    __slots__ = ("number", "future")
+
+    def __init__(self, number: int, future: Future):
+        self.number = number
+        self.future = future
+
+    def state(self) -> str:
+        """Return "Running", "Done" or "Failed"."""
+        if not self.future.done():
+            return "Running"
+        return "Failed" if self.future.exception() else "Done"
+
+    def output(self) -> str:
+        """
+        Wait for the job and return its output.
+
+        A failed job outputs its error message, as a failed command
+        line does in `shell.eval`.
+
+        Returns:
+            str: The output of the job's pipeline.
+        """
+        try:
+            return self.future.result()
+        except Exception as e:
+            return f"Error: {e}\n"
+
+
+class JobTable:
+    """
+    Background jobs of a session, numbered from 1 in submission order.
+
+    Numbers start again from 1 once every job has been waited for.
+    """
+
+    def __init__(self):
+        """Initialize an empty job table."""
+        self._jobs: Dict[int, Job] = {}
+        self._lock = threading.Lock()
+        self._next = 1
+
+    def submit(self, run: Callable[[], str]) -> Job:
+        """
+        Start a background job.
+
+        Args:
+            run (Callable[[], str]): Runs the job and returns its output.
+
+        Returns:
+            Job: The new job.
+        """
+        with self._lock:
+            if not self._jobs:
+                self._next = 1
+            job = Job(self._next, get_pool().submit(run))
+            self._jobs[job.number] = job
+            self._next += 1
+        return job
+
+    def wait(self, numbers: Optional[Iterable[int]] = None) -> str:
+        """
+        Wait for jobs and remove them from the table.
+
+        Args:
+            numbers (Optional[Iterable[int]]): Numbers of the jobs; all
+                jobs by default.
+
+        Returns:
+            str: The outputs of the jobs, in job order.
+
+        Raises:
+            ValueError: If a job number is not in the table.
+        """
+        with self._lock:
+            if numbers is None:
+                numbers = list(self._jobs)
+            for number in numbers:
+                if number not in self._jobs:
+                    raise ValueError(f"wait: %{number}: no such job")
+            jobs = [self._jobs[number] for number in sorted(set(numbers))]
+
+        outputs = [job.output() for job in jobs]
+        with self._lock:
+            for job in jobs:
+                self._jobs.pop(job.number, None)
+        return "".join(outputs)
+
+    def describe(self) -> str:
+        """
+        List the jobs with their state.
+
+        Returns:
+            str: One `[number] state` line per job, in job order.
+        """
+        with self._lock:
+            jobs = list(self._jobs.values())
+        return "".join(f"[{job.number}] {job.state()}\n" for job in jobs)
+
+    def __len__(self) -> int:
+        return len(self._jobs)
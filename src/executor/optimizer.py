@@ -0,0 +1,162 @@
+"""
+Pipeline optimizer for PKU Shell.
+
+Runs between parsing and execution: every pipeline, including those in
+command substitutions and background jobs, is scanned from left to
+right for runs of stages that a fused operator (executor.fused) can
+replace, and each run found is replaced by a `Fused` node. Only stages
+without redirections, whose command and arguments are all literal words,
+are replaced, so their arguments are known before they run.
+
+Set PKU_SHELL_OPTIMIZE=0 to run pipelines as written, or to "report" to
+print the rewrites of each command line to stderr. Rewrites are also
+counted in `stats`.
+"""
+
+import os
+import sys
+import threading
+from collections import Counter
+from typing import List, Optional, Tuple
+from parser.nodes import (
+    Node, Arg, Background, Call, Fused, Pipeline, Sequence, Substitution
+)
+from executor.fused import OPERATORS
+
+MODE = os.environ.get("PKU_SHELL_OPTIMIZE", "1")
+ENABLED = MODE != "0"
+REPORT = MODE == "report"
+
+# Number of times each rewrite fired, by operator name. Updated under
+# _stats_lock, as sessions, background jobs and substitutions optimize
+# their ASTs concurrently
+stats: Counter = Counter()
+_stats_lock = threading.Lock()
+
+
+def optimize(ast: Node, fired: Optional[List[str]] = None) -> Node:
+    """
+    Rewrite the pipelines of an AST into fused operators.
+
+    Nodes are immutable, so the pipelines that change are rebuilt along
+    with the nodes containing them; the rest of the AST is shared.
+
+    Args:
+        ast (Node): AST to optimize.
+        fired (Optional[List[str]]): List the names of the rewrites that
+            fired are appended to, in order.
+
+    Returns:
+        Node: Optimized AST, or `ast` itself if no rewrite fired.
+    """
+    names = [] if fired is None else fired
+    start = len(names)
+    result = _optimize(ast, names)
+    new = names[start:]
+    if new:
+        with _stats_lock:
+            stats.update(new)
+    if REPORT and new:
+        print(f"optimizer: {', '.join(new)}", file=sys.stderr)
+    return result
+
+
+def _optimize(node, fired: List[str]):
+    """Optimize a node and its children; return it if unchanged."""
+    if isinstance(node, Sequence):
+        statements = _optimize_all(node.statements, fired)
+        return node if statements is None else Sequence(statements)
+    if isinstance(node, Pipeline):
+        commands = _optimize_all(node.commands, fired)
+        fused = fuse(commands or node.commands, fired)
+        if fused is None and commands is None:
+            return node
+        return Pipeline(fused or commands)
+    if isinstance(node, Background):
+        command = _optimize(node.command, fired)
+        return node if command is node.command else Background(command)
+    if isinstance(node, Call):
+        args = _optimize_all(node.args, fired)
+        return node if args is None else Call(args, node.redirections)
+    if isinstance(node, Arg):
+        if isinstance(node.value, tuple):
+            parts = _optimize_all(node.value, fired)
+            return node if parts is None else Arg(parts, node.glob)
+        if isinstance(node.value, Node):
+            value = _optimize(node.value, fired)
+            return node if value is node.value else Arg(value, node.glob)
+        return node
+    if isinstance(node, Substitution):
+        command = _optimize(node.command, fired)
+        if command is node.command:
+            return node
+        return Substitution(command, node.backtick)
+    return node
+
+
+def _optimize_all(nodes: tuple, fired: List[str]) -> Optional[tuple]:
+    """Optimize each node; return None if none of them changed."""
+    result = tuple(_optimize(node, fired) for node in nodes)
+    if all(new is old for new, old in zip(result, nodes)):
+        return None
+    return result
+
+
+def literal_args(call: Node) -> Optional[List[str]]:
+    """
+    Return the words of a call whose arguments are all literal.
+
+    Args:
+        call (Node): Pipeline stage.
+
+    Returns:
+        Optional[List[str]]: Command and arguments, or None if the stage
+        has redirections, globs, quotes or substitutions.
+    """
+    if not isinstance(call, Call) or call.redirections or not call.args:
+        return None
+    words = []
+    for arg in call.args:
+        if (
+            not isinstance(arg, Arg)
+            or type(arg.value) is not str
+            or arg.glob
+        ):
+            return None
+        words.append(arg.value)
+    return words
+
+
+def fuse(commands: tuple, fired: List[str]) -> Optional[Tuple[Node, ...]]:
+    """
+    Replace runs of pipeline stages with fused operators.
+
+    Args:
+        commands (tuple): Stages of a pipeline.
+        fired (List[str]): List the rewrites that fired are appended to.
+
+    Returns:
+        Optional[Tuple[Node, ...]]: New stages, or None if no rewrite
+        fired.
+    """
+    words = [literal_args(command) for command in commands]
+    result = []
+    i = 0
+    while i < len(commands):
+        for operator in OPERATORS.values():
+            end = i + len(operator.commands)
+            run = words[i:end]
+            if (
+                len(run) == len(operator.commands)
+                and all(run)
+                and tuple(w[0] for w in run) == operator.commands
+                and operator.accepts([w[1:] for w in run])
+            ):
+                result.append(Fused(operator.name, commands[i:end]))
+                fired.append(operator.name)
+                i = end
+                break
+        else:
+            result.append(commands[i])
+            i += 1
+    return tuple(result) if len(result) < len(commands) else None
@@ -0,0 +1,137 @@
+"""
+Incremental output of command lines in PKU Shell.
+
+`shell.eval` collects the output of a command line in an `out` object
+with the `append` and `clear` methods of a deque. An `OutputSink` can
+take its place to write the output as it is produced instead: pipelines
+write the output of their last stage into it as each buffered stage
+finishes or a streamed stage yields, and the sink writes it to its
+stream, e.g. `sys.stdout.buffer`, whenever `PKU_SHELL_OUTPUT_BUFFER`
+characters (8192 by default; 0 writes every piece at once) are pending.
+As with the deque, `clear` discards the output of a failed command
+line, but only what has not been written yet: a command that fails
+after the sink has written part of its output leaves that part
+printed, before its error message.
+"""
+
+import io
+import os
+import codecs
+from typing import IO, List, Optional
+
+# Set PKU_SHELL_OUTPUT_BUFFER to the number of characters kept before
+# they are written
+BUFFER_SIZE = int(
+    os.environ.get("PKU_SHELL_OUTPUT_BUFFER", io.DEFAULT_BUFFER_SIZE)
+)
+
+
+class OutputSink:
+    """
+    Buffered writer of command line output to a text or binary stream.
+
+    Text written to a binary stream is encoded, by default as UTF-8
+    with unencodable characters replaced.
+    """
+
+    __slots__ = (
+        "stream", "buffer_size", "encoding", "errors", "binary",
+        "_pending", "_pending_size", "_written",
+    )
+
+    def __init__(
+        self,
+        stream: IO,
+        buffer_size: Optional[int] = None,
+        encoding: str = "utf-8",
+        errors: str = "replace"
+    ):
+        """
+        Create a sink writing to a stream.
+
+        Args:
+            stream (IO): Text or binary stream, e.g. sys.stdout.buffer.
+            buffer_size (int, optional): Number of characters kept
+                before they are written; BUFFER_SIZE by default.
+            encoding (str): Encoding of text written to a binary stream.
+            errors (str): Encoding error handler.
+        """
+        self.stream = stream
+        self.buffer_size = BUFFER_SIZE if buffer_size is None else buffer_size
+        self.encoding = encoding
+        self.errors = errors
+        self.binary = not isinstance(stream, io.TextIOBase)
+        self._pending: List[str] = []
+        self._pending_size = 0
+        self._written = 0
+
+    def append(self, text: str):
+        """Add output, like `deque.append`."""
+        self.write(text)
+
+    def write(self, text: str) -> int:
+        """
+        Add output, writing the pending output once the buffer is full.
+
+        Args:
+            text (str): Output text.
+
+        Returns:
+            int: Number of characters added.
+        """
+        if text:
+            self._pending.append(text)
+            self._pending_size += len(text)
+            self._written += len(text)
+            if self._pending_size >= self.buffer_size:
+                self.flush()
+        return len(text)
+
+    def clear(self):
+        """Discard the output not written to the stream yet."""
+        self._written -= self._pending_size
+        self._pending = []
+        self._pending_size = 0
+
+    def tell(self) -> int:
+        """Return the number of characters added and not discarded."""
+        return self._written
+
+    def flush(self):
+        """Write the pending output and flush the stream."""
+        if self._pending:
+            text = "".join(self._pending)
+            self._pending = []
+            self._pending_size = 0
+            if self.binary:
+                self.stream.write(text.encode(self.encoding, self.errors))
+            else:
+                self.stream.write(text)
+        self.stream.flush()
+
+
+class DecodingWriter:
+    """
+    Binary stream decoding UTF-8 into a text stream, with undecodable
+    bytes replaced; characters split between writes are kept for the
+    next write.
+    """
+
+    __slots__ = ("output", "decoder")
+
+    def __init__(self, output: IO[str]):
+        self.output = output
+        self.decoder = codecs.getincrementaldecoder("utf-8")("replace")
+
+    def write(self, data: bytes) -> int:
+        """Decode bytes and write the text decoded so far."""
+        text = self.decoder.decode(data)
+        if text:
+            self.output.write(text)
+        return len(data)
+
+    def close(self):
+        """Write what is left of an incomplete character."""
+        text = self.decoder.decode(b"", final=True)
+        if text:
+            self.output.write(text)
@@ -2,12 +2,15 @@
 Pipeline Executor for PKU Shell.
 
 Implements the pipe (`|`) operator by connecting the output of one command
-to the input of the next, using in-memory IO streams.
+to the input of the next, using in-memory buffers that pass each output
+on without copying it.
 """
 
-from typing import List, Dict, Any
+from typing import List
 import io
+from executor.buffers import ChunkBuffer
 from executor.executor import ExecutionContext, execute_call
+from parser.nodes import Call
 
 
 class PipelineExecutor:
@@ -23,12 +26,12 @@ class PipelineExecutor:
         """Initialize an empty pipeline."""
         self.commands = []
 
-    def add_command(self, command: Dict[str, Any]):
+    def add_command(self, command: Call):
         """
         Add a command AST node to the pipeline.
 
         Args:
-            command (Dict[str, Any]): A parsed command node from the AST.
+            command (Call): A parsed command node from the AST.
         """
         self.commands.append(command)
 
@@ -37,7 +40,7 @@ class PipelineExecutor:
         Execute the full pipeline of commands.
 
         Steps:
-        1. Use StringIO buffers to pipe output -> input.
+        1. Use chunk buffers to pipe output -> input.
         2. Preserve working directory and environment variables.
         3. Collect only the final output in the output list.
 
@@ -53,18 +56,13 @@ class PipelineExecutor:
 
         for i, cmd in enumerate(self.commands):
             # Create a new execution context per command
-            cmd_context = ExecutionContext()
-            cmd_context.working_dir = context.working_dir
-            cmd_context.stdin = input_stream
-            cmd_context.env = context.env.copy()
-
-            output_stream = io.StringIO()
-            cmd_context.stdout = output_stream
+            output_stream = ChunkBuffer()
+            cmd_context = context.child(input_stream, output_stream)
 
             execute_call(cmd, out, cmd_context)
 
             # Final command: collect output
             if i == len(self.commands) - 1:
-                out.append(output_stream.getvalue())
+                out.append(output_stream.read())
             else:
-                input_stream = io.StringIO(output_stream.getvalue())
+                input_stream = output_stream
@@ -0,0 +1,198 @@
+"""
+Worker processes for CPU-bound applications in PKU Shell.
+
+Applications marked `cpu_bound` (grep, sort, uniq) run under the
+interpreter lock like everything else in the shell. Set
+PKU_SHELL_PROCESSES to a number of worker processes to run them in a
+process pool instead. The pool is started, and every worker has
+imported the applications, before the first command is sent to it.
+
+The input of an app that can split it (`BaseApp.can_split_input`) is
+cut into chunks of whole lines of about SPLIT_SIZE characters, which are
+processed by several workers at once (`BaseApp.run_chunk`); the app
+combines their results.
+Other apps run in one worker with their whole input. Either way, the
+output is the same as in-process execution.
+"""
+
+import os
+import atexit
+import threading
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Iterable, Iterator, List, Optional
+from apps.base import BaseApp
+from apps.files import FileAccess, using
+from apps.registry import AppRegistry
+from executor.streaming import batch_chunks
+
+WORKERS = int(os.environ.get("PKU_SHELL_PROCESSES", "0"))
+SPLIT_SIZE = 1024 * 1024
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def _init_worker():
+    """Import and register every application in a new worker."""
+    from apps.loader import load_all_apps
+    load_all_apps()
+
+
+def _ready(_=None) -> int:
+    """Task used to start the workers; returns the worker's pid."""
+    return os.getpid()
+
+
+def _run_app(
+    cmd_name: str,
+    cmd_args: List[str],
+    stdin: Optional[str],
+    working_dir: str
+) -> str:
+    """Run an application in a worker process."""
+    with using(FileAccess(working_dir)):
+        return AppRegistry.get(cmd_name).run(cmd_args, stdin=stdin)
+
+
+def _run_chunk(cmd_name: str, cmd_args: List[str], chunk: str) -> Any:
+    """Run an application on a chunk of its input in a worker process."""
+    return AppRegistry.get(cmd_name).run_chunk(cmd_args, chunk)
+
+
+def enabled() -> bool:
+    """Check whether CPU-bound apps run in worker processes."""
+    return WORKERS > 0
+
+
+def get_pool() -> ProcessPoolExecutor:
+    """
+    Return the process pool, starting it on first use.
+
+    Workers are spawned rather than forked, as the shell may be running
+    pipeline threads. All of them are started before the pool is
+    returned. Jobs, threaded stages and substitutions may call this at
+    the same time, so the pool is started under a lock.
+
+    Returns:
+        ProcessPoolExecutor: Pool of WORKERS processes.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            pool = ProcessPoolExecutor(
+                max_workers=WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+            )
+            list(pool.map(_ready, range(WORKERS)))
+            _pool = pool
+        return _pool
+
+
+def shutdown():
+    """Stop the worker processes, if they were started."""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown()
+            _pool = None
+
+
+atexit.register(shutdown)
+
+
+def map_chunks(
+    cmd_name: str,
+    cmd_args: List[str],
+    chunks: Iterable[str]
+) -> Iterator[Any]:
+    """
+    Run an application on each chunk of its input in the worker pool.
+
+    At most two chunks per worker are in flight, so the input is read
+    only as fast as the workers process it. Chunks still waiting are
+    cancelled if the caller stops early.
+
+    Args:
+        cmd_name (str): Name of the application.
+        cmd_args (List[str]): Command-line arguments.
+        chunks (Iterable[str]): Chunks of whole lines.
+
+    Yields:
+        Any: Result of `run_chunk` on each chunk, in input order.
+    """
+    pool = get_pool()
+    pending = deque()
+    try:
+        for chunk in chunks:
+            pending.append(
+                pool.submit(_run_chunk, cmd_name, cmd_args, chunk)
+            )
+            if len(pending) >= 2 * WORKERS:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+    finally:
+        # The pipeline may stop reading early
+        for future in pending:
+            future.cancel()
+
+
+def split_lines(
+    app: BaseApp,
+    cmd_name: str,
+    cmd_args: List[str],
+    lines: Iterable[str]
+) -> Iterator[str]:
+    """
+    Run a splittable application on streamed lines in the worker pool.
+
+    Args:
+        app (BaseApp): The application; `can_split_input` must be True.
+        cmd_name (str): Name of the application.
+        cmd_args (List[str]): Command-line arguments.
+        lines (Iterable[str]): Input lines.
+
+    Yields:
+        str: Chunks of the application's output.
+    """
+    chunks = batch_chunks(lines, SPLIT_SIZE)
+    yield from app.combine_outputs(
+        cmd_args, map_chunks(cmd_name, cmd_args, chunks)
+    )
+
+
+def run_app(
+    app: BaseApp,
+    cmd_name: str,
+    cmd_args: List[str],
+    stdin: Optional[str],
+    working_dir: str
+) -> str:
+    """
+    Run a CPU-bound application in the worker pool.
+
+    Args:
+        app (BaseApp): The application.
+        cmd_name (str): Name of the application.
+        cmd_args (List[str]): Command-line arguments.
+        stdin (Optional[str]): Input string.
+        working_dir (str): Directory relative paths are resolved from.
+
+    Returns:
+        str: Output of the application.
+    """
+    if (
+        stdin
+        and len(stdin) > SPLIT_SIZE
+        and app.supports_split()
+        and app.can_split_input(cmd_args)
+    ):
+        lines = stdin.splitlines(keepends=True)
+        return "".join(split_lines(app, cmd_name, cmd_args, lines))
+    future = get_pool().submit(
+        _run_app, cmd_name, cmd_args, stdin, working_dir
+    )
+    return future.result()
@@ -6,8 +6,10 @@ using the Decorator design pattern on the execution context.
 """
 
 import os
-from typing import Dict, Any, Optional, TextIO
+from typing import Optional, TextIO
+from executor import tracing
 from executor.executor import ExecutionContext
+from parser.nodes import Call, Redirection
 
 
 class RedirectionHandler:
@@ -18,18 +20,21 @@ class RedirectionHandler:
     operators in the command AST.
     """
 
-    def __init__(self, command: Dict[str, Any], context: ExecutionContext):
+    def __init__(self, command: Call, context: ExecutionContext):
         """
         Initialize a redirection handler.
 
         Args:
-            command (Dict[str, Any]): The AST node representing the command.
+            command (Call): The AST node representing the command.
             context (ExecutionContext): Current execution context.
         """
         self.command = command
         self.context = context
         self.input_file: Optional[TextIO] = None
         self.output_file: Optional[TextIO] = None
+        # Traced from opening to closing the file
+        self.input_span = tracing.NULL_SPAN
+        self.output_span = tracing.NULL_SPAN
 
     def setup_redirections(self):
         """
@@ -37,11 +42,21 @@ class RedirectionHandler:
 
         This includes opening files for input (`<`) and output (`>`).
         """
-        for redir in self.command.get("redirections", []):
-            if redir["type"] == "input_redirection":
-                self._setup_input_redirection(redir["file"])
-            elif redir["type"] == "output_redirection":
-                self._setup_output_redirection(redir["file"])
+        for redir in self.command.redirections:
+            span = tracing.span(redir.kind + redir.file, "redirect")
+            try:
+                if redir.kind == Redirection.INPUT:
+                    self._setup_input_redirection(redir.file)
+                    self.input_span.end()
+                    self.input_span = span
+                elif redir.kind == Redirection.OUTPUT:
+                    self._setup_output_redirection(redir.file)
+                    self.output_span.end()
+                    self.output_span = span
+            except Exception:
+                # Record the error in the span
+                with span:
+                    raise
 
     def _setup_input_redirection(self, file_path: str):
         """
@@ -93,6 +108,12 @@ class RedirectionHandler:
         Close any opened redirection file handles.
         """
         if self.input_file:
+            if self.input_span:
+                self.input_span.add_in(self.input_file.tell())
             self.input_file.close()
         if self.output_file:
+            if self.output_span:
+                self.output_span.add_out(self.output_file.tell())
             self.output_file.close()
+        self.input_span.end()
+        self.output_span.end()
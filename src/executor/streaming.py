@@ -0,0 +1,134 @@
+"""
+Streaming helpers for PKU Shell pipelines.
+
+A streaming pipeline passes the output of each stage to the next one as
+a lazy iterator of lines instead of a fully buffered string. Apps yield
+output in chunks of any size, so the chunks are split back into lines
+here, exactly as `str.splitlines(keepends=True)` would split the
+buffered output. Pipelines run in bytes mode pass bytes instead, split
+as `bytes.splitlines(keepends=True)` would.
+"""
+
+from typing import IO, AnyStr, Iterable, Iterator
+
+CHUNK_SIZE = 64 * 1024
+
+
+class CommandError(Exception):
+    """Error of a pipeline stage, already prefixed with its command."""
+
+
+# Line boundaries recognised by str.splitlines
+LINE_BREAKS = "\n\r\x0b\x0c\x1c\x1d\x1e\x85\u2028\u2029"
+# Line boundaries recognised by bytes.splitlines
+BYTE_LINE_BREAKS = b"\n\r"
+
+
+def read_chunks(
+    stream: IO[str],
+    chunk_size: int = CHUNK_SIZE
+) -> Iterator[str]:
+    """
+    Lazily read a text stream in chunks.
+
+    Args:
+        stream (IO[str]): Stream to read.
+        chunk_size (int): Maximum number of characters per chunk.
+
+    Returns:
+        Iterator[str]: Chunks of the stream.
+    """
+    return iter(lambda: stream.read(chunk_size), "")
+
+
+def batch_chunks(
+    chunks: Iterable[AnyStr],
+    batch_size: int = CHUNK_SIZE
+) -> Iterator[AnyStr]:
+    """
+    Join small chunks into batches of about `batch_size` characters.
+
+    Stages often yield one line at a time; batching their output lets
+    the next stage split it into lines with one call per batch.
+
+    Args:
+        chunks (Iterable[AnyStr]): Text or bytes chunks.
+        batch_size (int): Minimum number of characters (or bytes) per
+            batch, except for the last one.
+
+    Yields:
+        AnyStr: Batches of chunks.
+    """
+    batch = []
+    size = 0
+    for chunk in chunks:
+        batch.append(chunk)
+        size += len(chunk)
+        if size >= batch_size:
+            yield chunk[:0].join(batch)
+            batch = []
+            size = 0
+    if batch:
+        yield batch[0][:0].join(batch)
+
+
+def iter_lines(chunks: Iterable[str]) -> Iterator[str]:
+    """
+    Split a stream of text chunks into lines.
+
+    Gives the same lines as `"".join(chunks).splitlines(keepends=True)`,
+    without joining the chunks: a line split across chunks, or a "\\r"
+    that may be followed by "\\n" in the next chunk, is carried over.
+
+    Args:
+        chunks (Iterable[str]): Text chunks.
+
+    Yields:
+        str: Lines, with their line endings.
+    """
+    pending = ""
+    for chunk in chunks:
+        if not chunk:
+            continue
+        if pending:
+            chunk = pending + chunk
+        lines = chunk.splitlines(keepends=True)
+        last = lines[-1]
+        if last[-1] in LINE_BREAKS and last[-1] != "\r":
+            pending = ""
+        else:
+            pending = lines.pop()
+        yield from lines
+    if pending:
+        yield pending
+
+
+def iter_byte_lines(chunks: Iterable[bytes]) -> Iterator[bytes]:
+    """
+    Split a stream of bytes chunks into lines.
+
+    Gives the same lines as `b"".join(chunks).splitlines(keepends=True)`,
+    which end with "\\n", "\\r\\n" or "\\r" only. As in `iter_lines`, a
+    line split across chunks, or a "\\r" that may be followed by "\\n",
+    is carried over.
+
+    Args:
+        chunks (Iterable[bytes]): Bytes chunks.
+
+    Yields:
+        bytes: Lines, with their line endings.
+    """
+    pending = b""
+    for chunk in chunks:
+        if not chunk:
+            continue
+        if pending:
+            chunk = pending + chunk
+        lines = chunk.splitlines(keepends=True)
+        if chunk.endswith(b"\n"):
+            pending = b""
+        else:
+            pending = lines.pop()
+        yield from lines
+    if pending:
+        yield pending
@@ -0,0 +1,177 @@
+"""
+Concurrent command substitutions for PKU Shell.
+
+The substitutions in the arguments of one command are evaluated on a
+pool of worker threads shared by all sessions (PKU_SHELL_SUBSTITUTIONS
+threads, 4 by default; 0 or 1 evaluates them one at a time) when they
+cannot affect each other:
+
+- none of them runs a builtin acting on the session (`cd`, `wait`,
+  `jobs`), starts a background job or redirects output to a file;
+- every command name in them is a literal word, so the commands are
+  known before they run;
+- the command's stdin is at its end, so none of them can read input
+  another one would have read.
+
+Arguments keep their order, and if several substitutions fail, the
+error of the first one is raised, as when they run one at a time.
+"""
+
+import os
+import threading
+import contextvars
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Callable, List, Optional, TypeVar
+from apps.registry import AppRegistry
+from parser.nodes import (
+    Node, Arg, Call, Pipeline, Redirection, Sequence, Substitution
+)
+
+WORKERS = int(os.environ.get("PKU_SHELL_SUBSTITUTIONS", "4"))
+
+T = TypeVar("T")
+
+_pool: Optional[ThreadPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def enabled() -> bool:
+    """Check whether substitutions may be evaluated concurrently."""
+    return WORKERS > 1
+
+
+def get_pool() -> ThreadPoolExecutor:
+    """
+    Return the pool substitutions run in, starting it on first use.
+
+    Returns:
+        ThreadPoolExecutor: Pool of WORKERS threads.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(
+                max_workers=WORKERS, thread_name_prefix="pku-shell-subst"
+            )
+        return _pool
+
+
+def find_substitutions(args) -> List[Substitution]:
+    """
+    List the substitutions of a command's arguments, in order.
+
+    Substitutions nested in other substitutions are not listed: they
+    are evaluated when the substitution containing them runs.
+
+    Args:
+        args (Iterable[Node]): Arguments of a call.
+
+    Returns:
+        List[Substitution]: Substitutions, in argument order.
+    """
+    found = []
+    for arg in args:
+        if isinstance(arg, Substitution):
+            found.append(arg)
+        elif isinstance(arg, Arg):
+            value = arg.value
+            if isinstance(value, tuple):
+                found.extend(find_substitutions(
+                    v for v in value if isinstance(v, Node)
+                ))
+            elif isinstance(value, Node):
+                found.extend(find_substitutions([value]))
+    return found
+
+
+def is_independent(node: Node) -> bool:
+    """
+    Check whether a command can run concurrently with others.
+
+    Args:
+        node (Node): Command of a substitution, or one of its parts.
+
+    Returns:
+        bool: True if the command and its nested substitutions only run
+        known apps that do not act on the session, and write no files.
+    """
+    if isinstance(node, Substitution):
+        return is_independent(node.command)
+    if isinstance(node, Sequence):
+        return all(is_independent(stmt) for stmt in node.statements)
+    if isinstance(node, Pipeline):
+        return all(is_independent(cmd) for cmd in node.commands)
+    if isinstance(node, Call):
+        if any(r.kind == Redirection.OUTPUT for r in node.redirections):
+            return False
+        if node.args:
+            name = node.args[0]
+            if (
+                not isinstance(name, Arg)
+                or type(name.value) is not str
+                or name.glob
+                or AppRegistry.is_stateful(name.value)
+            ):
+                return False
+        return all(
+            is_independent(sub) for sub in find_substitutions(node.args)
+        )
+    # Background jobs start in the session's job table
+    return False
+
+
+def at_end(stream) -> bool:
+    """
+    Check whether nothing is left to read from a command's stdin.
+
+    Args:
+        stream (Optional[TextIO]): The stdin of the command.
+
+    Returns:
+        bool: True if the stream is None or at its end; False if it has
+        input left or cannot be checked without reading it.
+    """
+    if stream is None:
+        return True
+    if not stream.seekable():
+        return False
+    position = stream.tell()
+    left = stream.read(1)
+    stream.seek(position)
+    return not left
+
+
+def run_all(tasks: List[Callable[[], T]]) -> List[T]:
+    """
+    Run tasks concurrently and return their results in order.
+
+    The first task runs in the calling thread, the others in the pool.
+    Tasks that no worker has started yet when their result is needed
+    are run in the calling thread instead, so substitutions nested in
+    substitutions never wait for a busy pool.
+
+    Args:
+        tasks (List[Callable[[], T]]): Tasks to run.
+
+    Returns:
+        List[T]: Result of each task.
+
+    Raises:
+        Exception: The error of the first failing task, once the other
+        tasks are done or cancelled.
+    """
+    pool = get_pool()
+    futures = [
+        pool.submit(contextvars.copy_context().run, task)
+        for task in tasks[1:]
+    ]
+    try:
+        results = [tasks[0]()]
+        for task, future in zip(tasks[1:], futures):
+            results.append(task() if future.cancel() else future.result())
+    except BaseException:
+        for future in futures:
+            future.cancel()
+        wait(futures)
+        raise
+    return results
@@ -0,0 +1,193 @@
+"""
+Concurrent pipeline stages for PKU Shell.
+
+Runs each stage of a streaming pipeline on its own worker thread. Stages
+are connected by bounded queues (`Channel`): a stage that gets ahead of
+the next one blocks when the queue is full, so memory use stays bounded.
+
+Stages stop like in sequential streaming pipelines. A stage that fails
+passes its error down the pipeline. A stage that is done, or fails,
+closes the reading end of its input channel: like SIGPIPE, the stage
+before it gets BrokenPipeError from its next write and stops, closing
+its files. Cancellation (e.g. Ctrl-C while the main thread waits for
+output) stops every worker at its next queue operation.
+"""
+
+import queue
+import threading
+import contextvars
+from typing import IO, Callable, Iterable, Iterator, List, Optional
+from executor.streaming import batch_chunks, iter_lines
+
+QUEUE_SIZE = 16
+POLL_INTERVAL = 0.05
+
+Stage = Callable[[Iterator[str]], Iterable[str]]
+SplitLines = Callable[[Iterable[str]], Iterator[str]]
+
+
+class Cancelled(Exception):
+    """Raised in a worker when the pipeline has been cancelled."""
+
+
+class _End:
+    """Marks the end of a channel, with the error that ended it if any."""
+
+    __slots__ = ("error",)
+
+    def __init__(self, error: Optional[BaseException]):
+        self.error = error
+
+
+class Channel:
+    """
+    Bounded queue of text chunks between two pipeline stages.
+
+    Iterating a channel yields its chunks until the producer closes it,
+    then raises the producer's error if there is one.
+    """
+
+    def __init__(self, cancelled: threading.Event, maxsize: int = QUEUE_SIZE):
+        self.cancelled = cancelled
+        self.reader_closed = threading.Event()
+        self.queue = queue.Queue(maxsize)
+
+    def put(self, item):
+        """
+        Add an item, blocking while the queue is full.
+
+        Raises:
+            Cancelled: If the pipeline is cancelled while waiting.
+            BrokenPipeError: If the consumer has stopped reading.
+        """
+        while True:
+            if self.cancelled.is_set():
+                raise Cancelled()
+            if self.reader_closed.is_set():
+                raise BrokenPipeError()
+            try:
+                self.queue.put(item, timeout=POLL_INTERVAL)
+                return
+            except queue.Full:
+                pass
+
+    def get(self):
+        """
+        Remove and return an item, blocking while the queue is empty.
+
+        Raises:
+            Cancelled: If the pipeline is cancelled while waiting.
+        """
+        while True:
+            if self.cancelled.is_set():
+                raise Cancelled()
+            try:
+                return self.queue.get(timeout=POLL_INTERVAL)
+            except queue.Empty:
+                pass
+
+    def close(self, error: Optional[BaseException] = None):
+        """Mark the end of the chunks, passing on an optional error."""
+        self.put(_End(error))
+
+    def close_reader(self):
+        """Stop reading: the producer's next `put` raises BrokenPipeError."""
+        self.reader_closed.set()
+        # Wake up a producer blocked on a full queue
+        while True:
+            try:
+                self.queue.get_nowait()
+            except queue.Empty:
+                return
+
+    def __iter__(self) -> Iterator[str]:
+        while True:
+            item = self.get()
+            if isinstance(item, _End):
+                if item.error is not None:
+                    raise item.error
+                return
+            yield item
+
+
+def run_stage(
+    stage: Stage,
+    chunks: Iterable[str],
+    channel: Channel,
+    split_lines: SplitLines = iter_lines
+):
+    """
+    Run a stage on a worker thread, sending its output to a channel.
+
+    Output chunks are joined into batches to limit queue operations.
+
+    Args:
+        stage (Stage): Function from input lines to output chunks.
+        chunks (Iterable[str]): Input of the stage: the channel from the
+            previous stage, or the pipeline's stdin.
+        channel (Channel): Channel to the next stage.
+        split_lines (SplitLines): Splits the input into lines; bytes
+            pipelines pass `iter_byte_lines`.
+    """
+    output = stage(split_lines(chunks))
+    try:
+        for batch in batch_chunks(output):
+            channel.put(batch)
+        channel.close()
+    except (Cancelled, BrokenPipeError):
+        pass
+    except Exception as e:
+        try:
+            channel.close(e)
+        except (Cancelled, BrokenPipeError):
+            pass
+    finally:
+        close = getattr(output, "close", None)
+        if close is not None:
+            close()
+        if isinstance(chunks, Channel):
+            chunks.close_reader()
+
+
+def run_threaded(
+    stages: List[Stage],
+    chunks: Iterable[str],
+    out: IO,
+    split_lines: SplitLines = iter_lines
+):
+    """
+    Run pipeline stages concurrently, one worker thread per stage.
+
+    Args:
+        stages (List[Stage]): Functions from input lines to output chunks.
+        chunks (Iterable[str]): Input of the first stage.
+        out (IO): Stream the output of the last stage is written to.
+        split_lines (SplitLines): Splits each stage's input into lines.
+
+    Raises:
+        Exception: The error of the failing stage.
+    """
+    cancelled = threading.Event()
+    workers = []
+    for stage in stages:
+        channel = Channel(cancelled)
+        # Workers see the context variables of the pipeline, such as
+        # the session's file access
+        workers.append(threading.Thread(
+            target=contextvars.copy_context().run,
+            args=(run_stage, stage, chunks, channel, split_lines),
+            daemon=True,
+        ))
+        chunks = channel
+
+    for worker in workers:
+        worker.start()
+    try:
+        for chunk in chunks:
+            out.write(chunk)
+    except BaseException:
+        cancelled.set()
+        raise
+    finally:
+        for worker in workers:
+            worker.join()
@@ -0,0 +1,274 @@
+"""
+Execution tracing for PKU Shell.
+
+While a `Tracer` is active (`start`, or `python shell.py --trace FILE`),
+the shell records a span for parsing, for each AST node it executes,
+each application run, glob expansion and redirection. Every span has
+its wall time, the CPU time of its thread and, where they apply, the
+size of its input and output (`bytes_in` and `bytes_out`: characters
+for text passed between commands, bytes for redirected files). The
+spans are written in the Chrome trace-event format, which can be opened
+in chrome://tracing or https://ui.perfetto.dev.
+
+When no tracer is active, `span` returns a shared no-op span, and the
+hot paths of the executor check `enabled` or go through `traced`, so
+they skip spans altogether.
+"""
+
+import os
+import json
+import time
+import threading
+from typing import Callable, Iterable, Iterator, List, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class Span:
+    """
+    A timed operation, recorded when it ends.
+
+    Spans are truthy and their size counters can be updated while they
+    run; the no-op span used when tracing is off is falsy and ignores
+    updates, so callers only compute sizes `if span`.
+    """
+
+    __slots__ = (
+        "tracer", "name", "cat", "args", "start", "cpu_start",
+        "bytes_in", "bytes_out",
+    )
+
+    def __init__(self, tracer: "Tracer", name: str, cat: str, args: dict):
+        self.tracer = tracer
+        self.name = name
+        self.cat = cat
+        self.args = args
+        self.bytes_in = None
+        self.bytes_out = None
+        self.start = time.perf_counter_ns()
+        self.cpu_start = time.thread_time_ns()
+
+    def __bool__(self) -> bool:
+        return True
+
+    def __enter__(self) -> "Span":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        # Not GeneratorExit, raised when a streamed stage is stopped
+        if isinstance(exc, Exception):
+            self.fail(exc)
+        self.end()
+
+    def fail(self, exc: Exception):
+        """Record the error the span's operation failed with."""
+        self.args["error"] = str(exc)
+
+    def add_in(self, size: int):
+        """Add to the size of the span's input."""
+        self.bytes_in = (self.bytes_in or 0) + size
+
+    def add_out(self, size: int):
+        """Add to the size of the span's output."""
+        self.bytes_out = (self.bytes_out or 0) + size
+
+    def end(self):
+        """Record the span; spans ended twice are recorded once."""
+        if self.tracer is None:
+            return
+        tracer, self.tracer = self.tracer, None
+        tracer.record(self, time.perf_counter_ns(), time.thread_time_ns())
+
+
+class _NullSpan:
+    """Span used when tracing is off."""
+
+    __slots__ = ()
+
+    def __bool__(self) -> bool:
+        return False
+
+    def __enter__(self) -> "_NullSpan":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        pass
+
+    def fail(self, exc: Exception):
+        pass
+
+    def add_in(self, size: int):
+        pass
+
+    def add_out(self, size: int):
+        pass
+
+    def end(self):
+        pass
+
+
+NULL_SPAN = _NullSpan()
+
+
+class Tracer:
+    """Collects the spans of all threads as Chrome trace events."""
+
+    def __init__(self):
+        self.events: List[dict] = []
+        self.origin = time.perf_counter_ns()
+        self.pid = os.getpid()
+        self._lock = threading.Lock()
+
+    def record(self, span: Span, end: int, cpu_end: int):
+        """
+        Add a finished span as a complete ("X") event.
+
+        Args:
+            span (Span): The span.
+            end (int): Its end time, from `time.perf_counter_ns`.
+            cpu_end (int): Its thread's CPU time at the end, in ns.
+        """
+        args = dict(span.args)
+        if span.bytes_in is not None:
+            args["bytes_in"] = span.bytes_in
+        if span.bytes_out is not None:
+            args["bytes_out"] = span.bytes_out
+        cpu = (cpu_end - span.cpu_start) / 1000
+        args["cpu_us"] = cpu
+        event = {
+            "name": span.name,
+            "cat": span.cat,
+            "ph": "X",
+            "ts": (span.start - self.origin) / 1000,
+            "dur": (end - span.start) / 1000,
+            "tdur": cpu,
+            "pid": self.pid,
+            "tid": threading.get_ident(),
+            "args": args,
+        }
+        with self._lock:
+            self.events.append(event)
+
+    def write(self, path: str):
+        """
+        Write the trace as Chrome trace-event JSON.
+
+        Args:
+            path (str): Path of the trace file.
+        """
+        with self._lock:
+            events = sorted(self.events, key=lambda e: e["ts"])
+        with open(path, "w") as f:
+            json.dump(
+                {"traceEvents": events, "displayTimeUnit": "ms"}, f
+            )
+
+
+_tracer: Optional[Tracer] = None
+
+
+def start() -> Tracer:
+    """
+    Start recording spans, in a new tracer.
+
+    Returns:
+        Tracer: The active tracer.
+    """
+    global _tracer
+    _tracer = Tracer()
+    return _tracer
+
+
+def stop() -> Optional[Tracer]:
+    """
+    Stop recording spans.
+
+    Returns:
+        Optional[Tracer]: The tracer that was active, if any.
+    """
+    global _tracer
+    tracer, _tracer = _tracer, None
+    return tracer
+
+
+def enabled() -> bool:
+    """Check whether spans are being recorded."""
+    return _tracer is not None
+
+
+def span(name: str, cat: str, **args):
+    """
+    Start a span, to be used as a context manager or ended with `end`.
+
+    Args:
+        name (str): Name of the span, e.g. the command name.
+        cat (str): Category: "shell", "ast", "app", "glob" or
+            "redirect".
+        **args: Details shown with the span in trace viewers.
+
+    Returns:
+        Span: The span, or a no-op span if tracing is off.
+    """
+    tracer = _tracer
+    if tracer is None:
+        return NULL_SPAN
+    return Span(tracer, name, cat, args)
+
+
+def traced(name: str, cat: str, func: Callable[..., T], *args) -> T:
+    """
+    Call a function in a span, or just call it if tracing is off.
+
+    Args:
+        name (str): Name of the span.
+        cat (str): Category of the span.
+        func (Callable[..., T]): Function to call.
+        *args: Arguments of the function.
+
+    Returns:
+        T: Result of the function.
+    """
+    tracer = _tracer
+    if tracer is None:
+        return func(*args)
+    with Span(tracer, name, cat, {}):
+        return func(*args)
+
+
+def count_in(span, lines: Iterable[str]) -> Iterable[str]:
+    """
+    Count the size of a stage's input lines as they are read.
+
+    Args:
+        span (Span): Span of the stage.
+        lines (Iterable[str]): Input lines.
+
+    Returns:
+        Iterable[str]: The lines, unchanged if tracing is off.
+    """
+    if not span:
+        return lines
+    return _counted(span.add_in, lines)
+
+
+def count_out(span, chunks: Iterable[str]) -> Iterable[str]:
+    """
+    Count the size of a stage's output chunks as they are written.
+
+    Args:
+        span (Span): Span of the stage.
+        chunks (Iterable[str]): Output chunks.
+
+    Returns:
+        Iterable[str]: The chunks, unchanged if tracing is off.
+    """
+    if not span:
+        return chunks
+    return _counted(span.add_out, chunks)
+
+
+def _counted(add, texts: Iterable[str]) -> Iterator[str]:
+    """Yield texts, passing their size to `add`."""
+    for text in texts:
+        add(len(text))
+        yield text
@@ -0,0 +1,123 @@
+"""
+Lark-independent AST construction for PKU Shell.
+
+Both the Lark transformer (parser.lark_parser.ASTBuilder) and the
+fast-path lexer (parser.fastpath) build commands with these helpers, so
+the two produce identical ASTs.
+"""
+
+from typing import Iterable, Union
+from parser.nodes import (
+    Arg, Background, Call, Pipeline, Redirection, Sequence, Substitution
+)
+
+GLOB_CHARS = ("*", "?", "[")
+
+# Separator that runs the statement before it in the background
+BACKGROUND = "&"
+
+
+def word_arg(word: str) -> Arg:
+    """
+    Build the argument for an unquoted word.
+
+    Args:
+        word (str): The word as written on the command line.
+
+    Returns:
+        Arg: The argument, marked as a glob pattern if the word
+        contains `*`, `?` or `[`.
+    """
+    return Arg(word, glob=any(c in word for c in GLOB_CHARS))
+
+
+def build_call(items: Iterable[Union[Arg, Redirection, Substitution]]):
+    """
+    Build a Call node in a single pass over the command's items.
+
+    - Redirections are collected separately from the arguments.
+    - Consecutive words are flattened into one argument each; a lone
+      double-quoted string with substitutions is split into its parts.
+    - Unquoted words containing `*`, `?` or `[` are marked as glob
+      patterns for the executor, except the word following `-name`.
+
+    Args:
+        items: Arguments, substitutions and redirections in command
+            line order.
+
+    Returns:
+        Call: The command node.
+    """
+    args = []
+    redirections = []
+    current = []
+    after_name = False
+    seen_name = False
+
+    def add(arg):
+        nonlocal after_name, seen_name
+        if isinstance(arg, Arg):
+            if arg.glob and after_name:
+                arg = Arg(arg.value)
+            after_name = not seen_name and arg.value == "-name"
+        else:
+            after_name = False
+        seen_name = seen_name or after_name
+        args.append(arg)
+
+    def flush():
+        if len(current) == 1 and type(current[0].value) is tuple:
+            for part in current[0].value:
+                add(Arg(part) if isinstance(part, str) else part)
+        else:
+            for arg in current:
+                add(arg)
+        current.clear()
+
+    for item in items:
+        if isinstance(item, Redirection):
+            flush()
+            redirections.append(item)
+        elif isinstance(item, Substitution):
+            flush()
+            add(item)
+        else:
+            current.append(item)
+
+    flush()
+    return Call(args, redirections)
+
+
+def build_sequence(items: Iterable[Union[Pipeline, str]]) -> Sequence:
+    """
+    Build a Sequence node from statements and `&` separators.
+
+    Each `&` turns the statement before it into a Background node; the
+    `;` separators are not part of `items`.
+
+    Args:
+        items: Statements and BACKGROUND markers in command line order.
+
+    Returns:
+        Sequence: The statement list.
+
+    Raises:
+        ValueError: If `&` does not follow a command.
+    """
+    statements = []
+    for item in items:
+        if isinstance(item, str):
+            last = statements[-1] if statements else None
+            if not isinstance(last, Pipeline) or is_empty(last):
+                raise ValueError(
+                    f"syntax error near unexpected token `{BACKGROUND}'"
+                )
+            statements[-1] = Background(last)
+        else:
+            statements.append(item)
+    return Sequence(statements)
+
+
+def is_empty(pipeline: Pipeline) -> bool:
+    """Check whether a pipeline is an empty statement, as in `a;`."""
+    return len(pipeline.commands) == 1 and pipeline.commands[0] == Call()
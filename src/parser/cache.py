@@ -0,0 +1,168 @@
+"""
+AST cache for PKU Shell.
+
+Keeps a bounded least-recently-used cache of parsed command lines so that
+repeated commands skip the parser. Cached ASTs are immutable, so later
+stages cannot modify a shared entry: parser nodes are immutable already,
+and dict-based ASTs are frozen into read-only mappings and tuples.
+
+`is_private` checks that a cache file on disk is safe to unpickle.
+"""
+
+import os
+import threading
+from collections import OrderedDict, namedtuple
+from types import MappingProxyType
+
+CacheInfo = namedtuple("CacheInfo", ["hits", "misses", "maxsize", "currsize"])
+
+DEFAULT_CACHE_SIZE = int(os.environ.get("PKU_SHELL_AST_CACHE_SIZE", "256"))
+
+
+def is_private(path):
+    """
+    Check that a file or directory can only be changed by its owner, the
+    current user.
+
+    Caches that are unpickled (the LALR tables, compiled scripts) are
+    only read from private files: one other users could write would let
+    them run code in the shell.
+
+    Args:
+        path (str): Path to check.
+
+    Returns:
+        bool: True if the path is not a symbolic link, is owned by the
+        current user and is not writable by group or others.
+    """
+    info = os.lstat(path)
+    if os.path.islink(path) or info.st_mode & 0o022:
+        return False
+    getuid = getattr(os, "getuid", None)
+    return getuid is None or info.st_uid == getuid()
+
+
+def freeze_ast(node):
+    """
+    Recursively convert an AST into an immutable structure.
+
+    Dicts become read-only mappings and lists become tuples.
+    Other values (strings, tokens, trees) are returned unchanged.
+
+    Args:
+        node: AST node or value to freeze.
+
+    Returns:
+        The frozen node.
+    """
+    if isinstance(node, dict):
+        return MappingProxyType(
+            {key: freeze_ast(value) for key, value in node.items()}
+        )
+    if isinstance(node, list):
+        return tuple(freeze_ast(item) for item in node)
+    return node
+
+
+class ASTCache:
+    """
+    Bounded LRU cache of frozen ASTs keyed by the command line string.
+
+    A maxsize of 0 disables caching. The cache is shared by sessions
+    and background jobs running on threads, so its entries and counters
+    are only accessed under a lock.
+    """
+
+    def __init__(self, maxsize=DEFAULT_CACHE_SIZE):
+        """
+        Initialize an empty cache.
+
+        Args:
+            maxsize (int): Maximum number of cached command lines.
+
+        Raises:
+            ValueError: If maxsize is negative.
+        """
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.maxsize = 0
+        self.hits = 0
+        self.misses = 0
+        self.resize(maxsize)
+
+    def get(self, line):
+        """
+        Look up the AST of a command line.
+
+        Args:
+            line (str): The command line.
+
+        Returns:
+            The frozen AST, or None if the line is not cached.
+        """
+        with self._lock:
+            ast = self._entries.get(line)
+            if ast is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(line)
+            self.hits += 1
+            return ast
+
+    def put(self, line, ast):
+        """
+        Freeze and store the AST of a command line.
+
+        Evicts the least recently used entry when the cache is full.
+
+        Args:
+            line (str): The command line.
+            ast: The AST produced by the parser.
+
+        Returns:
+            The frozen AST.
+        """
+        frozen = freeze_ast(ast)
+        with self._lock:
+            if self.maxsize:
+                self._entries[line] = frozen
+                self._entries.move_to_end(line)
+                while len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+        return frozen
+
+    def resize(self, maxsize):
+        """
+        Change the maximum number of entries, evicting the oldest ones.
+
+        Args:
+            maxsize (int): New maximum size (0 disables caching).
+
+        Raises:
+            ValueError: If maxsize is negative.
+        """
+        if maxsize < 0:
+            raise ValueError("AST cache size must not be negative")
+        with self._lock:
+            self.maxsize = maxsize
+            while len(self._entries) > maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """Remove all entries and reset the hit/miss counters."""
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def info(self):
+        """
+        Report cache statistics.
+
+        Returns:
+            CacheInfo: Hits, misses, maximum size and current size.
+        """
+        with self._lock:
+            return CacheInfo(
+                self.hits, self.misses, self.maxsize, len(self._entries)
+            )
@@ -0,0 +1,85 @@
+"""
+Fast-path lexer for simple PKU Shell command lines.
+
+Most command lines are plain words joined by `|`, `;` and `&`, such as
+`grep foo file | sort | uniq`. This module recognizes that subset with a
+single regular expression and builds the AST directly, without Lark.
+
+A line is simple when it contains no quotes, backticks or `$(` and every
+redirection is unambiguous. For any other line `parse_simple` returns
+None and the caller falls back to the Lark parser. Results are identical
+to those of the LALR grammar (grammar_lalr.lark).
+"""
+
+import re
+from typing import Optional
+from parser.builder import BACKGROUND, build_call, build_sequence, word_arg
+from parser.nodes import Pipeline, Redirection, Sequence
+
+# Quotes, backticks, `$(` and whitespace the grammar does not ignore
+# (anything but space, tab, form feed, CR and LF) need the full parser.
+NOT_SIMPLE = re.compile(r"[\"'`]|\$\(|[^\S \t\f\r\n]")
+
+TOKEN = re.compile(r"[;|&]|[^;|&\s]+")
+
+# Characters that end a redirection target written without a space,
+# such as `<file` (REDIR_IN_NOSPACE / REDIR_OUT_NOSPACE in the grammar).
+REDIRECTION_STOP = re.compile(r"[<>&]")
+
+REDIRECTION_KINDS = {"<": Redirection.INPUT, ">": Redirection.OUTPUT}
+
+
+def parse_simple(line: str) -> Optional[Sequence]:
+    """
+    Parse a simple command line without Lark.
+
+    Args:
+        line (str): The shell command string.
+
+    Returns:
+        Sequence: The AST, or None if the line needs the full parser
+        (including lines that are syntax errors).
+    """
+    if NOT_SIMPLE.search(line):
+        return None
+
+    statements = []
+    commands = []
+    items = []
+    tokens = TOKEN.findall(line)
+    i = 0
+    while i < len(tokens):
+        token = tokens[i]
+        i += 1
+        if token == "|" or token == ";" or token == BACKGROUND:
+            commands.append(build_call(items))
+            items = []
+            if token != "|":
+                statements.append(Pipeline(commands))
+                commands = []
+                if token == BACKGROUND:
+                    statements.append(BACKGROUND)
+        elif token == ")":
+            return None
+        elif token[0] in REDIRECTION_KINDS:
+            kind = REDIRECTION_KINDS[token[0]]
+            target = token[1:]
+            if not target:
+                if i == len(tokens):
+                    return None
+                target = tokens[i]
+                i += 1
+                if target in ("|", ";", BACKGROUND, ")") or target[0] in "<>":
+                    return None
+            elif REDIRECTION_STOP.search(target):
+                return None
+            items.append(Redirection(kind, target))
+        else:
+            items.append(word_arg(token))
+
+    commands.append(build_call(items))
+    statements.append(Pipeline(commands))
+    try:
+        return build_sequence(statements)
+    except ValueError:
+        return None
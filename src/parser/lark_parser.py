@@ -0,0 +1,292 @@
+"""
+Lark-based parser for PKU Shell.
+
+Parses any shell command string into an abstract syntax tree (AST).
+Lines handled by the fast path (parser.fastpath) never import this
+module, so Lark is only loaded when it is needed.
+
+Two parser modes are available, selected with the PKU_SHELL_PARSER
+environment variable:
+- "lalr" (default): LALR(1) parser built from grammar_lalr.lark. Its
+  parse tables are cached on disk, in a directory private to the user,
+  and reused while the grammar is unchanged. The AST is built while
+  parsing, without a parse tree. `SubstitutionPostLex` reads `)` and
+  `$(` that do not delimit a substitution as text, like Earley.
+- "earley": Earley parser built from grammar.lark. Its parse tree is
+  transformed into the AST afterwards.
+"""
+
+from lark import Lark, Transformer, Tree, Token
+from lark.exceptions import UnexpectedInput, VisitError
+import os
+import threading
+from parser.builder import build_call, build_sequence, word_arg
+from parser.cache import is_private
+from parser.nodes import (
+    Arg, Pipeline, Redirection, Substitution
+)
+from parser.parser import PARSER_MODE
+
+GRAMMAR_DIR = os.path.dirname(__file__)
+GRAMMAR_FILE = os.path.join(GRAMMAR_DIR, "grammar.lark")
+LALR_GRAMMAR_FILE = os.path.join(GRAMMAR_DIR, "grammar_lalr.lark")
+
+
+def default_cache_file():
+    """
+    Return the default path of the LALR table cache.
+
+    The cache is kept in `$XDG_CACHE_HOME/pku_shell` (`~/.cache/pku_shell`
+    by default), a directory created with mode 0700.
+
+    Returns:
+        Optional[str]: The path, or None if that directory cannot be
+        created or is not private to the current user.
+    """
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(
+        os.path.expanduser("~"), ".cache"
+    )
+    directory = os.path.join(base, "pku_shell")
+    try:
+        os.makedirs(directory, mode=0o700, exist_ok=True)
+        if not is_private(directory):
+            return None
+    except OSError:
+        return None
+    return os.path.join(directory, "lalr.cache")
+
+
+PARSER_CACHE_FILE = os.environ.get(
+    "PKU_SHELL_PARSER_CACHE", default_cache_file()
+)
+
+
+class ASTBuilder(Transformer):
+    """Lark transformer to convert parse tree into typed AST nodes
+    (see parser.nodes). The LALR parser runs it inline while parsing.
+    """
+
+    def start(self, children):
+        return children[0]
+
+    def statement_list(self, items):
+        """Build a Sequence node (see parser.builder.build_sequence)."""
+        return build_sequence(items)
+
+    def pipeline(self, commands):
+        return Pipeline(commands)
+
+    def statement(self, pipelines):
+        return pipelines[0]
+
+    def command(self, args_and_redirs):
+        """Build a Call node (see parser.builder.build_call)."""
+        return build_call(
+            self.word(item) if isinstance(item, Token) else item
+            for item in args_and_redirs
+        )
+
+    def word(self, token):
+        """
+        Build the argument for an unquoted or single-quoted word.
+
+        Terminal callbacks only run in `transform`; during inline LALR
+        parsing, single-quoted words reach `command` as tokens.
+        """
+        if token.type == "QUOTED_SINGLE":
+            return self.QUOTED_SINGLE(token)
+        return word_arg(str(token))
+
+    def substitution(self, children):
+        return Substitution(children[0])
+
+    def substitution_backtick(self, children):
+        return Substitution(children[0], backtick=True)
+
+    def QUOTED_SINGLE(self, token):
+        literal = token[1:-1]
+        return Arg(bytes(literal, "utf-8").decode("unicode_escape"))
+
+    def quoted_double(self, children):
+        """Handle content inside double quotes with substitution merging."""
+        final = []
+
+        for child in children:
+            if isinstance(child, Substitution):
+                final.append(child)
+            elif isinstance(child, Arg):
+                final.append(str(child.value))
+            else:
+                final.append(str(child))
+
+        if all(isinstance(p, str) for p in final):
+            return Arg("".join(final))
+        else:
+            return Arg(tuple(final))
+
+    def input_redirection(self, children):
+        return Redirection(Redirection.INPUT, str(children[0]))
+
+    def output_redirection(self, children):
+        return Redirection(Redirection.OUTPUT, str(children[0]))
+
+    def input_redirection_nospace(self, children):
+        val = str(children[0])
+        return Redirection(Redirection.INPUT, val[1:])
+
+    def output_redirection_nospace(self, children):
+        val = str(children[0])
+        return Redirection(Redirection.OUTPUT, val[1:])
+
+
+class SubstitutionPostLex:
+    """
+    Post-lexer of the LALR parser that reads `)` and `$(` as text when
+    they do not delimit a substitution, as the Earley parser does.
+
+    LALR merges the parser states of commands inside and outside `$(...)`,
+    so the contextual lexer expects `)` after any argument and lexes a
+    lone `)` as RPAR. Here a `)` that closes no `$(` becomes TEXT again.
+    Whether a `$(` is closed is only known later in the line, so `parse`
+    parses a line again with the first `$(` left open as TEXT, until the
+    line parses or no `$(` is left open.
+    """
+
+    always_accept = ()
+
+    def __init__(self):
+        # Per thread: start positions of the "$(" read as text in the
+        # current parse, and of the "$(" it has left open
+        self._state = threading.local()
+
+    def process(self, stream):
+        """Retype the `)` and `$(` tokens of a stream that are text."""
+        state = self._state
+        as_text = getattr(state, "as_text", ())
+        opened = state.opened = []
+        for token in stream:
+            if token.type == "_SUBSTITUTION":
+                if token.start_pos in as_text:
+                    token = Token.new_borrow_pos("TEXT", token, token)
+                else:
+                    opened.append(token.start_pos)
+            elif token.type == "RPAR":
+                if opened:
+                    opened.pop()
+                else:
+                    token = Token.new_borrow_pos("TEXT", token, token)
+            yield token
+
+    def parse(self, parser, line):
+        """
+        Parse a line, reading `$(` that are never closed as text.
+
+        Args:
+            parser (Lark): LALR parser using this post-lexer.
+            line (str): The shell command string.
+
+        Returns:
+            The AST, or the parse tree if the parser does not build it.
+
+        Raises:
+            lark.exceptions.UnexpectedInput: The error of the first
+                parse, if the line is not valid syntax.
+        """
+        state = self._state
+        state.as_text = set()
+        try:
+            try:
+                return parser.parse(line)
+            except UnexpectedInput as error:
+                while state.opened:
+                    state.as_text.add(state.opened[0])
+                    try:
+                        return parser.parse(line)
+                    except UnexpectedInput:
+                        pass
+                raise error
+        finally:
+            state.as_text = ()
+
+
+def build_parser(
+    mode=PARSER_MODE,
+    cache_file=PARSER_CACHE_FILE,
+    inline=True
+):
+    """
+    Build the Lark parser for the given mode.
+
+    In "lalr" mode the compiled parse tables are stored in `cache_file`.
+    Lark keeps a hash of the grammar and options at the top of that file
+    and rebuilds the tables when it no longer matches. An existing cache
+    file that is not private to the current user (see `is_private`) is
+    neither read nor written.
+
+    With `inline`, the LALR parser calls ASTBuilder as it reduces each
+    rule, so `parse` returns the AST and no parse tree is built. The
+    Earley parser always returns a parse tree; use `parse_to_ast` to get
+    the AST from either kind of parser.
+
+    Args:
+        mode (str): Either "lalr" or "earley".
+        cache_file (str, optional): Path of the LALR table cache,
+            or None to disable caching.
+        inline (bool): Build the AST during LALR parsing.
+
+    Returns:
+        Lark: The configured parser.
+
+    Raises:
+        ValueError: If the mode is unknown.
+    """
+    if mode == "lalr":
+        with open(LALR_GRAMMAR_FILE, "r") as f:
+            grammar = f.read()
+        if cache_file and os.path.lexists(cache_file):
+            if not is_private(cache_file):
+                cache_file = None
+        return Lark(
+            grammar,
+            start="start",
+            parser="lalr",
+            cache=cache_file or False,
+            postlex=SubstitutionPostLex(),
+            transformer=ASTBuilder() if inline else None
+        )
+    if mode == "earley":
+        with open(GRAMMAR_FILE, "r") as f:
+            grammar = f.read()
+        return Lark(grammar, start="start")
+    raise ValueError(f"Unknown parser mode: {mode}")
+
+
+shell_parser = build_parser()
+
+
+def parse_to_ast(parser, line):
+    """
+    Parse a line with a parser from `build_parser` and return its AST.
+
+    Args:
+        parser (Lark): The parser.
+        line (str): The shell command string.
+
+    Returns:
+        Sequence: The abstract syntax tree.
+
+    Raises:
+        lark.exceptions.LarkError: If the line is not valid syntax.
+        ValueError: If `&` does not follow a command.
+    """
+    postlex = parser.options.postlex
+    if postlex is not None:
+        result = postlex.parse(parser, line)
+    else:
+        result = parser.parse(line)
+    if isinstance(result, Tree):
+        try:
+            result = ASTBuilder().transform(result)
+        except VisitError as e:
+            raise e.orig_exc
+    return result
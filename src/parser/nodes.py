@@ -0,0 +1,148 @@
+"""
+Typed AST nodes for PKU Shell.
+
+The parser builds these compact, immutable nodes instead of nested dicts.
+Every node class declares `__slots__`, child collections are tuples and
+literal words are interned, so large scripts stay small in memory and the
+executor can dispatch on the node class instead of on a "type" key.
+"""
+
+import sys
+from typing import Tuple, Union
+
+
+class Node:
+    """
+    Base class for AST nodes.
+
+    Nodes are immutable: attributes are set once in `__init__` and any
+    later assignment raises AttributeError. Two nodes are equal when they
+    have the same class and equal fields.
+    """
+
+    __slots__ = ()
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{type(self).__name__} nodes are immutable")
+
+    def __delattr__(self, name):
+        raise AttributeError(f"{type(self).__name__} nodes are immutable")
+
+    def fields(self) -> tuple:
+        """Return the field values of the node in declaration order."""
+        return tuple(getattr(self, name) for name in self.__slots__)
+
+    def __eq__(self, other):
+        return type(self) is type(other) and self.fields() == other.fields()
+
+    def __hash__(self):
+        return hash((type(self), self.fields()))
+
+    def __reduce__(self):
+        # Rebuild through __init__, as pickle cannot set the slots directly
+        return type(self), self.fields()
+
+    def __repr__(self):
+        args = ", ".join(
+            f"{name}={getattr(self, name)!r}" for name in self.__slots__
+        )
+        return f"{type(self).__name__}({args})"
+
+
+class Substitution(Node):
+    """Command substitution: `$(...)` or backquotes."""
+
+    __slots__ = ("command", "backtick")
+
+    def __init__(self, command: "Sequence", backtick: bool = False):
+        object.__setattr__(self, "command", command)
+        object.__setattr__(self, "backtick", backtick)
+
+
+class Arg(Node):
+    """
+    A command argument.
+
+    The value is one of:
+    - str: a literal word (`glob` is True for unexpanded glob patterns);
+    - tuple: parts of a double-quoted string (str or Substitution);
+    - Arg or Substitution: a nested argument.
+    """
+
+    __slots__ = ("value", "glob")
+
+    def __init__(self, value, glob: bool = False):
+        if type(value) is str:
+            value = sys.intern(value)
+        object.__setattr__(self, "value", value)
+        object.__setattr__(self, "glob", glob)
+
+
+class Redirection(Node):
+    """Input (`<`) or output (`>`) redirection of a command."""
+
+    __slots__ = ("kind", "file")
+
+    INPUT = "<"
+    OUTPUT = ">"
+
+    def __init__(self, kind: str, file: str):
+        object.__setattr__(self, "kind", kind)
+        object.__setattr__(self, "file", sys.intern(file))
+
+
+class Call(Node):
+    """A single command: its arguments and redirections."""
+
+    __slots__ = ("args", "redirections")
+
+    def __init__(
+        self,
+        args: Tuple[Union[Arg, Substitution], ...] = (),
+        redirections: Tuple[Redirection, ...] = ()
+    ):
+        object.__setattr__(self, "args", tuple(args))
+        object.__setattr__(self, "redirections", tuple(redirections))
+
+
+class Pipeline(Node):
+    """Commands connected with `|`."""
+
+    __slots__ = ("commands",)
+
+    def __init__(self, commands: Tuple[Call, ...]):
+        object.__setattr__(self, "commands", tuple(commands))
+
+
+class Sequence(Node):
+    """Statements separated by `;`, executed in order."""
+
+    __slots__ = ("statements",)
+
+    def __init__(self, statements: Tuple[Node, ...]):
+        object.__setattr__(self, "statements", tuple(statements))
+
+
+class Background(Node):
+    """A pipeline followed by `&`, run as a background job."""
+
+    __slots__ = ("command",)
+
+    def __init__(self, command: Pipeline):
+        object.__setattr__(self, "command", command)
+
+
+class Fused(Node):
+    """
+    Consecutive pipeline stages replaced by one fused operator.
+
+    Only built by the pipeline optimizer (see executor.optimizer);
+    `operator` names the operator in executor.fused and `commands` are
+    the calls it replaces.
+    """
+
+    __slots__ = ("operator", "commands")
+
+    def __init__(self, operator: str, commands: Tuple[Call, ...]):
+        object.__setattr__(self, "operator", operator)
+        object.__setattr__(self, "commands", tuple(commands))
@@ -0,0 +1,153 @@
+"""
+Compiled script cache for PKU Shell.
+
+`sh --compile script` parses a script once and stores the AST of every
+top-level statement in a cache file next to it (`script` + "c", like
+.py and .pyc). Later runs of the script load the ASTs from that file
+instead of parsing again, as long as the script's mtime and size are
+unchanged, and so are the grammars and the modules defining and
+building the AST nodes: their hash is stored with the ASTs, so caches
+written by another version of the shell are not unpickled. A cache is
+only loaded if it and its directory are private to the current user
+(see parser.cache.is_private), as unpickling a file other users could
+write would let them run code in the shell; otherwise the script is
+parsed.
+
+The cache holds the ASTs exactly as the parser builds them: glob
+patterns are only marked, and are still expanded when the script runs.
+Statements are stored in pickled batches of BATCH_SIZE, so a compiled
+script is loaded and executed incrementally, like its source.
+"""
+
+import os
+import pickle
+import hashlib
+from functools import lru_cache
+from typing import Iterator, Optional, Tuple
+from parser.cache import is_private
+from parser.nodes import Sequence
+from parser.parser import PARSER_MODE, parse_shell_command
+from parser.script import iter_statements
+
+COMPILED_SUFFIX = "c"
+MAGIC = "pku-shell-compiled"
+FORMAT_VERSION = 3
+BATCH_SIZE = 64
+# Files the ASTs depend on, in the parser package
+AST_SOURCES = ("grammar.lark", "grammar_lalr.lark", "nodes.py", "builder.py")
+
+CompiledStatement = Tuple[str, Optional[Sequence]]
+
+
+def compiled_path(script_path: str) -> str:
+    """Return the path of the compiled cache of a script."""
+    return script_path + COMPILED_SUFFIX
+
+
+@lru_cache(maxsize=None)
+def ast_version() -> str:
+    """
+    Return a hash of the grammars and of the AST node modules.
+
+    Returns:
+        str: SHA-256 of the files in AST_SOURCES, in hex.
+    """
+    digest = hashlib.sha256()
+    directory = os.path.dirname(os.path.abspath(__file__))
+    for name in AST_SOURCES:
+        with open(os.path.join(directory, name), "rb") as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+def _header(script_path: str) -> tuple:
+    """Return the header identifying the current version of a script."""
+    stat = os.stat(script_path)
+    return (MAGIC, FORMAT_VERSION, PARSER_MODE, ast_version(),
+            stat.st_mtime_ns, stat.st_size)
+
+
+def compile_script(script_path: str) -> str:
+    """
+    Parse a script and write its compiled cache.
+
+    Statements that fail to parse are stored without an AST, so that
+    they report the same error when the compiled script runs.
+
+    Args:
+        script_path (str): Path of the script.
+
+    Returns:
+        str: Path of the written cache file.
+
+    Raises:
+        OSError: If the script cannot be read or the cache written.
+    """
+    cache_path = compiled_path(script_path)
+    tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+    try:
+        with open(script_path, "r") as script, open(tmp_path, "wb") as f:
+            pickle.dump(_header(script_path), f, pickle.HIGHEST_PROTOCOL)
+            batch = []
+            for statement in iter_statements(script):
+                try:
+                    ast = parse_shell_command(statement)
+                except Exception:
+                    ast = None
+                batch.append((statement, ast))
+                if len(batch) == BATCH_SIZE:
+                    pickle.dump(batch, f, pickle.HIGHEST_PROTOCOL)
+                    batch = []
+            if batch:
+                pickle.dump(batch, f, pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, cache_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return cache_path
+
+
+def load_compiled(
+    script_path: str
+) -> Optional[Iterator[CompiledStatement]]:
+    """
+    Open the compiled cache of a script if it is up to date.
+
+    Args:
+        script_path (str): Path of the script.
+
+    Returns:
+        Iterator of (statement text, AST or None) pairs, read lazily
+        from the cache, or None if there is no valid cache for the
+        script in its current version, or it is not private.
+    """
+    cache_path = compiled_path(script_path)
+    try:
+        # In a private directory, the file cannot be replaced once checked
+        if not (is_private(os.path.dirname(os.path.abspath(cache_path)))
+                and is_private(cache_path)):
+            return None
+        f = open(cache_path, "rb")
+    except OSError:
+        return None
+    try:
+        header = pickle.load(f)
+        valid = header == _header(script_path)
+    except Exception:
+        valid = False
+    if not valid:
+        f.close()
+        return None
+    return _read_statements(f)
+
+
+def _read_statements(f) -> Iterator[CompiledStatement]:
+    """Yield the compiled statements of an open cache file."""
+    with f:
+        while True:
+            try:
+                batch = pickle.load(f)
+            except EOFError:
+                return
+            yield from batch
@@ -0,0 +1,93 @@
+"""
+Streaming script reader for PKU Shell.
+
+Splits a script into top-level statements while reading it in fixed-size
+chunks, so a script of any length can be parsed and executed one
+statement at a time. Only the statement being scanned and one chunk are
+kept in memory.
+
+A top-level statement ends at a `;` or a newline that is outside quotes,
+backquotes and `$(...)`. Everything else, including newlines inside
+quotes and `;` inside substitutions, stays part of the statement and is
+handled by the parser as usual.
+"""
+
+import re
+from typing import Iterator, TextIO
+
+CHUNK_SIZE = 64 * 1024
+
+TOP, SUBSTITUTION, BACKTICK, DOUBLE, SINGLE = range(5)
+
+# Characters that can change the scanner state, per context. A `$` at the
+# end of the buffer may be the start of a `$(` split across two chunks.
+SPECIAL = {
+    TOP: re.compile(r"[;\n'\"`]|\$\(|\$\Z"),
+    SUBSTITUTION: re.compile(r"[)'\"`]|\$\(|\$\Z"),
+    BACKTICK: re.compile(r"[`'\"]|\$\(|\$\Z"),
+    DOUBLE: re.compile(r"[\"`]|\$\(|\$\Z"),
+    SINGLE: re.compile(r"'"),
+}
+
+CLOSES = {SUBSTITUTION: ")", BACKTICK: "`", DOUBLE: "\"", SINGLE: "'"}
+OPENS = {"$(": SUBSTITUTION, "`": BACKTICK, "\"": DOUBLE, "'": SINGLE}
+
+
+def iter_statements(
+    stream: TextIO,
+    chunk_size: int = CHUNK_SIZE
+) -> Iterator[str]:
+    """
+    Lazily split a script into top-level statements.
+
+    Blank statements are skipped. An unterminated quote or substitution
+    makes the rest of the script one statement, which the parser then
+    rejects.
+
+    Args:
+        stream (TextIO): The script, read with `stream.read(chunk_size)`.
+        chunk_size (int): Number of characters read at a time.
+
+    Yields:
+        str: The text of each statement, without its terminator.
+    """
+    stack = []
+    buf = ""
+    start = pos = 0
+    eof = False
+
+    while not eof:
+        chunk = stream.read(chunk_size)
+        eof = not chunk
+        buf = buf[start:] + chunk
+        pos -= start
+        start = 0
+
+        while True:
+            context = stack[-1] if stack else TOP
+            match = SPECIAL[context].search(buf, pos)
+            if match is None:
+                pos = len(buf)
+                break
+            token = match.group()
+            if token == "$":
+                if not eof:
+                    # Wait for the next chunk to see if `(` follows
+                    pos = match.start()
+                    break
+                pos = len(buf)
+                break
+            pos = match.end()
+            if context == TOP and token in ";\n":
+                statement = buf[start:match.start()]
+                start = pos
+                if statement.strip():
+                    yield statement
+            elif context != TOP and token == CLOSES[context]:
+                stack.pop()
+            else:
+                stack.append(OPENS[token])
+
+    statement = buf[start:]
+    if statement.strip():
+        yield statement
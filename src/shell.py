@@ -2,66 +2,236 @@
 Main shell entry point for PKU Shell.
 
 Parses and evaluates command lines using custom parser, executor,
-and application loader. Supports both interactive and non-interactive modes.
+and application loader. Supports interactive mode, single commands
+(`-c`) and script files, which are run one statement at a time.
+With `--trace FILE`, the spans of the run are written to FILE (see
+executor.tracing).
+
+Pipelines are optimized (see executor.optimizer) between parsing and
+execution.
+
+The output of command lines run from the command line, scripts and the
+REPL is written as it is produced, through an output sink (see
+executor.output); `eval` also accepts a deque collecting it.
+
+Each session keeps its own working directory and background jobs: the
+process working directory is never changed, so independent sessions can
+evaluate commands at the same time on threads of one process.
 """
 
 import sys
-import os
 import io
-from collections import deque
 from parser.parser import parse_shell_command
+from parser.precompile import compile_script, load_compiled
+from parser.script import iter_statements
+from apps.files import FileAccess
 from apps.loader import load_all_apps
+from executor import optimizer, tracing
+from executor.buffers import MemoryBudget
 from executor.executor import execute_ast, ExecutionContext
+from executor.globbing import DirectoryCache
+from executor.jobs import JobTable
+from executor.output import OutputSink
 
 
 load_all_apps()
 
+# Directory listings used for glob expansion by commands evaluated
+# without a session
+session_dir_cache = DirectoryCache()
+
+
+class Session:
+    """
+    State of one shell session kept between command lines: the working
+    directory, through which apps access files, the directory listings
+    used for glob expansion, the background jobs and the memory budget
+    of pipeline buffers, which counts their spills to disk.
+    """
+
+    __slots__ = ("files", "dir_cache", "jobs", "budget")
+
+    def __init__(self, working_dir=None, dir_cache=None):
+        """
+        Start a session.
+
+        Args:
+            working_dir (str, optional): Absolute working directory;
+                defaults to the process working directory.
+            dir_cache (DirectoryCache, optional): Cache of directory
+                listings; a new one by default.
+        """
+        self.files = FileAccess(working_dir)
+        self.dir_cache = dir_cache or DirectoryCache()
+        self.jobs = JobTable()
+        self.budget = MemoryBudget()
+
 
-def eval(cmdline, out, stdin=None):
+def eval(cmdline, out, stdin=None, ast=None, session=None):
     """
     Evaluate a shell command line.
 
     Args:
         cmdline (str): The command line input to evaluate.
-        out (deque): Output deque to store result lines.
+        out (deque): Output deque to store result lines, or an
+            OutputSink writing them as they are produced.
         stdin (str, optional): Simulated input (for piping or redirection).
+        ast (Sequence, optional): AST of cmdline if it is already parsed
+            (e.g. loaded from a compiled script).
+        session (Session, optional): Session the command line runs in,
+            whose working directory `cd` changes and which keeps its
+            background jobs. By default, a new session in the process
+            working directory, whose jobs are waited for at the end.
 
     Handles parsing, execution, and contextual stdin setup.
     Clears output for pipeline or semicolon errors.
-    Appends error messages otherwise.
+    Appends error messages otherwise, in place of the output of the
+    command line. A sink only discards the output it has not written
+    yet.
     """
     try:
-        ast = parse_shell_command(cmdline)
-        context = ExecutionContext()
+        if ast is None:
+            ast = tracing.traced(
+                "parse", "shell", parse_shell_command, cmdline
+            )
+        if optimizer.ENABLED:
+            ast = tracing.traced("optimize", "shell", optimizer.optimize, ast)
+        owned = session is None
+        if owned:
+            session = Session(dir_cache=session_dir_cache)
+        context = ExecutionContext(
+            session.dir_cache, files=session.files, jobs=session.jobs,
+            budget=session.budget
+        )
 
         if stdin:
             context.stdin = io.StringIO(stdin)
 
         execute_ast(ast, out, context)
+        if owned:
+            finish_jobs(session, out)
 
     except Exception as e:
         if "|" in cmdline or ";" in cmdline:
             out.clear()
         else:
+            if isinstance(out, OutputSink):
+                # A deque only gets the output of a command once it has
+                # succeeded; a sink gets it as the command runs
+                out.clear()
             out.append(f"Error: {e}\n")
 
 
-if __name__ == "__main__":
-    args_num = len(sys.argv) - 1
-    if args_num > 0:
-        if args_num != 2 or sys.argv[1] != "-c":
-            raise ValueError("Usage: python shell.py -c \"command\"")
+def finish_jobs(session, out):
+    """
+    Wait for the background jobs left in a session and collect their
+    output, in job order.
+
+    Args:
+        session (Session): The session.
+        out (deque): Output deque or sink the jobs' output is
+            appended to.
+    """
+    if len(session.jobs):
+        out.append(session.jobs.wait())
+
 
-        out = deque()
-        eval(sys.argv[2], out)
-        while out:
-            print(out.popleft(), end="")
+def run_script(script, stdout=None, session=None):
+    """
+    Run a script one top-level statement at a time.
+
+    The script is read incrementally (see parser.script), and each
+    statement is parsed, executed and its output written before the
+    next one is read, so memory use does not grow with the script size.
+
+    Args:
+        script (TextIO): The script to run.
+        stdout (IO, optional): Text or binary stream the output is
+            written to (sys.stdout.buffer by default).
+        session (Session, optional): Session the script runs in (a new
+            one by default).
+    """
+    run_compiled(
+        ((statement, None) for statement in iter_statements(script)),
+        stdout, session
+    )
+
+
+def run_compiled(statements, stdout=None, session=None):
+    """
+    Run the statements of a compiled script (see parser.precompile).
+
+    Statements without an AST are parsed before they run. The output
+    of each statement is written as it is produced.
+
+    Args:
+        statements: Iterable of (statement text, AST or None) pairs.
+        stdout (IO, optional): Text or binary stream the output is
+            written to (sys.stdout.buffer by default).
+        session (Session, optional): Session the script runs in (a new
+            one by default).
+    """
+    out = OutputSink(sys.stdout.buffer if stdout is None else stdout)
+    owned = session is None
+    if owned:
+        session = Session(dir_cache=session_dir_cache)
+    for statement, ast in statements:
+        eval(statement, out, ast=ast, session=session)
+        # A failing statement only clears its own output
+        out.flush()
+    if owned:
+        finish_jobs(session, out)
+        out.flush()
+
+
+def main(argv):
+    """
+    Run the shell with command-line arguments.
+
+    Args:
+        argv (List[str]): Arguments after the program name.
+    """
+    args_num = len(argv)
+    if args_num == 2 and argv[0] == "--compile":
+        compile_script(argv[1])
+
+    elif args_num == 1 and argv[0] != "-c":
+        compiled = load_compiled(argv[0])
+        if compiled is not None:
+            run_compiled(compiled)
+        else:
+            with open(argv[0], "r") as script:
+                run_script(script)
+
+    elif args_num > 0:
+        if args_num != 2 or argv[0] != "-c":
+            raise ValueError(
+                "Usage: python shell.py [--trace FILE] "
+                "[-c \"command\" | script | --compile script]"
+            )
+
+        out = OutputSink(sys.stdout.buffer)
+        eval(argv[1], out)
+        out.flush()
 
     else:
+        session = Session(dir_cache=session_dir_cache)
+        out = OutputSink(sys.stdout.buffer)
         while True:
-            print(os.getcwd() + "> ", end="")
+            print(session.files.cwd + "> ", end="")
             cmdline = input()
-            out = deque()
-            eval(cmdline, out)
-            while out:
-                print(out.popleft(), end="")
+            eval(cmdline, out, session=session)
+            out.flush()
+
+
+if __name__ == "__main__":
+    argv = sys.argv[1:]
+    if len(argv) >= 2 and argv[0] == "--trace":
+        trace_file, argv = argv[1], argv[2:]
+        tracing.start()
+        try:
+            main(argv)
+        finally:
+            tracing.stop().write(trace_file)
+    else:
+        main(argv)
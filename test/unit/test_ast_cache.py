@@ -0,0 +1,96 @@
+"""
+Unit tests for the AST cache in PKU Shell.
+
+Covers hit/miss counting, LRU eviction, resizing, immutability of
+cached entries, concurrent use and repeated evaluation through the
+shell.
+"""
+
+import unittest
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from parser.cache import ASTCache
+from parser.parser import ast_cache, parse_shell_command
+from shell import eval
+
+
+class TestASTCache(unittest.TestCase):
+    def setUp(self):
+        """Start every test with an empty shared cache."""
+        self.saved_size = ast_cache.maxsize
+        ast_cache.clear()
+
+    def tearDown(self):
+        """Restore the shared cache size."""
+        ast_cache.resize(self.saved_size)
+        ast_cache.clear()
+
+    def test_hits_and_misses(self):
+        """Test that repeated lines are served from the cache."""
+        parse_shell_command("echo foo")
+        parse_shell_command("echo foo")
+        parse_shell_command("echo bar")
+        info = ast_cache.info()
+        self.assertEqual((info.hits, info.misses, info.currsize), (1, 2, 2))
+
+    def test_lru_eviction(self):
+        """Test that the least recently used line is evicted."""
+        cache = ASTCache(maxsize=2)
+        cache.put("a", {"type": "statement_list", "statements": []})
+        cache.put("b", {"type": "statement_list", "statements": []})
+        cache.get("a")
+        cache.put("c", {"type": "statement_list", "statements": []})
+        self.assertIsNotNone(cache.get("a"))
+        self.assertIsNone(cache.get("b"))
+        self.assertIsNotNone(cache.get("c"))
+
+    def test_resize_and_disable(self):
+        """Test shrinking the cache and disabling it with size 0."""
+        cache = ASTCache(maxsize=4)
+        for line in "abcd":
+            cache.put(line, {})
+        cache.resize(1)
+        self.assertEqual(cache.info().currsize, 1)
+        cache.resize(0)
+        cache.put("e", {})
+        self.assertIsNone(cache.get("e"))
+        with self.assertRaises(ValueError):
+            cache.resize(-1)
+
+    def test_entries_are_immutable(self):
+        """Test that cached ASTs cannot be modified."""
+        cache = ASTCache()
+        frozen = cache.put("x", {"type": "command", "args": [{"value": "x"}]})
+        with self.assertRaises(TypeError):
+            frozen["type"] = "pipeline"
+        with self.assertRaises(TypeError):
+            frozen["args"][0]["value"] = "y"
+
+    def test_repeated_eval(self):
+        """Test that evaluating a cached line gives the same output."""
+        for _ in range(3):
+            out = deque()
+            eval("echo foo | cat", out)
+            self.assertEqual("".join(out).strip(), "foo")
+        self.assertEqual(ast_cache.info().hits, 2)
+
+    def test_concurrent_use(self):
+        """Test that threads evicting each other's lines lose nothing."""
+        cache = ASTCache(maxsize=4)
+        ast = {"type": "statement_list", "statements": []}
+
+        def use(thread):
+            for i in range(2000):
+                line = f"echo {(thread + i) % 8}"
+                if cache.get(line) is None:
+                    cache.put(line, ast)
+
+        with ThreadPoolExecutor(max_workers=4) as threads:
+            list(threads.map(use, range(4)))
+        info = cache.info()
+        self.assertEqual(info.hits + info.misses, 8000)
+        self.assertEqual(info.currsize, 4)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,225 @@
+"""
+Unit tests for the buffers between buffered pipeline stages in PKU Shell.
+
+Tests include that written strings are read back without being copied,
+partial reads, lines, positions, closed buffers, spilling to temporary
+files past the spill size or the memory budget, counting spills from
+several threads, and buffered pipelines using the buffers.
+"""
+
+import io
+import os
+import random
+import tempfile
+import unittest
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import executor.buffers as buffers
+import executor.executor as executor
+from executor.buffers import ChunkBuffer, MemoryBudget
+from shell import Session, eval
+
+
+class TestChunkBuffer(unittest.TestCase):
+    def make(self, *chunks, spill_size=None):
+        """Return a buffer holding chunks."""
+        buffer = ChunkBuffer(spill_size=spill_size)
+        for chunk in chunks:
+            buffer.write(chunk)
+        return buffer
+
+    def test_read_by_reference(self):
+        """Test that a single written string is read back uncopied."""
+        text = "".join(f"line {i}\n" for i in range(1000))
+        buffer = self.make(text)
+        self.assertIs(buffer.read(), text)
+        self.assertEqual(buffer.read(), "")
+
+    def test_read_chunks(self):
+        """Test reads of any size across chunks, like StringIO."""
+        random.seed(0)
+        for _ in range(500):
+            chunks = [
+                "ab\ncd\n\n"[:random.randint(0, 7)]
+                for _ in range(random.randint(0, 4))
+            ]
+            buffer = self.make(*chunks)
+            expected = io.StringIO("".join(chunks))
+            for size in random.choices([-1, 0, 1, 2, 5], k=4):
+                self.assertEqual(buffer.read(size), expected.read(size))
+
+    def test_lines(self):
+        """Test reading lines across chunks."""
+        buffer = self.make("a\nb", "c", "\n\nd")
+        self.assertEqual(buffer.readline(2), "a\n")
+        self.assertEqual(list(buffer), ["bc\n", "\n", "d"])
+        self.assertEqual(buffer.readline(), "")
+
+    def test_closed(self):
+        """Test that a closed buffer, in memory or spilled, is unusable."""
+        for spill_size in [None, 2]:
+            with self.subTest(spill_size=spill_size):
+                buffer = self.make("a\n", "b\n", spill_size=spill_size)
+                buffer.close()
+                for method, args in [
+                    ("read", ()), ("readline", ()), ("write", ("c",)),
+                    ("tell", ()), ("seek", (0,)), ("getvalue", ()),
+                ]:
+                    with self.assertRaises(ValueError, msg=method):
+                        getattr(buffer, method)(*args)
+
+    def test_seek(self):
+        """Test saving and restoring the read position."""
+        buffer = self.make("abc", "de")
+        buffer.read(4)
+        position = buffer.tell()
+        self.assertEqual(position, 4)
+        self.assertEqual(buffer.read(), "e")
+        buffer.seek(position)
+        self.assertEqual(buffer.read(1), "e")
+        buffer.seek(0)
+        self.assertEqual(buffer.read(), "abcde")
+        self.assertEqual(buffer.getvalue(), "abcde")
+        buffer.seek(0)
+        buffer.seek(0, io.SEEK_END)
+        self.assertEqual(buffer.read(), "")
+        buffer.close()
+        with self.assertRaises(ValueError):
+            buffer.write("x")
+
+    def test_spill(self):
+        """Test reading a buffer spilled to a file like one in memory."""
+        chunks = ["ab\n", "é\ud800", "", "c\r\nd", "\n\n"]
+        text = "".join(chunks)
+        for spill_size in [0, 3, 6, 100]:
+            with self.subTest(spill_size=spill_size):
+                buffer = self.make(*chunks, spill_size=spill_size)
+                self.assertEqual(buffer.spilled, spill_size < len(text))
+                self.assertEqual(buffer.readline(), "ab\n")
+                position = buffer.tell()
+                self.assertEqual(buffer.read(3), "é\ud800c")
+                buffer.seek(position)
+                buffer.write("e")
+                self.assertEqual(buffer.read(), text[3:] + "e")
+                self.assertEqual(buffer.getvalue(), text + "e")
+                buffer.close()
+
+    def test_spill_after_read(self):
+        """Test spilling what is left of a partly read buffer."""
+        buffer = self.make("abc", "de", spill_size=5)
+        self.assertEqual(buffer.read(4), "abcd")
+        buffer.write("fg")
+        self.assertTrue(buffer.spilled)
+        self.assertEqual(buffer.read(), "efg")
+
+    def test_budget(self):
+        """Test that buffers spill once the session budget is used."""
+        spills = buffers.stats["spills"]
+        budget = MemoryBudget(10)
+        first = ChunkBuffer(budget)
+        second = ChunkBuffer(budget)
+        first.write("a" * 8)
+        second.write("b" * 4)
+        self.assertFalse(first.spilled)
+        self.assertTrue(second.spilled)
+        second.write("c")
+        self.assertEqual(second.read(), "bbbbc")
+        self.assertEqual((budget.used, budget.spills, budget.spilled),
+                         (8, 1, 5))
+        self.assertEqual(buffers.stats["spills"], spills + 1)
+        first.close()
+        second.close()
+        self.assertEqual(budget.used, 0)
+        self.assertIsNone(MemoryBudget(0).limit)
+
+    def test_concurrent_spills(self):
+        """Test that spills from several threads are all counted."""
+        before = buffers.stats.copy()
+        budget = MemoryBudget()
+
+        def spill(_):
+            for _ in range(50):
+                buffer = ChunkBuffer(budget, spill_size=1)
+                buffer.write("ab")
+                buffer.write("c")
+                buffer.close()
+
+        with ThreadPoolExecutor(4) as pool:
+            list(pool.map(spill, range(4)))
+        self.assertEqual(buffers.stats["spills"], before["spills"] + 200)
+        self.assertEqual(buffers.stats["spilled"], before["spilled"] + 600)
+        self.assertEqual((budget.spills, budget.spilled), (200, 600))
+
+
+class TestBufferedPipelines(unittest.TestCase):
+    def setUp(self):
+        """Set up temporary directory with test files."""
+        self.test_dir = tempfile.TemporaryDirectory()
+        self.original_cwd = os.getcwd()
+        os.chdir(self.test_dir.name)
+        with open("a.txt", "w") as f:
+            f.write("cherry\napple\nbanana\napple\n")
+        with open("big.txt", "w") as f:
+            f.write("".join(f"{i % 997}\n" for i in range(20000)))
+        self.spill_size = buffers.SPILL_SIZE
+
+    def tearDown(self):
+        """Restore original directory and settings, and clean up."""
+        executor.STREAMING = True
+        buffers.SPILL_SIZE = self.spill_size
+        os.chdir(self.original_cwd)
+        self.test_dir.cleanup()
+
+    def test_stages(self):
+        """Test buffered pipelines of several stages."""
+        executor.STREAMING = False
+        cases = {
+            "cat a.txt | sort | uniq | head -n 2": "apple\nbanana\n",
+            "cat a.txt | cat | cat | wc -l": "4",
+            "echo x | sort | uniq": "x\n",
+            "cat a.txt | grep z | wc -l": "0",
+            "cat < a.txt | grep an > b.txt; cat b.txt": "banana",
+        }
+        for cmdline, expected in cases.items():
+            with self.subTest(cmdline=cmdline):
+                out = deque()
+                eval(cmdline, out)
+                self.assertEqual("".join(out), expected)
+
+    def test_spilled_stages(self):
+        """Test pipelines whose buffers spill against in-memory ones."""
+        cmdlines = [
+            "cat big.txt | sort | uniq | tail -n 2",
+            "cat big.txt | sort -r | grep 9 | wc",
+            "cat big.txt a.txt | _sort | head -n 3",
+            "cat a.txt | sort | cat - a.txt | uniq",
+            "cat big.txt | sort | head -n 2 > out.txt; cat out.txt",
+        ]
+        for streaming in [True, False]:
+            executor.STREAMING = streaming
+            for cmdline in cmdlines:
+                with self.subTest(cmdline=cmdline, streaming=streaming):
+                    buffers.SPILL_SIZE = self.spill_size
+                    expected = deque()
+                    eval(cmdline, expected)
+                    buffers.SPILL_SIZE = 10
+                    session = Session()
+                    out = deque()
+                    eval(cmdline, out, session=session)
+                    self.assertEqual(out, expected)
+                    self.assertGreater(session.budget.spills, 0)
+                    self.assertEqual(session.budget.used, 0)
+
+    def test_session_budget(self):
+        """Test that a session's budget makes its buffers spill."""
+        session = Session()
+        session.budget.limit = 1000
+        out = deque()
+        eval("cat big.txt | sort | uniq | wc -l", out, session=session)
+        self.assertEqual("".join(out), "997")
+        self.assertEqual(session.budget.spills, 2)
+        self.assertEqual(session.budget.used, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
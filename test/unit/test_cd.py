@@ -10,7 +10,7 @@ import unittest
 import os
 from collections import deque
 import tempfile
-from shell import eval
+from shell import Session, eval
 
 
 class TestCdApp(unittest.TestCase):
@@ -37,8 +37,22 @@ class TestCdApp(unittest.TestCase):
         """Test changing to a valid directory."""
         testdir_path = os.path.join(self.test_dir.name, "testdir")
         os.mkdir(testdir_path)
-        self.run_eval("cd testdir")
-        self.assertTrue(os.getcwd().endswith("testdir"))
+        session = Session()
+        eval("cd testdir", deque(), session=session)
+        self.assertTrue(session.files.cwd.endswith("testdir"))
+        # The process working directory is left alone
+        self.assertNotEqual(os.getcwd(), session.files.cwd)
+
+    def test_cd_persists_in_session(self):
+        """Test that later command lines run in the new directory."""
+        os.mkdir("testdir")
+        with open(os.path.join("testdir", "a.txt"), "w") as f:
+            f.write("inside\n")
+        session = Session()
+        out = deque()
+        eval("cd testdir", out, session=session)
+        eval("cat a.txt", out, session=session)
+        self.assertEqual("".join(out), "inside\n")
 
     def test_cd_safe_invalid(self):
         """Test cd with no arguments (invalid usage)."""
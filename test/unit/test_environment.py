@@ -0,0 +1,79 @@
+"""
+Unit tests for the copy-on-write environment of PKU Shell.
+
+Tests include reading through layers, isolation between copies in both
+directions, deleting variables and the contexts of pipeline stages.
+"""
+
+import unittest
+from executor.environment import Environment
+from executor.executor import ExecutionContext
+
+
+class TestEnvironment(unittest.TestCase):
+    def setUp(self):
+        """Create an environment over a small base mapping."""
+        self.base = {"HOME": "/home/a", "PATH": "/bin"}
+        self.env = Environment(self.base)
+
+    def test_reads_base(self):
+        """Test that an unchanged environment reads its base."""
+        self.assertEqual(self.env["HOME"], "/home/a")
+        self.assertEqual(dict(self.env), self.base)
+        self.assertEqual(len(self.env), 2)
+        self.assertNotIn("USER", self.env)
+        self.assertIsNone(self.env.get("USER"))
+
+    def test_writes_not_in_base(self):
+        """Test that changes are kept in the overlay."""
+        self.env["USER"] = "a"
+        self.env["HOME"] = "/tmp"
+        self.assertEqual(self.env["HOME"], "/tmp")
+        self.assertEqual(self.base, {"HOME": "/home/a", "PATH": "/bin"})
+
+    def test_copy_isolated(self):
+        """Test that a copy and its original do not see each other."""
+        self.env["A"] = "1"
+        copy = self.env.copy()
+        copy["A"] = "2"
+        self.env["B"] = "3"
+        self.assertEqual(self.env["A"], "1")
+        self.assertEqual(copy["A"], "2")
+        self.assertNotIn("B", copy)
+        self.assertEqual(copy.copy()["A"], "2")
+
+    def test_copy_shares_layers(self):
+        """Test that copying does not copy the variables."""
+        self.env["A"] = "1"
+        copy = self.env.copy()
+        self.assertIs(copy._layers[0], self.env._overlay)
+        self.assertEqual(copy._overlay, {})
+
+    def test_delete(self):
+        """Test deleting variables of the base and of other layers."""
+        self.env["A"] = "1"
+        copy = self.env.copy()
+        del copy["A"]
+        del copy["HOME"]
+        self.assertEqual(dict(copy), {"PATH": "/bin"})
+        self.assertEqual(self.env["A"], "1")
+        self.assertEqual(self.env["HOME"], "/home/a")
+        with self.assertRaises(KeyError):
+            del copy["A"]
+
+    def test_stage_context(self):
+        """Test that stage contexts share state but not the environment."""
+        context = ExecutionContext(working_dir="/")
+        context.env["A"] = "1"
+        child = context.child(stdin="in", stdout="out")
+        self.assertIs(child.dir_cache, context.dir_cache)
+        self.assertEqual(child.working_dir, "/")
+        self.assertEqual((child.stdin, child.stdout), ("in", "out"))
+        child.env["A"] = "2"
+        self.assertEqual(context.env["A"], "1")
+        with self.assertRaises(AttributeError):
+            context.unknown = 1
+
+
+if __name__ == "__main__":
+    unittest.main()
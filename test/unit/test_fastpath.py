@@ -0,0 +1,138 @@
+"""
+Unit tests for the fast-path lexer in PKU Shell.
+
+Differential tests: every line accepted by the fast path must give the
+same AST as the LALR parser. The lines are the commands used in the unit
+tests, the fuzzer's commands, and random lines over the characters the
+fast path handles.
+"""
+
+import ast
+import glob
+import os
+import random
+import subprocess
+import sys
+import unittest
+from lark.exceptions import LarkError
+from parser.fastpath import parse_simple
+from parser.lark_parser import build_parser, parse_to_ast
+
+TEST_DIR = os.path.dirname(os.path.abspath(__file__))
+SRC_DIR = os.path.join(TEST_DIR, "..", "..", "src")
+sys.path.insert(0, os.path.join(TEST_DIR, "..", "..", "tools"))
+
+import fuzz_eval  # noqa: E402
+
+SIMPLE_CHARS = "ab*?[]-./$=&()<>|; \t"
+
+
+def unit_test_lines():
+    """
+    Collect the command lines passed to eval() in the unit tests.
+
+    f-string placeholders are replaced with a file path.
+    """
+    lines = set()
+    for path in glob.glob(os.path.join(TEST_DIR, "test_*.py")):
+        with open(path) as f:
+            tree = ast.parse(f.read())
+        for node in ast.walk(tree):
+            if not (isinstance(node, ast.Call) and node.args):
+                continue
+            name = getattr(node.func, "id", getattr(node.func, "attr", ""))
+            if "eval" not in name:
+                continue
+            arg = node.args[0]
+            if isinstance(arg, ast.Constant) and isinstance(arg.value, str):
+                lines.add(arg.value)
+            elif isinstance(arg, ast.JoinedStr):
+                lines.add("".join(
+                    part.value if isinstance(part, ast.Constant)
+                    else "dir1/file1.txt"
+                    for part in arg.values
+                ))
+    return sorted(lines)
+
+
+def fuzz_lines(count=500):
+    """Generate command lines with the fuzzer's generator."""
+    random.seed(42)
+    return list(fuzz_eval.SPECIAL_PATTERNS) + [
+        fuzz_eval.random_command() for _ in range(count)
+    ]
+
+
+def simple_lines(count=2000):
+    """Generate random lines over the characters of the fast path."""
+    rng = random.Random(6)
+    return [
+        "".join(rng.choices(SIMPLE_CHARS, k=rng.randint(0, 20)))
+        for _ in range(count)
+    ]
+
+
+class TestFastPath(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.lalr = build_parser("lalr", cache_file=None)
+
+    def lark_ast(self, line):
+        """Parse a line with the LALR parser, or return None on error."""
+        try:
+            return parse_to_ast(self.lalr, line)
+        except LarkError:
+            return None
+
+    def assert_same_asts(self, lines):
+        """Check the fast path against LALR and return the lines it took."""
+        accepted = 0
+        for line in lines:
+            fast = parse_simple(line)
+            if fast is None:
+                continue
+            accepted += 1
+            with self.subTest(line=line):
+                self.assertEqual(fast, self.lark_ast(line))
+        return accepted
+
+    def test_unit_test_corpus(self):
+        """Test the command lines of the unit tests."""
+        lines = unit_test_lines()
+        self.assertGreater(self.assert_same_asts(lines), len(lines) // 2)
+
+    def test_fuzz_corpus(self):
+        """Test the lines generated by tools/fuzz_eval.py."""
+        self.assert_same_asts(fuzz_lines())
+
+    def test_random_simple_lines(self):
+        """Test random lines of words, pipes, semicolons and redirections."""
+        self.assertGreater(self.assert_same_asts(simple_lines()), 1000)
+
+    def test_complex_lines_fall_back(self):
+        """Test that quotes and substitutions are left to Lark."""
+        for line in ["echo 'a'", 'echo "a"', "echo `a`", "echo $(a)",
+                     "echo a\x0bb", "cat <", "echo )"]:
+            with self.subTest(line=line):
+                self.assertIsNone(parse_simple(line))
+
+    def test_lark_not_imported(self):
+        """Test that simple lines are parsed without importing Lark."""
+        code = (
+            "import sys\n"
+            "from parser.parser import parse_shell_command\n"
+            "parse_shell_command('grep foo file | sort | uniq > out')\n"
+            "print('lark' in sys.modules)\n"
+            "parse_shell_command('echo \"foo\"')\n"
+            "print('lark' in sys.modules)\n"
+        )
+        env = dict(os.environ, PYTHONPATH=SRC_DIR, PKU_SHELL_PARSER="lalr")
+        result = subprocess.run(
+            [sys.executable, "-c", code],
+            env=env, capture_output=True, text=True, check=True
+        )
+        self.assertEqual(result.stdout.split(), ["False", "True"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,7 +1,9 @@
 """
 Unit tests for globbing behavior in PKU Shell.
 
-Covers wildcard expansion for *.txt files in current and subdirectories.
+Covers wildcard expansion for *.txt files in current and subdirectories,
+recursive `**` patterns, expansion after `cd`, quoting, and the directory
+listing cache, also shared by several threads.
 """
 
 import unittest
@@ -9,7 +11,9 @@ import os
 from pathlib import PurePath
 from collections import deque
 import tempfile
+from concurrent.futures import ThreadPoolExecutor
 from shell import eval
+from executor.globbing import DirectoryCache, expand_glob
 
 
 class TestGlobbingApp(unittest.TestCase):
@@ -61,6 +65,88 @@ class TestGlobbingApp(unittest.TestCase):
             "dir1/longfile.txt"
         })
 
+    def test_globbing_after_cd(self):
+        """Test that globs resolve against the directory set by cd."""
+        result = self.run_eval("cd dir1; echo *.txt")
+        self.assertEqual(result, "file1.txt file2.txt longfile.txt")
+
+    def test_globbing_quoted(self):
+        """Test that quoted patterns are not expanded."""
+        self.assertEqual(self.run_eval("echo '*.txt'"), "*.txt")
+
+    def test_globbing_no_match(self):
+        """Test that a pattern without matches is passed through."""
+        self.assertEqual(self.run_eval("echo *.csv"), "*.csv")
+
+    def test_globbing_find_name(self):
+        """Test that the pattern after -name is left to find."""
+        result = self.run_eval("find dir1 -name *.txt").splitlines()
+        self.assertEqual(len(result), 3)
+
+    def test_globbing_recursive(self):
+        """Test that `**` matches files at any depth, in sorted order."""
+        os.makedirs(os.path.join("dir1", "sub", ".hidden"))
+        for path in ["dir1/sub/deep.txt", "dir1/sub/.hidden/skip.txt"]:
+            with open(path, "w") as f:
+                f.write("")
+        result = self.run_eval("echo **/*.txt").split()
+        self.assertEqual(result, [
+            "dir1/file1.txt", "dir1/file2.txt", "dir1/longfile.txt",
+            "dir1/sub/deep.txt", "test.txt",
+        ])
+        result = self.run_eval("echo dir1/**").split()
+        self.assertEqual(result, [
+            "dir1", "dir1/file1.txt", "dir1/file2.txt", "dir1/longfile.txt",
+            "dir1/sub", "dir1/sub/deep.txt",
+        ])
+
+    def test_globbing_recursive_dirs_only(self):
+        """Test that a trailing slash makes `**` match directories only."""
+        os.makedirs(os.path.join("dir1", "sub"))
+        result = self.run_eval("echo **/").split()
+        self.assertEqual(result, ["dir1", "dir1/sub"])
+
+    def test_directory_cache(self):
+        """Test that listings are reused until the directory changes."""
+        cache = DirectoryCache()
+        path = os.path.join(self.test_dir.name, "dir1")
+        old = os.stat(path).st_mtime_ns - 10 ** 10
+        os.utime(path, ns=(old, old))
+        self.assertEqual(len(list(expand_glob("*", path, cache))), 3)
+        self.assertEqual(len(list(expand_glob("f*", path, cache))), 2)
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+        with open(os.path.join(path, "file3.txt"), "w") as f:
+            f.write("new")
+        self.assertEqual(len(list(expand_glob("f*", path, cache))), 3)
+        self.assertEqual(cache.misses, 2)
+
+    def test_directory_cache_shared(self):
+        """Test that the patterns of one command share a listing."""
+        cache = DirectoryCache()
+        path = os.path.join(self.test_dir.name, "dir1")
+        old = os.stat(path).st_mtime_ns - 10 ** 10
+        os.utime(path, ns=(old, old))
+        for pattern in ["*1.txt", "*2.txt", "long*"]:
+            self.assertEqual(len(list(expand_glob(pattern, path, cache))), 1)
+        self.assertEqual((cache.hits, cache.misses), (2, 1))
+
+    def test_directory_cache_threads(self):
+        """Test that lookups from several threads are all counted."""
+        cache = DirectoryCache()
+        path = os.path.join(self.test_dir.name, "dir1")
+        old = os.stat(path).st_mtime_ns - 10 ** 10
+        os.utime(path, ns=(old, old))
+        list(expand_glob("f*", path, cache))
+
+        def expand(_):
+            for _ in range(500):
+                self.assertEqual(len(list(expand_glob("f*", path, cache))), 2)
+
+        with ThreadPoolExecutor(4) as pool:
+            list(pool.map(expand, range(4)))
+        self.assertEqual((cache.hits, cache.misses), (2000, 1))
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -2,7 +2,8 @@
 Unit tests for the `head` application in PKU Shell.
 
 Tests include default line output, custom -n line count,
-stdin support, and error handling for missing files.
+stdin support (also with -n), and error handling for missing files
+and invalid line counts.
 """
 
 import unittest
@@ -59,6 +60,27 @@ class TestHeadApp(unittest.TestCase):
         result = self.run_eval("head no_such_file.txt")
         self.assertIn("No such file", result)
 
+    def test_head_shell_n_stdin(self):
+        """Test head -n without a file, reading stdin."""
+        result = self.run_eval("head -n 2", stdin="a\nb\nc")
+        self.assertEqual(result, "a\nb")
+
+    def test_head_shell_invalid_count(self):
+        """Test the errors for an invalid number of lines."""
+        with open("file.txt", "w") as f:
+            f.write("test")
+        self.assertIn("head: wrong flags", self.run_eval("head -n x"))
+        self.assertIn("head: wrong flags", self.run_eval("head -n -1"))
+        self.assertIn(
+            "head: invalid number of lines",
+            self.run_eval("head -n x file.txt")
+        )
+        self.assertEqual(self.run_eval("_head -n x"), "head: wrong flags")
+        self.assertEqual(
+            self.run_eval("_head -n x file.txt"),
+            "head: invalid number of lines"
+        )
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,162 @@
+"""
+Unit tests for background jobs in PKU Shell.
+
+Tests include parsing the `&` operator, running jobs concurrently,
+emitting their output in job order with `wait`, listing them with
+`jobs`, and errors of jobs and of the builtins.
+"""
+
+import io
+import os
+import tempfile
+import threading
+import unittest
+from collections import deque
+from apps.base import BaseApp
+from apps.registry import AppRegistry
+from parser.fastpath import parse_simple
+from parser.nodes import Background, Pipeline
+from parser.parser import parse_with_lark
+from shell import Session, eval, run_script
+
+
+class BarrierApp(BaseApp):
+    """App that waits until two of its commands run at the same time."""
+
+    barrier = None
+
+    def run(self, args, stdin=None):
+        self.barrier.wait()
+        return f"{args[0]}\n"
+
+
+def run_shell(cmdline, session=None):
+    """Evaluate a command line and return its output."""
+    out = deque()
+    eval(cmdline, out, session=session)
+    return "".join(out)
+
+
+class TestJobs(unittest.TestCase):
+    def setUp(self):
+        """Set up temporary directory with test files."""
+        self.test_dir = tempfile.TemporaryDirectory()
+        self.original_cwd = os.getcwd()
+        os.chdir(self.test_dir.name)
+        os.mkdir("sub")
+        with open(os.path.join("sub", "a.txt"), "w") as f:
+            f.write("A\n")
+        BarrierApp.barrier = threading.Barrier(2, timeout=5)
+        AppRegistry.register("barrier", BarrierApp)
+
+    def tearDown(self):
+        """Restore original directory and clean up."""
+        AppRegistry.unregister("barrier")
+        os.chdir(self.original_cwd)
+        self.test_dir.cleanup()
+
+    def test_parse(self):
+        """Test that `&` marks the statement before it."""
+        for parse in [parse_simple, parse_with_lark]:
+            ast = parse("echo a & echo b; echo c &")
+            self.assertEqual(
+                [type(s) for s in ast.statements],
+                [Background, Pipeline, Background, Pipeline],
+            )
+            self.assertEqual(ast, parse_with_lark("echo a&echo b;echo c&"))
+
+    def test_parse_errors(self):
+        """Test that `&` must follow a command."""
+        for cmdline in ["echo a && echo b", "& echo a", "echo a; &"]:
+            with self.subTest(cmdline=cmdline):
+                self.assertIsNone(parse_simple(cmdline))
+                with self.assertRaisesRegex(ValueError, "syntax error"):
+                    parse_with_lark(cmdline)
+
+    def test_quoted_ampersand(self):
+        """Test that a quoted `&` is a literal."""
+        self.assertEqual(run_shell("echo 'a&b' \"c&d\""), "a&b c&d\n")
+
+    def test_concurrent(self):
+        """Test that jobs run at the same time, output in job order."""
+        session = Session()
+        self.assertEqual(
+            run_shell("barrier 1 & barrier 2 &", session), ""
+        )
+        self.assertEqual(run_shell("wait", session), "1\n2\n")
+
+    def test_foreground_overlaps(self):
+        """Test that a job runs while the shell goes on."""
+        self.assertEqual(
+            run_shell("barrier job & barrier foreground"),
+            "foreground\njob\n",
+        )
+
+    def test_wait_jobs(self):
+        """Test waiting for given jobs and listing the others."""
+        session = Session()
+        run_shell("echo 1 & echo 2 & echo 3 &", session)
+        self.assertEqual(run_shell("wait %3 1", session), "1\n3\n")
+        self.assertEqual(run_shell("jobs", session), "[2] Done\n")
+        self.assertEqual(run_shell("wait", session), "2\n")
+        self.assertEqual(run_shell("jobs", session), "")
+        # Numbers start again once every job is done
+        run_shell("echo 4 &", session)
+        self.assertEqual(run_shell("wait 1", session), "4\n")
+
+    def test_job_state(self):
+        """Test that jobs still running are listed as such."""
+        session = Session()
+        run_shell("barrier job &", session)
+        self.assertEqual(run_shell("jobs", session), "[1] Running\n")
+        BarrierApp.barrier.wait()
+        self.assertEqual(run_shell("wait", session), "job\n")
+
+    def test_job_snapshot(self):
+        """Test that jobs keep the directory they were started in."""
+        session = Session()
+        run_shell("barrier x | cat a.txt & cd sub", session)
+        BarrierApp.barrier.wait()
+        self.assertIn("No such file", run_shell("wait", session))
+        self.assertEqual(run_shell("cat a.txt & wait", session), "A\n")
+
+    def test_job_errors(self):
+        """Test that failed jobs output their error."""
+        self.assertEqual(
+            run_shell("cat missing & echo ok"),
+            "ok\nError: Error executing cat: cat: missing: No such file\n",
+        )
+
+    def test_wait_in_job(self):
+        """Test that `wait` in a job does not wait for the job itself."""
+        results = []
+        thread = threading.Thread(target=lambda: results.extend([
+            run_shell("echo `wait` &"),
+            run_shell("wait `echo 1` &"),
+            run_shell("echo a & echo `jobs` & wait"),
+        ]))
+        thread.daemon = True
+        thread.start()
+        thread.join(timeout=10)
+        self.assertFalse(thread.is_alive(), "wait in a job hangs")
+        self.assertEqual(results[0], "\n")
+        self.assertIn("%1: no such job", results[1])
+        self.assertEqual(results[2], "a\n\n")
+
+    def test_builtin_errors(self):
+        """Test errors of wait and jobs and their unsafe variants."""
+        self.assertIn("%2: no such job", run_shell("wait 2"))
+        self.assertIn("x: not a valid job", run_shell("wait x"))
+        self.assertIn("too many arguments", run_shell("jobs 1"))
+        self.assertEqual(run_shell("_wait %2"), "wait: %2: no such job\n")
+        self.assertEqual(run_shell("_jobs 1"), "jobs: too many arguments\n")
+
+    def test_script_waits(self):
+        """Test that a script outputs jobs not waited for at the end."""
+        stdout = io.StringIO()
+        run_script(io.StringIO("echo a &\necho b\n"), stdout)
+        self.assertEqual(stdout.getvalue(), "b\na\n")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,181 @@
+"""
+Unit tests for the pipeline optimizer of PKU Shell.
+
+Tests include which rewrites fire, and comparing optimized pipelines
+with the pipelines as written, in buffered, streamed, threaded and bytes
+mode, on files and on random input with unusual line endings.
+"""
+
+import io
+import os
+import random
+import tempfile
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+import executor.executor as executor
+from apps.loader import load_all_apps
+from executor import optimizer
+from executor.executor import ExecutionContext, execute_ast
+from parser.nodes import Fused, Pipeline
+from parser.parser import parse_shell_command
+
+COMMANDS = [
+    "cat a.txt | grep A", "cat a.txt b.txt | grep 'a$'",
+    "cat a.txt missing.txt | grep a", "cat missing.txt | grep a",
+    "cat a.txt | grep A | head -n 3", "cat a.txt | grep z | wc -l",
+    "cat a.txt | sort | head", "cat a.txt | sort -r | head -n 4",
+    "cat a.txt | sort | head -n 0", "cat a.txt | sort | uniq",
+    "cat a.txt | sort -r | uniq | head -n 5", "cat empty.txt | sort | uniq",
+    "cat empty.txt | sort | head", "cat a.txt | grep a | wc -l",
+    "cat a.txt | grep 1 | wc -l", "cat empty.txt | grep a | wc -l",
+    "cat missing.txt | grep a | wc -l",
+    "echo `cat a.txt | sort | uniq`", "cat a.txt | grep a | sort | head -n 2",
+]
+
+
+def run_ast(ast, stdin=None):
+    """Execute an AST and return its output or error message."""
+    out = []
+    context = ExecutionContext()
+    if stdin is not None:
+        context.stdin = io.StringIO(stdin)
+    try:
+        execute_ast(ast, out, context)
+    except Exception as e:
+        return f"Error: {e}"
+    return "".join(out)
+
+
+class TestOptimizer(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        """Load the apps the fused operators use."""
+        load_all_apps()
+
+    def setUp(self):
+        """Set up temporary directory with test files."""
+        self.test_dir = tempfile.TemporaryDirectory()
+        self.original_cwd = os.getcwd()
+        os.chdir(self.test_dir.name)
+        with open("a.txt", "w") as f:
+            for i in range(300):
+                f.write(f"{'Aab'[i % 3]}{i % 7}{' ' * (i % 2)}\n")
+            f.write("\n\nlast")
+        with open("b.txt", "w") as f:
+            f.write("xa\n\x0bya\x0c\n")
+        open("empty.txt", "w").close()
+
+    def tearDown(self):
+        """Restore original directory and settings, and clean up."""
+        executor.STREAMING = True
+        executor.THREADED = False
+        executor.BYTES = False
+        os.chdir(self.original_cwd)
+        self.test_dir.cleanup()
+
+    def assertSameOutput(self, cmdline, stdin=None):
+        """Check that optimizing a command line keeps its output."""
+        ast = parse_shell_command(cmdline)
+        optimized = optimizer.optimize(ast)
+        self.assertNotEqual(optimized, ast)
+        for streaming, threaded, binary in [
+            (False, False, False), (True, False, False),
+            (True, True, False), (True, False, True), (True, True, True),
+        ]:
+            with self.subTest(streaming=streaming, threaded=threaded,
+                              binary=binary):
+                executor.STREAMING = streaming
+                executor.THREADED = threaded
+                executor.BYTES = binary
+                self.assertEqual(
+                    run_ast(optimized, stdin), run_ast(ast, stdin)
+                )
+
+    def test_same_output(self):
+        """Test optimized pipelines on files."""
+        for cmdline in COMMANDS:
+            with self.subTest(cmdline=cmdline):
+                self.assertSameOutput(cmdline)
+
+    def test_random_input(self):
+        """Test optimized pipelines on input with unusual line endings."""
+        rng = random.Random(0)
+        alphabet = ["a", "b", "A", " ", "\n", "\n", "\r", "\r\n", "\x0b"]
+        cmdlines = [
+            "sort | head -n 3", "sort -r | head -n 1", "sort | head",
+            "sort | uniq", "sort -r | uniq", "grep a | wc -l",
+            "grep '^a*$' | wc -l", "grep b | wc -l",
+        ]
+        for _ in range(150):
+            stdin = "".join(rng.choices(alphabet, k=rng.randrange(40)))
+            for cmdline in cmdlines:
+                with self.subTest(cmdline=cmdline, stdin=stdin):
+                    self.assertSameOutput(cmdline, stdin)
+
+    def test_rewrites(self):
+        """Test which rewrites fire."""
+        cases = {
+            "cat a.txt | grep a": ["cat|grep"],
+            "sort | head -n 2 | grep a | wc -l": ["sort|head", "grep|wc -l"],
+            "cat a.txt | grep a | wc -l": ["cat|grep|wc -l"],
+            "cat a.txt | grep a | wc -l -l": ["cat|grep"],
+            "sort -r | uniq; echo `grep x | wc -l` &": [
+                "sort|uniq", "grep|wc -l"
+            ],
+            "cat *.txt | grep a": [],
+            "cat a.txt | grep '('": [],
+            "cat a.txt | grep \"`echo a`\"": [],
+            "cat | grep a": [],
+            "grep a | wc -l -w": [],
+            "sort | head -n x": [],
+            "sort | head a.txt": [],
+            "sort | uniq -i": [],
+            "sort a.txt | uniq": [],
+            "sort | uniq > out.txt": [],
+            "head | sort": [],
+        }
+        for cmdline, expected in cases.items():
+            with self.subTest(cmdline=cmdline):
+                fired = []
+                ast = parse_shell_command(cmdline)
+                result = optimizer.optimize(ast, fired)
+                self.assertEqual(fired, expected)
+                if not expected:
+                    self.assertIs(result, ast)
+
+    def test_fused_node(self):
+        """Test the stages a fused operator replaces."""
+        ast = optimizer.optimize(parse_shell_command("echo | sort | uniq"))
+        pipeline = ast.statements[0]
+        self.assertIsInstance(pipeline, Pipeline)
+        self.assertEqual(len(pipeline.commands), 2)
+        fused = pipeline.commands[1]
+        self.assertIsInstance(fused, Fused)
+        self.assertEqual(fused.operator, "sort|uniq")
+        self.assertEqual(
+            fused.commands,
+            parse_shell_command("sort | uniq").statements[0].commands
+        )
+
+    def test_stats(self):
+        """Test that fired rewrites are counted."""
+        before = optimizer.stats["sort|head"]
+        optimizer.optimize(parse_shell_command("sort | head; sort | head"))
+        self.assertEqual(optimizer.stats["sort|head"], before + 2)
+
+    def test_concurrent_stats(self):
+        """Test that rewrites fired on several threads are all counted."""
+        ast = parse_shell_command("sort | head; sort | head")
+        before = optimizer.stats["sort|head"]
+
+        def optimize(_):
+            for _ in range(500):
+                optimizer.optimize(ast)
+
+        with ThreadPoolExecutor(4) as pool:
+            list(pool.map(optimize, range(4)))
+        self.assertEqual(optimizer.stats["sort|head"], before + 4000)
+
+
+if __name__ == "__main__":
+    unittest.main()
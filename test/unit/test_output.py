@@ -0,0 +1,173 @@
+"""
+Unit tests for incremental output in PKU Shell.
+
+Tests include buffering and clearing in output sinks, text and binary
+streams, that command lines give the same output through a sink as
+through a deque, that streamed output is written before the
+pipeline ends, and that a failing command only loses the output not
+written yet.
+"""
+
+import io
+import os
+import tempfile
+import unittest
+from collections import deque
+import executor.executor as executor
+from executor.output import DecodingWriter, OutputSink
+from shell import eval, run_script
+
+COMMANDS = [
+    "echo hello",
+    "cat a.txt | sort | uniq",
+    "cat a.txt | grep an | wc -l",
+    "cat big.txt | tail -n 2; echo é",
+    "echo a; cat missing.txt",
+    "cat missing.txt",
+    "cat a.txt missing.txt",
+    "cat a.txt | head -n 1 > b.txt; cat b.txt",
+    "echo `cat a.txt | head -n 1`",
+    "echo x & wait",
+]
+
+
+class RecordingStream(io.BytesIO):
+    """Binary stream recording each write."""
+
+    def __init__(self):
+        super().__init__()
+        self.writes = []
+
+    def write(self, data):
+        self.writes.append(data)
+        return super().write(data)
+
+
+class TestOutputSink(unittest.TestCase):
+    def test_buffering(self):
+        """Test that output is written once the buffer is full."""
+        stream = RecordingStream()
+        sink = OutputSink(stream, buffer_size=4)
+        sink.append("ab")
+        self.assertEqual(stream.writes, [])
+        sink.write("cd")
+        self.assertEqual(stream.writes, [b"abcd"])
+        sink.append("é")
+        sink.flush()
+        self.assertEqual(stream.getvalue(), "abcdé".encode())
+        self.assertEqual(sink.tell(), 5)
+
+    def test_clear(self):
+        """Test that clearing discards only what is not written yet."""
+        stream = io.StringIO()
+        sink = OutputSink(stream, buffer_size=3)
+        sink.append("abc")
+        sink.append("d")
+        sink.clear()
+        sink.flush()
+        self.assertEqual(stream.getvalue(), "abc")
+        self.assertEqual(sink.tell(), 3)
+
+    def test_encoding_errors(self):
+        """Test that unencodable characters are replaced."""
+        stream = io.BytesIO()
+        sink = OutputSink(stream, encoding="ascii")
+        sink.append("aé")
+        sink.flush()
+        self.assertEqual(stream.getvalue(), b"a?")
+
+    def test_decoding_writer(self):
+        """Test decoding characters split between writes."""
+        output = io.StringIO()
+        writer = DecodingWriter(output)
+        data = "héllo".encode() + b"\xff\xc3"
+        for i in range(len(data)):
+            writer.write(data[i:i + 1])
+        writer.close()
+        self.assertEqual(output.getvalue(), "héllo��")
+
+
+class TestIncrementalOutput(unittest.TestCase):
+    def setUp(self):
+        """Set up temporary directory with test files."""
+        self.test_dir = tempfile.TemporaryDirectory()
+        self.original_cwd = os.getcwd()
+        os.chdir(self.test_dir.name)
+        with open("a.txt", "w") as f:
+            f.write("cherry\napple\nbanana\napple\n")
+        with open("big.txt", "w") as f:
+            f.write("".join(f"{i}\n" for i in range(50000)))
+
+    def tearDown(self):
+        """Restore original directory and settings, and clean up."""
+        executor.STREAMING = True
+        executor.BYTES = False
+        os.chdir(self.original_cwd)
+        self.test_dir.cleanup()
+
+    def test_same_as_deque(self):
+        """Test command lines in every pipeline mode against a deque."""
+        for streaming, binary in [(False, False), (True, False),
+                                  (True, True)]:
+            executor.STREAMING = streaming
+            executor.BYTES = binary
+            for cmdline in COMMANDS:
+                with self.subTest(cmdline=cmdline, streaming=streaming,
+                                  binary=binary):
+                    out = deque()
+                    eval(cmdline, out)
+                    stream = io.BytesIO()
+                    sink = OutputSink(stream)
+                    eval(cmdline, sink)
+                    sink.flush()
+                    self.assertEqual(
+                        stream.getvalue().decode(), "".join(out)
+                    )
+
+    def test_streamed_output_written_early(self):
+        """Test that a streamed pipeline writes as its stages yield."""
+        for binary in [False, True]:
+            with self.subTest(binary=binary):
+                executor.BYTES = binary
+                stream = RecordingStream()
+                sink = OutputSink(stream, buffer_size=1024)
+                eval("cat big.txt | grep 1", sink)
+                self.assertGreater(len(stream.writes), 10)
+                sink.flush()
+                out = deque()
+                eval("cat big.txt | grep 1", out)
+                self.assertEqual(stream.getvalue().decode(), "".join(out))
+
+    def test_failed_command_output(self):
+        """Test that a failed command drops only its unwritten output."""
+        error = "Error: Error executing cat: cat: missing.txt: No such file\n"
+        stream = io.BytesIO()
+        sink = OutputSink(stream)
+        eval("cat a.txt missing.txt", sink)
+        sink.flush()
+        self.assertEqual(stream.getvalue().decode(), error)
+
+        stream = io.BytesIO()
+        sink = OutputSink(stream, buffer_size=0)
+        eval("cat a.txt missing.txt", sink)
+        sink.flush()
+        self.assertEqual(
+            stream.getvalue().decode(),
+            "cherry\napple\nbanana\napple\n" + error
+        )
+
+    def test_script(self):
+        """Test that each statement of a script is written in turn."""
+        stream = RecordingStream()
+        script = io.StringIO("echo 1\ncat missing.txt; echo 2\necho 3\n")
+        run_script(script, stream)
+        self.assertEqual(
+            stream.getvalue().decode(),
+            "1\nError: Error executing cat: cat: missing.txt: "
+            "No such file\n2\n3\n"
+        )
+        self.assertEqual(stream.writes[0], b"1\n")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,179 @@
+"""
+Unit tests for concurrent command substitutions in PKU Shell.
+
+Tests include running the substitutions of a command at the same time,
+keeping argument order, reporting the first error, and evaluating
+substitutions that may affect each other one at a time.
+"""
+
+import io
+import os
+import tempfile
+import threading
+import time
+import unittest
+from collections import deque
+from apps.base import BaseApp
+from apps.registry import AppRegistry
+from executor import substitution
+from parser.parser import parse_shell_command
+from shell import Session, eval
+
+
+class BarrierApp(BaseApp):
+    """App that waits until two of its commands run at the same time."""
+
+    barrier = None
+
+    def run(self, args, stdin=None):
+        self.barrier.wait()
+        return f"{args[0]}\n"
+
+
+class SleepApp(BaseApp):
+    """App that outputs its second argument after sleeping, or fails."""
+
+    def run(self, args, stdin=None):
+        time.sleep(float(args[0]))
+        if args[1].startswith("!"):
+            raise ValueError(args[1])
+        return f"{args[1]}\n"
+
+
+def run_shell(cmdline, session=None):
+    """Evaluate a command line and return its output."""
+    out = deque()
+    eval(cmdline, out, session=session)
+    return "".join(out)
+
+
+def run_serial(cmdline, session=None):
+    """Evaluate a command line with substitutions run one at a time."""
+    workers = substitution.WORKERS
+    substitution.WORKERS = 0
+    try:
+        return run_shell(cmdline, session)
+    finally:
+        substitution.WORKERS = workers
+
+
+def subs(cmdline):
+    """Return the substitutions of the first command of a line."""
+    call = parse_shell_command(cmdline).statements[0].commands[0]
+    return substitution.find_substitutions(call.args)
+
+
+class TestParallelSubstitution(unittest.TestCase):
+    def setUp(self):
+        """Set up temporary directory with test files and apps."""
+        self.test_dir = tempfile.TemporaryDirectory()
+        self.original_cwd = os.getcwd()
+        os.chdir(self.test_dir.name)
+        os.mkdir("sub")
+        with open("a.txt", "w") as f:
+            f.write("A\n")
+        BarrierApp.barrier = threading.Barrier(2, timeout=5)
+        AppRegistry.register("barrier", BarrierApp)
+        AppRegistry.register("sleep", SleepApp)
+
+    def tearDown(self):
+        """Restore original directory and clean up."""
+        AppRegistry.unregister("barrier")
+        AppRegistry.unregister("sleep")
+        os.chdir(self.original_cwd)
+        self.test_dir.cleanup()
+
+    def test_concurrent(self):
+        """Test that the substitutions of a command run at once."""
+        self.assertEqual(
+            run_shell("echo `barrier a` \"`barrier b`\""), "a b\n"
+        )
+
+    def test_order(self):
+        """Test that arguments keep their order."""
+        cmdlines = [
+            "echo `sleep 0.1 a` `echo b` x`sleep 0 c`",
+            "echo \"`sleep 0.1 a` `sleep 0 b`\" `cat a.txt`",
+            "cat `echo a.txt` `sleep 0.05 a.txt`",
+        ]
+        for cmdline in cmdlines:
+            with self.subTest(cmdline=cmdline):
+                self.assertEqual(run_shell(cmdline), run_serial(cmdline))
+
+    def test_first_error(self):
+        """Test that the error of the first failing substitution is raised."""
+        self.assertEqual(
+            run_shell("echo `sleep 0.1 !first` `sleep 0 !second`"),
+            "Error: Error executing sleep: !first\n",
+        )
+        self.assertEqual(
+            run_shell("echo `echo a` `cat m2` `sleep 0.1 !third`"),
+            "Error: Error executing cat: cat: m2: No such file\n",
+        )
+
+    def test_many(self):
+        """Test more substitutions than workers."""
+        cmdline = "echo " + " ".join(f"`echo {i}`" for i in range(20))
+        self.assertEqual(
+            run_shell(cmdline), " ".join(map(str, range(20))) + "\n"
+        )
+
+    def test_stateful_in_order(self):
+        """Test that substitutions acting on the session run in order."""
+        output = run_shell("echo `cd sub` `pwd`", Session())
+        self.assertEqual(output, run_serial("echo `cd sub` `pwd`", Session()))
+        self.assertIn(os.path.join(self.test_dir.name, "sub"), output)
+
+    def test_independent(self):
+        """Test which substitutions may run concurrently."""
+        cases = {
+            "echo `cat a.txt | grep A` `find . -name a.txt`": True,
+            "echo `cat < a.txt` `echo b`": True,
+            "echo `cd sub` `pwd`": False,
+            "echo `echo a > b.txt` `cat b.txt`": False,
+            "echo `echo a; wait` `echo b`": False,
+            "echo `echo a & echo b` `echo c`": False,
+            "echo `*.txt` `echo b`": False,
+        }
+        for cmdline, expected in cases.items():
+            with self.subTest(cmdline=cmdline):
+                found = subs(cmdline)
+                self.assertEqual(len(found), 2)
+                self.assertEqual(
+                    all(substitution.is_independent(s) for s in found),
+                    expected,
+                )
+
+    def test_at_end(self):
+        """Test the check that stdin has nothing left to read."""
+        stream = io.StringIO("ab")
+        self.assertFalse(substitution.at_end(stream))
+        self.assertEqual(stream.read(), "ab")
+        self.assertTrue(substitution.at_end(stream))
+        self.assertTrue(substitution.at_end(None))
+
+    def test_run_all_inline(self):
+        """Test that tasks no worker started run in the caller."""
+        names = []
+
+        def task(i):
+            names.append(threading.current_thread().name)
+            return i
+
+        blocker = threading.Event()
+        pool = substitution.get_pool()
+        busy = [pool.submit(blocker.wait) for _ in range(substitution.WORKERS)]
+        try:
+            results = substitution.run_all(
+                [lambda i=i: task(i) for i in range(3)]
+            )
+        finally:
+            blocker.set()
+            for future in busy:
+                future.result()
+        self.assertEqual(results, [0, 1, 2])
+        self.assertEqual(set(names), {threading.current_thread().name})
+
+
+if __name__ == "__main__":
+    unittest.main()
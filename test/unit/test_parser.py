@@ -0,0 +1,181 @@
+"""
+Unit tests for the parser modes in PKU Shell.
+
+Checks that the LALR parser builds the same ASTs as the Earley parser,
+also for `)` and `$(` that do not delimit a substitution,
+that its parse tables are cached on disk, only in files private to the
+user, and that AST nodes are compact and immutable.
+"""
+
+import unittest
+import os
+import tempfile
+from unittest import mock
+from parser.lark_parser import (
+    build_parser, default_cache_file, is_private, parse_to_ast
+)
+from parser.parser import parse_shell_command
+from parser.nodes import Arg, Call, Pipeline, Redirection, Sequence
+
+
+class TestParserModes(unittest.TestCase):
+    LINES = [
+        "echo foo",
+        "echo 'a  b'",
+        'echo "a  b"',
+        'echo "`echo foo`"',
+        "echo `echo foo; echo bar`",
+        "`echo echo` foo",
+        "cat < test.txt",
+        "cat <test.txt",
+        "echo hello > output.txt",
+        "cat dir1/file1.txt dir1/file2.txt | sort | uniq",
+        "echo AAA; echo BBB; echo CCC",
+        "find dir1 -name '*.txt'",
+    ]
+
+    @classmethod
+    def setUpClass(cls):
+        cls.earley = build_parser("earley")
+        cls.lalr = build_parser("lalr", cache_file=None)
+
+    def to_ast(self, shell_parser, line):
+        """Parse a line and return the transformed AST."""
+        return parse_to_ast(shell_parser, line)
+
+    def test_lalr_matches_earley(self):
+        """Test that both modes build identical ASTs."""
+        for line in self.LINES:
+            with self.subTest(line=line):
+                self.assertEqual(
+                    self.to_ast(self.lalr, line),
+                    self.to_ast(self.earley, line)
+                )
+
+    def test_parentheses_as_text(self):
+        """Test `)` and `$(` outside substitutions in both modes."""
+        lines = [
+            "echo x )",
+            "echo )",
+            ") echo",
+            "echo ) ) )",
+            "cat > )",
+            "echo a | cat ) ; echo )",
+            "echo ) $( echo a )",
+            "echo $( echo a ) & echo )",
+            "echo \"$( echo a )\" )",
+            "echo $( echo \")\" )",
+            "echo `echo x )`",
+            "echo $(",
+            "echo $( a",
+            "echo $( echo a ; echo b",
+            "echo $( $( $(",
+        ]
+        for line in lines:
+            with self.subTest(line=line):
+                self.assertEqual(
+                    self.to_ast(self.lalr, line),
+                    self.to_ast(self.earley, line)
+                )
+        self.assertEqual(
+            self.to_ast(self.lalr, "echo x )").statements[0].commands[0],
+            Call([Arg("echo"), Arg("x"), Arg(")")])
+        )
+
+    def test_lalr_redirection_infront(self):
+        """Test that LALR mode accepts a leading redirection."""
+        ast = self.to_ast(self.lalr, "< test.txt cat")
+        command = ast.statements[0].commands[0]
+        self.assertEqual(command.args, (Arg("cat"),))
+        self.assertEqual(
+            command.redirections,
+            (Redirection(Redirection.INPUT, "test.txt"),)
+        )
+
+    def test_lalr_table_cache(self):
+        """Test that the parse tables are written to and read from disk."""
+        with tempfile.TemporaryDirectory() as tmp:
+            cache_file = os.path.join(tmp, "lalr.cache")
+            build_parser("lalr", cache_file=cache_file)
+            self.assertTrue(os.path.exists(cache_file))
+            cached = build_parser("lalr", cache_file=cache_file)
+            self.assertEqual(
+                self.to_ast(cached, "echo foo | cat"),
+                self.to_ast(self.lalr, "echo foo | cat")
+            )
+
+    def test_untrusted_cache_ignored(self):
+        """Test that a cache file others can write is not used."""
+        with tempfile.TemporaryDirectory() as tmp:
+            cache_file = os.path.join(tmp, "lalr.cache")
+            with open(cache_file, "w") as f:
+                f.write("planted")
+            os.chmod(cache_file, 0o666)
+            parser = build_parser("lalr", cache_file=cache_file)
+            self.assertEqual(
+                self.to_ast(parser, "echo foo"),
+                self.to_ast(self.lalr, "echo foo")
+            )
+            with open(cache_file) as f:
+                self.assertEqual(f.read(), "planted")
+            os.chmod(cache_file, 0o600)
+            self.assertTrue(is_private(cache_file))
+            if getattr(os, "getuid", lambda: None)() == 0:
+                os.chown(cache_file, 12345, -1)
+                self.assertFalse(is_private(cache_file))
+
+    def test_default_cache_private(self):
+        """Test that the default cache directory is private."""
+        with tempfile.TemporaryDirectory() as tmp:
+            with mock.patch.dict(os.environ, {"XDG_CACHE_HOME": tmp}):
+                cache_file = default_cache_file()
+            directory = os.path.dirname(cache_file)
+            self.assertEqual(directory, os.path.join(tmp, "pku_shell"))
+            self.assertEqual(os.stat(directory).st_mode & 0o777, 0o700)
+            os.chmod(directory, 0o777)
+            with mock.patch.dict(os.environ, {"XDG_CACHE_HOME": tmp}):
+                self.assertIsNone(default_cache_file())
+
+    def test_lalr_builds_ast_inline(self):
+        """Test that LALR parsing returns the AST without a parse tree."""
+        line = "echo 'a' `echo b` | cat"
+        ast = self.lalr.parse(line)
+        self.assertIsInstance(ast, Sequence)
+        tree_parser = build_parser("lalr", cache_file=None, inline=False)
+        self.assertEqual(parse_to_ast(tree_parser, line), ast)
+
+    def test_unknown_mode(self):
+        """Test that an unknown parser mode is rejected."""
+        with self.assertRaises(ValueError):
+            build_parser("cyk")
+
+
+class TestASTNodes(unittest.TestCase):
+    def test_node_structure(self):
+        """Test the typed nodes built for a pipeline with redirection."""
+        ast = parse_shell_command("cat < in.txt | sort")
+        self.assertEqual(ast.statements, (Pipeline([
+            Call([Arg("cat")], [Redirection(Redirection.INPUT, "in.txt")]),
+            Call([Arg("sort")]),
+        ]),))
+
+    def test_nodes_are_immutable(self):
+        """Test that node attributes cannot be changed or added."""
+        arg = Arg("foo")
+        with self.assertRaises(AttributeError):
+            arg.value = "bar"
+        with self.assertRaises(AttributeError):
+            arg.extra = 1
+        self.assertFalse(hasattr(arg, "__dict__"))
+
+    def test_words_are_interned(self):
+        """Test that equal literal words share one string object."""
+        ast = parse_shell_command("echo same; echo same")
+        first, second = (
+            stmt.commands[0].args[1].value for stmt in ast.statements
+        )
+        self.assertIs(first, second)
+
+
+if __name__ == "__main__":
+    unittest.main()
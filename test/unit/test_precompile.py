@@ -0,0 +1,131 @@
+"""
+Unit tests for compiled scripts in PKU Shell.
+
+Tests include writing and loading the compiled cache of a script,
+rejecting the cache once the script or the AST definitions change or
+when others could write it, and expanding cached glob patterns when the
+script runs.
+"""
+
+import io
+import os
+import pickle
+import tempfile
+import unittest
+from unittest import mock
+from parser.parser import parse_shell_command
+import parser.precompile as precompile
+from parser.precompile import compile_script, compiled_path, load_compiled
+from shell import run_compiled
+
+SCRIPT = "echo a; echo \"b `echo c`\"\necho *.txt\n"
+
+
+class TestPrecompile(unittest.TestCase):
+    def setUp(self):
+        """Set up temporary directory with a script and a text file."""
+        self.test_dir = tempfile.TemporaryDirectory()
+        self.original_cwd = os.getcwd()
+        os.chdir(self.test_dir.name)
+
+        self.script = os.path.join(self.test_dir.name, "script.sh")
+        with open(self.script, "w") as f:
+            f.write(SCRIPT)
+        with open("a.txt", "w") as f:
+            f.write("")
+
+    def tearDown(self):
+        """Restore original directory and clean up."""
+        os.chdir(self.original_cwd)
+        self.test_dir.cleanup()
+
+    def run_compiled(self):
+        """Run the compiled script and return its output as string."""
+        stdout = io.StringIO()
+        run_compiled(load_compiled(self.script), stdout)
+        return stdout.getvalue()
+
+    def test_nodes_pickle(self):
+        """Test that AST nodes survive pickling."""
+        ast = parse_shell_command("echo \"a `echo b`\" *.txt > out | cat")
+        self.assertEqual(pickle.loads(pickle.dumps(ast)), ast)
+
+    def test_compile_and_load(self):
+        """Test that the cache holds each statement with its AST."""
+        cache_path = compile_script(self.script)
+        self.assertEqual(cache_path, compiled_path(self.script))
+        self.assertEqual(list(load_compiled(self.script)), [
+            (s, parse_shell_command(s))
+            for s in ["echo a", " echo \"b `echo c`\"", "echo *.txt"]
+        ])
+
+    def test_no_cache(self):
+        """Test that there is nothing to load before compiling."""
+        self.assertIsNone(load_compiled(self.script))
+
+    def test_stale_cache(self):
+        """Test that the cache is ignored after the script changes."""
+        compile_script(self.script)
+        with open(self.script, "a") as f:
+            f.write("echo d\n")
+        self.assertIsNone(load_compiled(self.script))
+
+        compile_script(self.script)
+        stat = os.stat(self.script)
+        os.utime(self.script, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1))
+        self.assertIsNone(load_compiled(self.script))
+
+    def test_ast_version(self):
+        """Test that the cache is ignored after the AST sources change."""
+        compile_script(self.script)
+        version = precompile.ast_version()
+        precompile.ast_version.cache_clear()
+        self.assertEqual(precompile.ast_version(), version)
+        try:
+            precompile.ast_version.cache_clear()
+            precompile.AST_SOURCES += ("cache.py",)
+            self.assertNotEqual(precompile.ast_version(), version)
+            self.assertIsNone(load_compiled(self.script))
+        finally:
+            precompile.AST_SOURCES = precompile.AST_SOURCES[:-1]
+            precompile.ast_version.cache_clear()
+        self.assertIsNotNone(load_compiled(self.script))
+
+    def test_untrusted_cache_ignored(self):
+        """Test that a cache others could write is not unpickled."""
+        cache_path = compile_script(self.script)
+        self.assertIsNotNone(load_compiled(self.script))
+        with mock.patch.object(precompile.pickle, "load") as load:
+            os.chmod(cache_path, 0o666)
+            self.assertIsNone(load_compiled(self.script))
+            os.chmod(cache_path, 0o644)
+            os.chmod(self.test_dir.name, 0o777)
+            self.assertIsNone(load_compiled(self.script))
+            os.chmod(self.test_dir.name, 0o700)
+            if getattr(os, "getuid", lambda: None)() == 0:
+                os.chown(cache_path, 12345, -1)
+                self.assertIsNone(load_compiled(self.script))
+                os.chown(cache_path, 0, -1)
+            load.assert_not_called()
+        self.assertIsNotNone(load_compiled(self.script))
+
+    def test_globs_expand_at_run_time(self):
+        """Test that glob patterns are expanded when the script runs."""
+        compile_script(self.script)
+        self.assertEqual(self.run_compiled(), "a\nb c\na.txt\n")
+        with open("b.txt", "w") as f:
+            f.write("")
+        self.assertEqual(self.run_compiled(), "a\nb c\na.txt b.txt\n")
+
+    def test_parse_error(self):
+        """Test that a statement that does not parse still reports it."""
+        with open(self.script, "w") as f:
+            f.write("echo \"bad\n")
+        compile_script(self.script)
+        self.assertEqual(list(load_compiled(self.script)),
+                         [("echo \"bad\n", None)])
+        self.assertTrue(self.run_compiled().startswith("Error: "))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,115 @@
+"""
+Unit tests for running CPU-bound apps in worker processes in PKU Shell.
+
+Every command line must give the same output and the same error with
+and without the process pool, whether the apps run in one worker or on
+chunks of their input in several workers.
+"""
+
+import os
+import tempfile
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+import executor.executor as executor
+from apps.loader import load_all_apps
+from apps.registry import AppRegistry
+from executor import processes
+from executor.executor import ExecutionContext, execute_ast
+from parser.parser import parse_shell_command
+
+COMMANDS = [
+    "cat a.txt | grep A", "cat a.txt | grep '[ab]$'", "cat a.txt | grep z",
+    "cat a.txt | grep '('", "grep A a.txt b.txt", "cat a.txt | grep",
+    "cat a.txt | sort", "cat a.txt | sort -r", "sort b.txt",
+    "cat a.txt | sort -x", "cat a.txt | uniq -i", "uniq b.txt",
+    "cat a.txt | sort | uniq", "cat a.txt | _grep '('",
+    "cat a.txt | grep A | sort -r | uniq | head",
+    "echo | sort", "echo `cat a.txt | sort | head -n 1 a.txt`",
+    "cat a.txt | grep a | sort | uniq", "cat a.txt | grep a | sort -r",
+]
+
+
+def run_ast(cmdline):
+    """Execute a command line and return its output or error message."""
+    out = []
+    try:
+        execute_ast(parse_shell_command(cmdline), out, ExecutionContext())
+    except Exception as e:
+        return f"Error: {e}"
+    return "".join(out)
+
+
+class TestProcesses(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        """Load the apps and split inputs in small chunks."""
+        load_all_apps()
+        cls.split_size = processes.SPLIT_SIZE
+        processes.SPLIT_SIZE = 50
+
+    @classmethod
+    def tearDownClass(cls):
+        """Stop the pool and restore the settings."""
+        processes.shutdown()
+        processes.WORKERS = 0
+        processes.SPLIT_SIZE = cls.split_size
+
+    def setUp(self):
+        """Set up temporary directory with test files."""
+        self.test_dir = tempfile.TemporaryDirectory()
+        self.original_cwd = os.getcwd()
+        os.chdir(self.test_dir.name)
+        with open("a.txt", "w") as f:
+            for i in range(100):
+                f.write("".join(f"{c}{i % 7}\n" for c in "Aab"))
+            f.write("last")
+        with open("b.txt", "w") as f:
+            f.write("x\nA1\nA1\na1\n")
+
+    def tearDown(self):
+        """Restore original directory and clean up."""
+        executor.STREAMING = True
+        os.chdir(self.original_cwd)
+        self.test_dir.cleanup()
+
+    def test_same_as_in_process(self):
+        """Test output and errors against in-process execution."""
+        for streaming in [True, False]:
+            executor.STREAMING = streaming
+            for cmdline in COMMANDS:
+                with self.subTest(cmdline=cmdline, streaming=streaming):
+                    processes.WORKERS = 0
+                    expected = run_ast(cmdline)
+                    processes.WORKERS = 2
+                    self.assertEqual(run_ast(cmdline), expected)
+
+    def test_runs_in_workers(self):
+        """Test that the workers are started and have the apps loaded."""
+        processes.WORKERS = 2
+        pids = set(processes.get_pool().map(processes._ready, range(8)))
+        self.assertNotIn(os.getpid(), pids)
+        future = processes.get_pool().submit(
+            processes._run_app, "sort", [], "b\na\n", os.getcwd()
+        )
+        self.assertEqual(future.result(), "a\nb\n")
+
+    def test_one_pool(self):
+        """Test that concurrent callers start a single pool."""
+        processes.shutdown()
+        processes.WORKERS = 1
+        with ThreadPoolExecutor(max_workers=4) as threads:
+            pools = list(threads.map(
+                lambda _: processes.get_pool(), range(4)
+            ))
+        self.assertTrue(all(pool is pools[0] for pool in pools))
+
+    def test_split_support(self):
+        """Test which apps split their input."""
+        self.assertTrue(AppRegistry.supports_split("grep"))
+        self.assertTrue(AppRegistry.supports_split("sort"))
+        self.assertFalse(AppRegistry.supports_split("_grep"))
+        self.assertFalse(AppRegistry.supports_split("uniq"))
+
+
+if __name__ == "__main__":
+    unittest.main()
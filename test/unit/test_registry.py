@@ -0,0 +1,115 @@
+"""
+Unit tests for the application registry of PKU Shell.
+
+Tests include reusing app instances, thread-local instances, the bounded
+warm cache of apps and dropping instances with `reset`.
+"""
+
+import threading
+import unittest
+from apps.base import BaseApp
+from apps.loader import load_all_apps
+from apps.registry import AppRegistry
+
+
+class CountingApp(BaseApp):
+    """App that builds the upper case of its argument through `warm`."""
+
+    cache_size = 2
+
+    def __init__(self):
+        super().__init__()
+        self.builds = []
+
+    def run(self, args, stdin=None):
+        def build():
+            self.builds.append(args[0])
+            return args[0].upper()
+
+        return self.warm(args[0], build)
+
+
+class LocalApp(BaseApp):
+    """App that gets one instance per thread."""
+
+    thread_local = True
+
+    def run(self, args, stdin=None):
+        return ""
+
+
+class TestRegistry(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        """Load the apps."""
+        load_all_apps()
+
+    def setUp(self):
+        """Register the test apps."""
+        AppRegistry.register("counting", CountingApp)
+        AppRegistry.register("local", LocalApp)
+
+    def tearDown(self):
+        """Remove the test apps."""
+        AppRegistry.unregister("counting")
+        AppRegistry.unregister("local")
+
+    def test_instance_reused(self):
+        """Test that every lookup returns the same instance."""
+        self.assertIs(AppRegistry.get("echo"), AppRegistry.get("echo"))
+        self.assertIsNot(AppRegistry.get("echo"), AppRegistry.get("_echo"))
+
+    def test_unknown_command(self):
+        """Test that unknown commands still raise."""
+        with self.assertRaisesRegex(Exception, "Unknown command: nope"):
+            AppRegistry.get("nope")
+
+    def test_warm_cache(self):
+        """Test that warm values are reused and the cache is bounded."""
+        app = AppRegistry.get("counting")
+        for arg in ["a", "b", "a", "c", "a", "b"]:
+            self.assertEqual(app.run([arg]), arg.upper())
+        # "b" is evicted by "c", as "a" was used more recently
+        self.assertEqual(app.builds, ["a", "b", "c", "b"])
+
+    def test_failed_build_not_cached(self):
+        """Test that an invalid pattern raises on every command."""
+        grep = AppRegistry.get("grep")
+        for _ in range(2):
+            with self.assertRaisesRegex(ValueError, "invalid regular"):
+                grep.run(["("], "a\n")
+
+    def test_reset(self):
+        """Test that reset drops the instances and their warm state."""
+        app = AppRegistry.get("counting")
+        app.run(["a"])
+        AppRegistry.reset()
+        self.assertEqual(len(app._cache), 0)
+        new_app = AppRegistry.get("counting")
+        self.assertIsNot(new_app, app)
+        new_app.run(["a"])
+        self.assertEqual(new_app.builds, ["a"])
+
+    def test_register_replaces_instance(self):
+        """Test that registering a command again uses the new class."""
+        AppRegistry.get("counting")
+        AppRegistry.register("counting", LocalApp)
+        self.assertIsInstance(AppRegistry.get("counting"), LocalApp)
+
+    def test_thread_local(self):
+        """Test that thread-local apps get one instance per thread."""
+        main = AppRegistry.get("local")
+        self.assertIs(AppRegistry.get("local"), main)
+        others = []
+        thread = threading.Thread(
+            target=lambda: others.append(AppRegistry.get("local"))
+        )
+        thread.start()
+        thread.join()
+        self.assertIsNot(others[0], main)
+        AppRegistry.reset()
+        self.assertIsNot(AppRegistry.get("local"), main)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,101 @@
+"""
+Unit tests for streaming script execution in PKU Shell.
+
+Tests include splitting a script into top-level statements across chunk
+boundaries, running a script statement by statement, and starting the
+first statement before the rest of the script has been read.
+"""
+
+import io
+import unittest
+import os
+import tempfile
+from parser.script import iter_statements
+from shell import run_script
+
+SCRIPT = (
+    "echo a; echo b\n"
+    "echo \"x;\ny\" ; echo $(echo p; echo q) | cat\n"
+    "echo `echo r; echo s`;;\n"
+    "   \n"
+    "echo 'it;s' \"$(echo \")\" )\" end\n"
+    "echo \"a`echo \"\"`b\" tail$"
+)
+
+STATEMENTS = [
+    "echo a",
+    " echo b",
+    "echo \"x;\ny\" ",
+    " echo $(echo p; echo q) | cat",
+    "echo `echo r; echo s`",
+    "echo 'it;s' \"$(echo \")\" )\" end",
+    "echo \"a`echo \"\"`b\" tail$",
+]
+
+
+class EndlessScript:
+    """Script stream that repeats one line forever."""
+
+    def __init__(self, line):
+        self.line = line
+        self.reads = 0
+
+    def read(self, size):
+        self.reads += 1
+        return self.line * (size // len(self.line) + 1)
+
+
+class TestScriptApp(unittest.TestCase):
+    def setUp(self):
+        """Set up temporary directory and dummy file."""
+        self.test_dir = tempfile.TemporaryDirectory()
+        self.original_cwd = os.getcwd()
+        os.chdir(self.test_dir.name)
+
+        with open("test.txt", "w") as f:
+            f.write("AAA\nBBB\n")
+
+    def tearDown(self):
+        """Restore original directory and clean up."""
+        os.chdir(self.original_cwd)
+        self.test_dir.cleanup()
+
+    def run_script(self, script):
+        """Run a script and return its output as string."""
+        stdout = io.StringIO()
+        run_script(io.StringIO(script), stdout)
+        return stdout.getvalue()
+
+    def test_split_statements(self):
+        """Test that only top-level `;` and newlines end statements."""
+        statements = iter_statements(io.StringIO(SCRIPT))
+        self.assertEqual(list(statements), STATEMENTS)
+
+    def test_split_across_chunks(self):
+        """Test that small chunks give the same statements."""
+        for chunk_size in (1, 2, 3, 7):
+            with self.subTest(chunk_size=chunk_size):
+                statements = iter_statements(io.StringIO(SCRIPT), chunk_size)
+                self.assertEqual(list(statements), STATEMENTS)
+
+    def test_run_script(self):
+        """Test running statements separated by newlines and semicolons."""
+        result = self.run_script("cat test.txt | sort -r\necho done; pwd\n")
+        self.assertEqual(result, f"BBB\nAAA\ndone\n{os.getcwd()}\n")
+
+    def test_run_script_error(self):
+        """Test that a failing statement does not stop the script."""
+        result = self.run_script("cat missing.txt\necho after\n")
+        self.assertTrue(result.startswith("Error: "))
+        self.assertTrue(result.endswith("after\n"))
+
+    def test_first_statement_streams(self):
+        """Test that the first statement is available after one read."""
+        script = EndlessScript("echo foo; ")
+        statements = iter_statements(script, chunk_size=64)
+        self.assertEqual(next(statements), "echo foo")
+        self.assertEqual(script.reads, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
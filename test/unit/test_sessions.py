@@ -0,0 +1,110 @@
+"""
+Unit tests for concurrent shell sessions in PKU Shell.
+
+Many sessions, each in its own directory, run command lines on threads
+of one process at the same time; every session must only see its own
+working directory, and the process working directory must not change.
+"""
+
+import os
+import tempfile
+import threading
+import unittest
+from collections import deque
+import executor.executor as executor
+from apps.files import FileAccess, using
+from apps.registry import AppRegistry
+from shell import Session, eval
+
+SESSIONS = 50
+COMMANDS = [
+    ("cd sub; pwd", "{root}/sub\n"),
+    ("cat name.txt", "{name}\n"),
+    ("cat *.txt | grep s", "{name}"),
+    ("echo x > out.txt; cat out.txt", "x\n"),
+    ("ls", "{listing}\n"),
+    ("find . -name 'n*'", "./name.txt\n./sub/name.txt"),
+    ("cd sub; cd ..; head -n 1 < sub/name.txt", "{name}\n"),
+]
+
+
+class TestSessions(unittest.TestCase):
+    def setUp(self):
+        """Create one directory per session."""
+        self.test_dir = tempfile.TemporaryDirectory()
+        self.roots = []
+        for i in range(SESSIONS):
+            root = os.path.join(self.test_dir.name, f"s{i}")
+            os.makedirs(os.path.join(root, "sub"))
+            for path in ["name.txt", os.path.join("sub", "name.txt")]:
+                with open(os.path.join(root, path), "w") as f:
+                    f.write(f"s{i}\n")
+            self.roots.append(root)
+
+    def tearDown(self):
+        """Clean up the session directories."""
+        executor.THREADED = False
+        self.test_dir.cleanup()
+
+    def run_session(self, root, results):
+        """Run every command line in a new session rooted at `root`."""
+        session = Session(root)
+        for cmdline, _ in COMMANDS:
+            out = deque()
+            eval(cmdline, out, session=session)
+            results.append("".join(out))
+            session.files.cwd = root
+
+    def run_concurrently(self):
+        """Run all sessions at once and check their outputs."""
+        cwd = os.getcwd()
+        results = [[] for _ in self.roots]
+        threads = [
+            threading.Thread(target=self.run_session, args=(root, result))
+            for root, result in zip(self.roots, results)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(os.getcwd(), cwd)
+        for i, (root, result) in enumerate(zip(self.roots, results)):
+            for (cmdline, expected), output in zip(COMMANDS, result):
+                listing = "\t".join(os.listdir(root))
+                expected = expected.format(
+                    root=root, name=f"s{i}", listing=listing
+                )
+                with self.subTest(session=i, cmdline=cmdline):
+                    self.assertEqual(output, expected)
+
+    def test_concurrent_sessions(self):
+        """Test sessions running on threads of one process."""
+        self.run_concurrently()
+
+    def test_concurrent_threaded_pipelines(self):
+        """Test sessions whose pipeline stages run on worker threads."""
+        executor.THREADED = True
+        self.run_concurrently()
+
+    def test_apps_use_current_files(self):
+        """Test that apps resolve paths against the current session."""
+        cat = AppRegistry.get("cat")
+        with using(FileAccess(self.roots[1])):
+            self.assertEqual(cat.run(["name.txt"]), "s1\n")
+            with using(FileAccess(self.roots[2])):
+                self.assertEqual(cat.run(["name.txt"]), "s2\n")
+            self.assertEqual(cat.run(["name.txt"]), "s1\n")
+
+    def test_chdir(self):
+        """Test changing the working directory of a file access."""
+        files = FileAccess(self.roots[0])
+        files.chdir("sub/..//sub")
+        self.assertEqual(files.cwd, os.path.join(self.roots[0], "sub"))
+        with self.assertRaises(FileNotFoundError):
+            files.chdir("missing")
+        self.assertEqual(files.cwd, os.path.join(self.roots[0], "sub"))
+
+
+if __name__ == "__main__":
+    unittest.main()
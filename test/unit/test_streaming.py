@@ -0,0 +1,201 @@
+"""
+Unit tests for streaming pipelines in PKU Shell.
+
+Differential tests: a pipeline that succeeds when buffered must give the
+same output when streamed. (As stages upstream of a finished one are
+stopped, a streamed pipeline can succeed where the buffered one fails,
+or fail in another stage.) Also checks
+that streamed stages read their input lazily and are stopped early,
+that apps without `run_stream` still work in a pipeline, and that the
+unsafe variants are never streamed.
+"""
+
+import io
+import itertools
+import os
+import random
+import tempfile
+import unittest
+from collections import deque
+import executor.executor as executor
+from apps.base import BaseApp
+from apps.registry import AppRegistry
+from executor.executor import ExecutionContext, execute_ast
+from executor.streaming import CommandError, iter_lines
+from parser.parser import parse_shell_command
+from shell import eval
+
+STAGES = [
+    "cat", "cat a.txt", "cat a.txt crlf.txt", "cat missing.txt",
+    "cat big.txt", "cat big.txt missing.txt", "grep 0 big.txt missing.txt",
+    "find . -name '*.txt'", "find missing -name a",
+    "grep A", "grep A a.txt b.txt", "grep '('", "grep x empty.txt",
+    "head", "head -n 2", "head -n 0", "head -n 2 a.txt", "head -n x",
+    "head -n 0 missing.txt", "tail", "tail -n 2", "tail -n 0",
+    "tail -n 1 crlf.txt", "uniq", "uniq -i", "uniq b.txt", "uniq -x",
+    "cut -b 1", "cut -b 2-,1 a.txt", "cut -b 1 empty.txt", "cut -x 1",
+    "wc", "wc -l", "wc -w -m a.txt b.txt", "wc missing.txt",
+    "echo x y", "sort", "_cat missing.txt",
+]
+
+
+def run_shell(cmdline, stdin=None):
+    """Run a command line and return its output as string."""
+    out = deque()
+    eval(cmdline, out, stdin)
+    return "".join(out)
+
+
+def run_ast(cmdline, stdin=None):
+    """Execute a command line and return its output or error message."""
+    context = ExecutionContext()
+    if stdin is not None:
+        context.stdin = io.StringIO(stdin)
+    out = []
+    try:
+        execute_ast(parse_shell_command(cmdline), out, context)
+    except Exception as e:
+        return f"Error: {e}"
+    return "".join(out)
+
+
+class TestStreaming(unittest.TestCase):
+    def setUp(self):
+        """Set up temporary directory with test files."""
+        self.test_dir = tempfile.TemporaryDirectory()
+        self.original_cwd = os.getcwd()
+        os.chdir(self.test_dir.name)
+        files = {
+            "a.txt": "AAA\nBbb\nAAA\naaa\nCCC",
+            "b.txt": "x\nA1\nA1\na1\n\nA2\n",
+            "crlf.txt": "1\r\n2\r3\x0c4\n",
+            "empty.txt": "",
+            "big.txt": "".join(f"{i}\n" for i in range(20000)),
+        }
+        for name, content in files.items():
+            with open(name, "w", newline="") as f:
+                f.write(content)
+
+    def tearDown(self):
+        """Restore original directory and clean up."""
+        executor.STREAMING = True
+        os.chdir(self.original_cwd)
+        self.test_dir.cleanup()
+
+    def assertSameAsBuffered(self, cmdline, stdin=None):
+        """Assert that a command line gives the same result both ways."""
+        executor.STREAMING = False
+        expected = run_ast(cmdline, stdin)
+        executor.STREAMING = True
+        result = run_ast(cmdline, stdin)
+        if expected.startswith("Error: "):
+            return
+        self.assertEqual(result, expected, cmdline)
+
+    def test_same_as_buffered(self):
+        """Test pipelines of two and three stages against buffered mode."""
+        for first, second in itertools.product(STAGES, repeat=2):
+            with self.subTest(cmdline=f"{first} | {second}"):
+                self.assertSameAsBuffered(f"{first} | {second}")
+        random.seed(0)
+        for _ in range(300):
+            cmdline = " | ".join(random.choices(STAGES, k=3))
+            with self.subTest(cmdline=cmdline):
+                self.assertSameAsBuffered(cmdline)
+
+    def test_same_as_buffered_with_stdin(self):
+        """Test stages reading the shell's stdin against buffered mode."""
+        for stage in STAGES:
+            for stdin in ["a\nA\r\nb", "x\x1c\x1cy\n\n"]:
+                with self.subTest(cmdline=stage, stdin=stdin):
+                    self.assertSameAsBuffered(f"{stage} | cat", stdin)
+
+    def test_output(self):
+        """Test the output of a streamed pipeline."""
+        self.assertEqual(
+            run_shell("cat a.txt b.txt | grep A | uniq -i | head"),
+            "AAA\nA1\nA2"
+        )
+
+    def test_stage_error(self):
+        """Test that the error of a failing stage is reported."""
+        ast = parse_shell_command("cat missing.txt | cat | head -n 1")
+        with self.assertRaises(CommandError) as cm:
+            execute_ast(ast, [], ExecutionContext())
+        self.assertEqual(
+            str(cm.exception),
+            "Error executing cat: cat: missing.txt: No such file"
+        )
+
+    def test_upstream_stopped(self):
+        """Test that stages before a finished one are stopped."""
+        self.assertEqual(
+            run_shell("cat big.txt missing.txt | head -n 2"), "0\n1\n"
+        )
+        self.assertEqual(
+            run_shell("find . -name '*.txt' | grep big | head -n 1"),
+            "./big.txt"
+        )
+
+        closed = []
+
+        class EndlessApp(BaseApp):
+            def run(self, args, stdin=None):
+                raise ValueError("endless: not streamed")
+
+            def run_stream(self, args, lines):
+                try:
+                    while True:
+                        yield "y\n"
+                finally:
+                    closed.append(True)
+
+        AppRegistry.register("endless", EndlessApp)
+        try:
+            self.assertEqual(run_shell("endless | cat | head -n 3"),
+                             "y\ny\ny\n")
+        finally:
+            AppRegistry.unregister("endless")
+        self.assertEqual(closed, [True])
+
+    def test_unsafe_apps_do_not_stream(self):
+        """Test that unsafe variants fall back to their own run."""
+        self.assertTrue(AppRegistry.supports_stream("cat"))
+        self.assertFalse(AppRegistry.supports_stream("_cat"))
+        self.assertFalse(AppRegistry.supports_stream("sort"))
+        self.assertFalse(AppRegistry.supports_stream("unknown"))
+        self.assertEqual(
+            run_shell("_cat missing.txt | cat"),
+            "cat: missing.txt: No such file\n"
+        )
+
+    def test_head_reads_lazily(self):
+        """Test that head stops pulling lines after the first N."""
+        pulled = []
+
+        def lines():
+            for i in itertools.count():
+                pulled.append(i)
+                yield f"{i}\n"
+
+        output = AppRegistry.get("head").run_stream([], lines())
+        self.assertEqual(len(list(output)), 10)
+        self.assertEqual(pulled, list(range(10)))
+
+    def test_iter_lines(self):
+        """Test that chunked text is split like str.splitlines."""
+        random.seed(1)
+        alphabet = "ab \n\r\x0b\x1c\x85 "
+        for _ in range(2000):
+            text = "".join(random.choices(alphabet, k=random.randint(0, 12)))
+            cuts = sorted(random.choices(range(len(text) + 1), k=3))
+            chunks = [
+                text[i:j] for i, j in zip([0] + cuts, cuts + [len(text)])
+            ]
+            self.assertEqual(
+                list(iter_lines(chunks)), text.splitlines(keepends=True)
+            )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,9 +1,9 @@
 """
 Unit tests for the `tail` application in PKU Shell.
 
-Covers default output, -n flag usage, stdin input,
+Covers default output, -n flag usage, stdin input (also with -n),
 edge cases like large -n and -n 0,
-invalid flags, and missing file handling.
+invalid flags and line counts, and missing file handling.
 """
 
 import unittest
@@ -86,6 +86,27 @@ class TestTailApp(unittest.TestCase):
         result = self.run_eval("tail no_such_file.txt")
         self.assertIn("No such file", result)
 
+    def test_tail_shell_n_stdin(self):
+        """Test tail -n without a file, reading stdin."""
+        result = self.run_eval("tail -n 2", stdin="a\nb\nc")
+        self.assertEqual(result, "b\nc")
+
+    def test_tail_shell_invalid_count(self):
+        """Test the errors for an invalid number of lines."""
+        with open("file.txt", "w") as f:
+            f.write("test")
+        self.assertIn("tail: wrong flags", self.run_eval("tail -n x"))
+        self.assertIn("tail: wrong flags", self.run_eval("tail -n -1"))
+        self.assertIn(
+            "tail: invalid number of lines",
+            self.run_eval("tail -n x file.txt")
+        )
+        self.assertEqual(self.run_eval("_tail -n x"), "tail: wrong flags")
+        self.assertEqual(
+            self.run_eval("_tail -n x file.txt"),
+            "tail: invalid number of lines"
+        )
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,133 @@
+"""
+Unit tests for execution tracing in PKU Shell.
+
+Tests include the spans recorded for parsing, AST nodes (including the
+streamed stages of buffered pipelines), applications, globs and
+redirections, their sizes, the Chrome trace-event file, and
+that nothing is recorded when tracing is off.
+"""
+
+import json
+import os
+import tempfile
+import unittest
+from collections import deque
+import executor.executor as executor
+from executor import tracing
+from shell import eval
+
+
+class TestTracing(unittest.TestCase):
+    def setUp(self):
+        """Set up temporary directory with test files."""
+        self.test_dir = tempfile.TemporaryDirectory()
+        self.original_cwd = os.getcwd()
+        os.chdir(self.test_dir.name)
+        with open("a.txt", "w") as f:
+            f.write("apple\nbanana\ncherry\n")
+
+    def tearDown(self):
+        """Stop tracing, restore original directory and clean up."""
+        tracing.stop()
+        executor.STREAMING = True
+        os.chdir(self.original_cwd)
+        self.test_dir.cleanup()
+
+    def trace(self, cmdline):
+        """Evaluate a command line while tracing; return its events."""
+        tracer = tracing.start()
+        out = deque()
+        try:
+            eval(cmdline, out)
+        finally:
+            tracing.stop()
+        self.output = "".join(out)
+        return tracer.events
+
+    def find(self, events, name):
+        """Return the only event with a name."""
+        found = [e for e in events if e["name"] == name]
+        self.assertEqual(len(found), 1, name)
+        return found[0]
+
+    def test_spans(self):
+        """Test the spans of a pipeline with a redirection."""
+        events = self.trace("grep a < a.txt | sort; echo *.txt")
+        names = [e["name"] for e in events]
+        for name in ["parse", "Sequence", "Pipeline", "Call", "<a.txt",
+                     "grep", "sort", "glob", "echo"]:
+            self.assertIn(name, names)
+        for event in events:
+            self.assertEqual(event["ph"], "X")
+            self.assertGreaterEqual(event["dur"], 0)
+            self.assertGreaterEqual(event["tdur"], 0)
+            self.assertEqual(event["args"]["cpu_us"], event["tdur"])
+        self.assertEqual(self.find(events, "<a.txt")["cat"], "redirect")
+        self.assertEqual(self.find(events, "<a.txt")["args"]["bytes_in"],
+                         20)
+        self.assertEqual(self.find(events, "glob")["args"]["matches"], 1)
+
+    def test_sizes(self):
+        """Test the input and output sizes of streamed and buffered apps."""
+        for streaming in [True, False]:
+            with self.subTest(streaming=streaming):
+                executor.STREAMING = streaming
+                events = self.trace("cat a.txt | sort | grep an")
+                cat = self.find(events, "cat")
+                grep = self.find(events, "grep")
+                self.assertEqual(cat["args"]["argv"], ["a.txt"])
+                self.assertEqual(cat["args"]["bytes_out"], 20)
+                self.assertEqual(grep["args"]["bytes_in"], 20)
+                self.assertEqual(grep["args"]["bytes_out"], 6)
+                self.assertEqual(self.output, "banana")
+                events = self.trace("cat a.txt | grep an")
+                fused = self.find(events, "cat|grep")
+                self.assertEqual(fused["args"]["bytes_out"], 6)
+
+    def test_buffered_pipeline_calls(self):
+        """Test that each stage of a buffered pipeline has a Call span."""
+        events = self.trace("grep an a.txt | sort | cat > b.txt")
+        self.assertEqual(
+            self.find(events, "Pipeline")["args"]["mode"], "buffered"
+        )
+        calls = [e for e in events if e["name"] == "Call"]
+        self.assertEqual(len(calls), 3)
+        self.assertTrue(self.find(events, "grep")["args"]["streamed"])
+
+    def test_output_redirection(self):
+        """Test the size of a file written by a redirection."""
+        events = self.trace("cat a.txt > b.txt")
+        self.assertEqual(self.find(events, ">b.txt")["args"]["bytes_out"],
+                         20)
+
+    def test_error(self):
+        """Test that a failing span records its error."""
+        events = self.trace("cat missing.txt | sort")
+        self.assertIn("error", self.find(events, "cat")["args"])
+
+    def test_write(self):
+        """Test writing the trace as Chrome trace-event JSON."""
+        tracer = tracing.start()
+        eval("echo hello", deque())
+        tracing.stop()
+        tracer.write("trace.json")
+        with open("trace.json") as f:
+            trace = json.load(f)
+        events = trace["traceEvents"]
+        self.assertEqual(len(events), len(tracer.events))
+        starts = [e["ts"] for e in events]
+        self.assertEqual(starts, sorted(starts))
+
+    def test_off(self):
+        """Test that nothing is recorded when tracing is off."""
+        self.assertFalse(tracing.enabled())
+        self.assertIs(tracing.span("a", "b"), tracing.NULL_SPAN)
+        tracer = tracing.start()
+        tracing.stop()
+        eval("echo hello | cat", deque())
+        self.assertEqual(tracer.events, [])
+        self.assertEqual(tracing.traced("a", "b", len, "abc"), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,184 @@
+"""
+AST Benchmark for PKU Shell
+
+Compares the typed AST nodes (parser.nodes) with the nested dict format
+the parser used to produce, on a generated script with many statements:
+- memory: bytes allocated to hold each representation (tracemalloc);
+- throughput: time of an executor-style walk over each representation,
+  dispatching on the node class or on the "type" key.
+
+Usage:
+    python3 tools/bench_ast.py [--statements N] [--repeat N]
+"""
+
+import os
+import sys
+import time
+import argparse
+import tracemalloc
+
+sys.path.insert(0, os.path.abspath(os.path.join(
+    os.path.dirname(__file__), "../src")))
+
+from parser.parser import parse_shell_command  # noqa: E402
+from parser.nodes import (  # noqa: E402
+    Arg, Call, Pipeline, Redirection, Sequence, Substitution
+)
+
+STATEMENTS = [
+    "echo hello world",
+    "cat dir1/file1.txt | grep AAA | sort | uniq",
+    "head -n 5 < input.txt > output.txt",
+    "echo \"result: `cat file.txt`\"",
+    "find . -name '*.py' | wc -l",
+]
+
+
+def to_dict(node):
+    """
+    Convert typed nodes to the legacy dict-based AST format.
+
+    Strings are copied, as the old parser created a new string for every
+    token instead of interning it.
+    """
+    if isinstance(node, Sequence):
+        return {"type": "statement_list",
+                "statements": [to_dict(s) for s in node.statements]}
+    if isinstance(node, Pipeline):
+        return {"type": "pipeline",
+                "commands": [to_dict(c) for c in node.commands]}
+    if isinstance(node, Call):
+        return {"type": "command",
+                "args": [to_dict(a) for a in node.args],
+                "redirections": [to_dict(r) for r in node.redirections]}
+    if isinstance(node, Redirection):
+        kind = "input" if node.kind == Redirection.INPUT else "output"
+        return {"type": f"{kind}_redirection",
+                "file": node.file.encode().decode()}
+    if isinstance(node, Substitution):
+        return {"type": "substitution", "command": to_dict(node.command)}
+    if isinstance(node, Arg):
+        value = node.value
+        if isinstance(value, tuple):
+            value = [to_dict(v) for v in value]
+        elif isinstance(value, str):
+            value = value.encode().decode()
+        else:
+            value = to_dict(value)
+        return {"type": "arg", "value": value}
+    return node.encode().decode()
+
+
+def copy_nodes(node):
+    """Rebuild a typed AST, allocating new nodes but sharing strings."""
+    if isinstance(node, Sequence):
+        return Sequence([copy_nodes(s) for s in node.statements])
+    if isinstance(node, Pipeline):
+        return Pipeline([copy_nodes(c) for c in node.commands])
+    if isinstance(node, Call):
+        return Call([copy_nodes(a) for a in node.args],
+                    [copy_nodes(r) for r in node.redirections])
+    if isinstance(node, Redirection):
+        return Redirection(node.kind, node.file)
+    if isinstance(node, Substitution):
+        return Substitution(copy_nodes(node.command), node.backtick)
+    if isinstance(node, Arg):
+        value = node.value
+        if isinstance(value, tuple):
+            value = tuple(copy_nodes(v) for v in value)
+        elif not isinstance(value, str):
+            value = copy_nodes(value)
+        return Arg(value, node.glob)
+    return node
+
+
+def walk_dict(ast):
+    """Count arguments, dispatching on the "type" key."""
+    count = 0
+    kind = ast["type"]
+    if kind == "statement_list":
+        for stmt in ast["statements"]:
+            count += walk_dict(stmt)
+    elif kind == "pipeline":
+        for cmd in ast["commands"]:
+            count += walk_dict(cmd)
+    elif kind == "command":
+        for arg in ast["args"]:
+            count += walk_dict(arg)
+    elif kind == "substitution":
+        count += walk_dict(ast["command"])
+    elif kind == "arg":
+        value = ast["value"]
+        if isinstance(value, list):
+            for v in value:
+                if isinstance(v, dict):
+                    count += walk_dict(v)
+        count += 1
+    return count
+
+
+def walk_nodes(ast):
+    """Count arguments, dispatching on the node class."""
+    count = 0
+    if isinstance(ast, Sequence):
+        for stmt in ast.statements:
+            count += walk_nodes(stmt)
+    elif isinstance(ast, Pipeline):
+        for cmd in ast.commands:
+            count += walk_nodes(cmd)
+    elif isinstance(ast, Call):
+        for arg in ast.args:
+            count += walk_nodes(arg)
+    elif isinstance(ast, Substitution):
+        count += walk_nodes(ast.command)
+    elif isinstance(ast, Arg):
+        if isinstance(ast.value, tuple):
+            for v in ast.value:
+                if not isinstance(v, str):
+                    count += walk_nodes(v)
+        count += 1
+    return count
+
+
+def measure(build):
+    """Return (result, bytes still allocated by it) for a builder."""
+    tracemalloc.start()
+    result = build()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, size
+
+
+def best_time(func, arg, repeat):
+    """Return the fastest of `repeat` runs of func(arg) in milliseconds."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(arg)
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Benchmark AST formats")
+    arg_parser.add_argument("--statements", type=int, default=20000)
+    arg_parser.add_argument("--repeat", type=int, default=5)
+    opts = arg_parser.parse_args()
+
+    script = "; ".join(
+        STATEMENTS[i % len(STATEMENTS)] for i in range(opts.statements)
+    )
+    nodes = parse_shell_command(script)
+
+    nodes_copy, node_bytes = measure(lambda: copy_nodes(nodes))
+    dicts, dict_bytes = measure(lambda: to_dict(nodes))
+
+    print(f"=== {opts.statements} statements ===")
+    print(f"memory     dicts: {dict_bytes / 1024:10.1f} KiB")
+    print(f"           nodes: {node_bytes / 1024:10.1f} KiB "
+          f"({node_bytes / dict_bytes:.0%} of dicts)")
+    dict_ms = best_time(walk_dict, dicts, opts.repeat)
+    node_ms = best_time(walk_nodes, nodes_copy, opts.repeat)
+    print(f"walk       dicts: {dict_ms:10.1f} ms")
+    print(f"           nodes: {node_ms:10.1f} ms "
+          f"({node_ms / dict_ms:.0%} of dicts)")
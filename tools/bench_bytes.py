@@ -0,0 +1,79 @@
+"""
+Bytes Mode Benchmark for PKU Shell
+
+Runs file pipelines on a generated ASCII log, once with text stages and
+once in bytes mode (PKU_SHELL_BYTES=1), and reports the time of each.
+Pipelines the optimizer fuses in text mode are run as written in bytes
+mode.
+
+Both produce the same output.
+
+Usage:
+    python3 tools/bench_bytes.py [--size-mb N]
+"""
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+from collections import deque
+
+sys.path.insert(0, os.path.abspath(os.path.join(
+    os.path.dirname(__file__), "../src")))
+
+import executor.executor as executor  # noqa: E402
+from shell import eval  # noqa: E402
+
+COMMANDS = [
+    "cat big.log | wc",
+    "cat big.log | grep x | wc -l",
+    "cut -b 1-8 big.log | tail -n 2",
+    "cat big.log | head -n 200000 | uniq | wc -l",
+    "cat big.log | sort -r | head -n 1",
+]
+
+
+def generate(path, size_mb):
+    """Write a log of about `size_mb` megabytes, one line in 16 matching."""
+    block = "".join(
+        f"{i:08d} {'x' if i % 16 == 0 else 'o'} some log message\n"
+        for i in range(1000)
+    )
+    with open(path, "w") as f:
+        for _ in range(size_mb * 1024 * 1024 // len(block) + 1):
+            f.write(block)
+
+
+def measure(cmdline, binary):
+    """Run a command line; return its output and time (s)."""
+    executor.BYTES = binary
+    out = deque()
+    start = time.perf_counter()
+    eval(cmdline, out)
+    elapsed = time.perf_counter() - start
+    return "".join(out), elapsed
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(
+        description="Benchmark pipelines in bytes mode"
+    )
+    arg_parser.add_argument("--size-mb", type=int, default=50)
+    opts = arg_parser.parse_args()
+
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        try:
+            generate("big.log", opts.size_mb)
+            print(f"=== {opts.size_mb} MB log ===")
+            for cmdline in COMMANDS:
+                text = measure(cmdline, False)
+                binary = measure(cmdline, True)
+                assert text[0] == binary[0], cmdline
+                print(cmdline)
+                print(f"    text  {text[1] * 1000:10.1f} ms")
+                print(f"    bytes {binary[1] * 1000:10.1f} ms")
+        finally:
+            os.chdir(cwd)
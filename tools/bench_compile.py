@@ -0,0 +1,79 @@
+"""
+Compiled Script Benchmark for PKU Shell
+
+Compares the two ways `sh script` can get the ASTs of a script:
+- parse: split the source into statements and parse each one;
+- load: read the statements and ASTs written by `sh --compile script`.
+
+Statements are made unique so the AST cache cannot help the parser.
+Execution is not included.
+
+Usage:
+    python3 tools/bench_compile.py [--statements N] [--repeat N]
+"""
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.abspath(os.path.join(
+    os.path.dirname(__file__), "../src")))
+
+from parser.parser import ast_cache, parse_shell_command  # noqa: E402
+from parser.precompile import compile_script, load_compiled  # noqa: E402
+from parser.script import iter_statements  # noqa: E402
+
+STATEMENTS = [
+    "grep foo{i} file{i}.txt | sort | uniq\n",
+    "echo \"result {i}: `cat file{i}.txt`\" > out{i}.txt\n",
+    "find . -name '*{i}.py' | wc -l; echo *.txt\n",
+]
+
+
+def parse(path):
+    """Parse every statement of the script source."""
+    with open(path, "r") as script:
+        for statement in iter_statements(script):
+            parse_shell_command(statement)
+
+
+def load(path):
+    """Load every statement of the compiled script."""
+    for _ in load_compiled(path):
+        pass
+
+
+def best_time(func, path, repeat):
+    """Return the fastest of `repeat` runs of func(path) in milliseconds."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(path)
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(
+        description="Benchmark compiled scripts"
+    )
+    arg_parser.add_argument("--statements", type=int, default=30000)
+    arg_parser.add_argument("--repeat", type=int, default=3)
+    opts = arg_parser.parse_args()
+
+    ast_cache.resize(0)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "script.sh")
+        with open(path, "w") as f:
+            for i in range(opts.statements):
+                f.write(STATEMENTS[i % len(STATEMENTS)].format(i=i))
+        compile_script(path)
+
+        parse_ms = best_time(parse, path, opts.repeat)
+        load_ms = best_time(load, path, opts.repeat)
+
+    print(f"=== {opts.statements} statements ===")
+    print(f"parse source:    {parse_ms:10.1f} ms")
+    print(f"load compiled:   {load_ms:10.1f} ms   ({load_ms / parse_ms:.0%})")
@@ -0,0 +1,69 @@
+"""
+Execution Context Benchmark for PKU Shell
+
+Runs buffered pipelines of many stages with a large environment, once
+with the environment copied in full for every context, as the shell
+used to, and once with copy-on-write environments, and reports the time
+per command of each.
+
+Both produce the same output.
+
+Usage:
+    python3 tools/bench_context.py [--stages N] [--variables N]
+"""
+
+import os
+import sys
+import time
+import argparse
+from collections import deque
+
+sys.path.insert(0, os.path.abspath(os.path.join(
+    os.path.dirname(__file__), "../src")))
+
+import executor.executor as executor  # noqa: E402
+from apps.loader import load_all_apps  # noqa: E402
+from executor.executor import ExecutionContext, execute_ast  # noqa: E402
+from parser.parser import parse_shell_command  # noqa: E402
+
+REPEAT = 200
+
+
+def run(ast, stages):
+    """Run a pipeline; return its output and the time per command (us)."""
+    start = time.perf_counter()
+    for _ in range(REPEAT):
+        out = deque()
+        execute_ast(ast, out, ExecutionContext())
+    elapsed = time.perf_counter() - start
+    return "".join(out), elapsed / (REPEAT * stages) * 1e6
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(
+        description="Benchmark execution contexts"
+    )
+    arg_parser.add_argument("--stages", type=int, default=20)
+    arg_parser.add_argument("--variables", type=int, default=2000)
+    opts = arg_parser.parse_args()
+
+    for i in range(opts.variables):
+        os.environ[f"PKU_BENCH_{i}"] = "x" * 100
+    load_all_apps()
+    executor.STREAMING = False
+    ast = parse_shell_command(" | ".join(["echo hello"] + ["cat"] * (
+        opts.stages - 1)))
+
+    environment = executor.Environment
+    executor.Environment = os.environ.copy
+    try:
+        copied = run(ast, opts.stages)
+    finally:
+        executor.Environment = environment
+    layered = run(ast, opts.stages)
+
+    assert copied[0] == layered[0]
+    print(f"=== {opts.stages} stages, {len(os.environ)} variables ===")
+    print(f"full copies    {copied[1]:10.1f} us/command")
+    print(f"copy-on-write  {layered[1]:10.1f} us/command   "
+          f"({layered[1] / copied[1]:.0%})")
@@ -0,0 +1,74 @@
+"""
+Early Termination Benchmark for PKU Shell
+
+Runs pipelines whose last stage only needs the start of its input, once
+with buffered pipeline stages (PKU_SHELL_STREAMING=0) and once with
+streaming stages, where the stages before `head` are stopped as soon as
+it is done, and reports the wall-clock time of each.
+
+Both produce the same output.
+
+Usage:
+    python3 tools/bench_early_exit.py [--size-mb N] [--root DIR]
+"""
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+from collections import deque
+
+sys.path.insert(0, os.path.abspath(os.path.join(
+    os.path.dirname(__file__), "../src")))
+
+import executor.executor as executor  # noqa: E402
+from shell import eval  # noqa: E402
+
+
+def generate(path, size_mb):
+    """Write a log of about `size_mb` megabytes."""
+    block = "".join(f"{i:08d} some log message\n" for i in range(1000))
+    with open(path, "w") as f:
+        for _ in range(size_mb * 1024 * 1024 // len(block) + 1):
+            f.write(block)
+
+
+def run(cmdline, streaming):
+    """Return the output and time (ms) of a command line."""
+    executor.STREAMING = streaming
+    out = deque()
+    start = time.perf_counter()
+    eval(cmdline, out)
+    return "".join(out), (time.perf_counter() - start) * 1000
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(
+        description="Benchmark early termination of pipelines"
+    )
+    arg_parser.add_argument("--size-mb", type=int, default=50)
+    arg_parser.add_argument("--root", default="/usr",
+                            help="directory searched by find")
+    opts = arg_parser.parse_args()
+
+    pipelines = [
+        "cat big.log | head -n 1",
+        "cat big.log | grep 7 | head -n 1",
+        f"find {opts.root} -name '*.py' | head -n 1",
+    ]
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        try:
+            generate("big.log", opts.size_mb)
+            print(f"=== {opts.size_mb} MB ===")
+            for cmdline in pipelines:
+                expected, buffered_ms = run(cmdline, False)
+                output, streamed_ms = run(cmdline, True)
+                assert output == expected
+                print(cmdline)
+                print(f"    buffered  {buffered_ms:10.1f} ms")
+                print(f"    streaming {streamed_ms:10.1f} ms")
+        finally:
+            os.chdir(cwd)
@@ -0,0 +1,101 @@
+"""
+Inline AST Construction Benchmark for PKU Shell
+
+The LALR parser now runs ASTBuilder as it reduces each rule, so no Lark
+parse tree is built. This script compares it with the previous approach,
+parsing into a tree and transforming it afterwards, on a long script
+line. For each approach it reports, using tracemalloc:
+- tree: memory blocks and bytes held by the intermediate parse tree;
+- peak: peak memory allocated while producing the AST;
+and the best time of one parse.
+
+Usage:
+    python3 tools/bench_inline.py [--statements N] [--repeat N]
+"""
+
+import os
+import sys
+import time
+import argparse
+import tracemalloc
+
+sys.path.insert(0, os.path.abspath(os.path.join(
+    os.path.dirname(__file__), "../src")))
+
+from parser.lark_parser import ASTBuilder, build_parser  # noqa: E402
+
+STATEMENTS = [
+    "echo hello world",
+    "cat dir1/file1.txt | grep AAA | sort | uniq",
+    "head -n 5 < input.txt > output.txt",
+    "echo \"result: `cat file.txt`\"",
+    "find . -name '*.py' | wc -l",
+]
+
+
+def measure(parse, line):
+    """
+    Trace the memory allocated while parsing a line into an AST.
+
+    Args:
+        parse: Function returning (parse tree or None, AST) for a line.
+        line (str): The command line.
+
+    Returns:
+        tuple: (tree blocks, tree KiB, peak KiB).
+    """
+    tracemalloc.start()
+    tree_blocks = tree_bytes = 0
+    before = tracemalloc.take_snapshot()
+    tree, ast = parse(line)
+    if tree is not None:
+        stats = tracemalloc.take_snapshot().compare_to(before, "filename")
+        tree_blocks = sum(s.count_diff for s in stats)
+        tree_bytes = sum(s.size_diff for s in stats)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return tree_blocks, tree_bytes / 1024, peak / 1024
+
+
+def best_time(parse, line, repeat):
+    """Return the fastest of `repeat` parses of the line in milliseconds."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        parse(line)
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(
+        description="Benchmark inline AST construction"
+    )
+    arg_parser.add_argument("--statements", type=int, default=2000)
+    arg_parser.add_argument("--repeat", type=int, default=5)
+    opts = arg_parser.parse_args()
+
+    line = "; ".join(
+        STATEMENTS[i % len(STATEMENTS)] for i in range(opts.statements)
+    )
+    tree_parser = build_parser("lalr", cache_file=None, inline=False)
+    inline_parser = build_parser("lalr", cache_file=None)
+
+    def two_pass(line):
+        """Parse into a tree, then transform the tree."""
+        tree = tree_parser.parse(line)
+        return tree, ASTBuilder().transform(tree)
+
+    def inline(line):
+        """Build the AST while parsing."""
+        return None, inline_parser.parse(line)
+
+    assert two_pass(line)[1] == inline(line)[1]
+
+    print(f"=== {opts.statements} statements, "
+          f"{len(line)} characters ===")
+    for name, parse in (("tree + transform", two_pass), ("inline", inline)):
+        blocks, tree_kib, peak_kib = measure(parse, line)
+        ms = best_time(parse, line, opts.repeat)
+        print(f"{name:17} tree {blocks:7} blocks {tree_kib:9.1f} KiB"
+              f"   peak {peak_kib:9.1f} KiB   {ms:8.1f} ms")
@@ -0,0 +1,55 @@
+"""
+Background Jobs Benchmark for PKU Shell
+
+Scans several directory trees with `find`, once one after the other and
+once as background jobs (`&`) followed by `wait`, and reports the
+wall-clock time of each. The jobs run on PKU_SHELL_JOBS threads; the
+scans overlap while they wait on the file system.
+
+Both produce the same output.
+
+Usage:
+    python3 tools/bench_jobs.py [DIR ...]
+"""
+
+import os
+import sys
+import time
+import argparse
+from collections import deque
+
+sys.path.insert(0, os.path.abspath(os.path.join(
+    os.path.dirname(__file__), "../src")))
+
+from shell import eval  # noqa: E402
+
+
+def run(cmdline):
+    """Return the output and time (ms) of a command line."""
+    out = deque()
+    start = time.perf_counter()
+    eval(cmdline, out)
+    return "".join(out), (time.perf_counter() - start) * 1000
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(
+        description="Benchmark background jobs"
+    )
+    arg_parser.add_argument(
+        "dirs", nargs="*",
+        default=["/usr/lib", "/usr/share", "/usr/include", "/etc"],
+    )
+    opts = arg_parser.parse_args()
+
+    scans = [f"find {d} -name '*.h' | wc -l" for d in opts.dirs]
+    # Warm up the file system caches, so both runs read the same way
+    run("; ".join(scans))
+    sequential, sequential_ms = run("; ".join(scans))
+    background, background_ms = run(" & ".join(scans) + " & wait")
+
+    assert sequential == background
+    print(f"=== {len(scans)} scans ===")
+    print(f"sequential {sequential_ms:10.1f} ms")
+    print(f"background {background_ms:10.1f} ms   "
+          f"({background_ms / sequential_ms:.0%})")
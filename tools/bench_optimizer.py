@@ -0,0 +1,85 @@
+"""
+Pipeline Optimizer Benchmark for PKU Shell
+
+Runs pipelines the optimizer rewrites into fused operators, once as
+written (PKU_SHELL_OPTIMIZE=0) and once optimized, and reports the
+wall-clock time of each and the rewrites that fired.
+
+Both produce the same output.
+
+Usage:
+    python3 tools/bench_optimizer.py [--size-mb N] [--repeat N]
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+from collections import deque
+
+sys.path.insert(0, os.path.abspath(os.path.join(
+    os.path.dirname(__file__), "../src")))
+
+from executor import optimizer  # noqa: E402
+from shell import eval  # noqa: E402
+
+
+def generate(path, size_mb):
+    """Write a log of about `size_mb` megabytes with repeated lines."""
+    rng = random.Random(0)
+    words = [f"user{i} logged in from host{i % 97}\n" for i in range(5000)]
+    with open(path, "w") as f:
+        written = 0
+        while written < size_mb * 1024 * 1024:
+            block = "".join(rng.choices(words, k=1000))
+            f.write(block)
+            written += len(block)
+
+
+def run(cmdline, optimize, repeat):
+    """Return the output, best time (ms) and rewrites of a command line."""
+    optimizer.ENABLED = optimize
+    best = float("inf")
+    before = optimizer.stats.copy()
+    for _ in range(repeat):
+        out = deque()
+        start = time.perf_counter()
+        eval(cmdline, out)
+        best = min(best, (time.perf_counter() - start) * 1000)
+    fired = sorted((optimizer.stats - before).keys())
+    return "".join(out), best, fired
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(
+        description="Benchmark the pipeline optimizer"
+    )
+    arg_parser.add_argument("--size-mb", type=int, default=20)
+    arg_parser.add_argument("--repeat", type=int, default=3)
+    opts = arg_parser.parse_args()
+
+    pipelines = [
+        "cat big.log | grep host7",
+        "cat big.log | sort | head -n 10",
+        "cat big.log | sort -r | head",
+        "cat big.log | grep host1 | wc -l",
+        "cat big.log | sort | grep host1 | wc -l",
+        "cat big.log | sort | uniq",
+    ]
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        try:
+            generate("big.log", opts.size_mb)
+            print(f"=== {opts.size_mb} MB ===")
+            for cmdline in pipelines:
+                expected, plain_ms, _ = run(cmdline, False, opts.repeat)
+                output, fused_ms, fired = run(cmdline, True, opts.repeat)
+                assert output == expected
+                print(f"{cmdline}  [{', '.join(fired)}]")
+                print(f"    as written {plain_ms:10.1f} ms")
+                print(f"    optimized  {fused_ms:10.1f} ms")
+        finally:
+            os.chdir(cwd)
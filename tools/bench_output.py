@@ -0,0 +1,123 @@
+"""
+Incremental Output Benchmark for PKU Shell
+
+Runs command lines on a generated log, once collecting their output in
+a deque that is printed at the end, as `eval(cmdline, out)` does, and
+once writing it through an output sink (see executor.output), and
+reports the time to the first byte written, the total time and the
+peak memory (tracemalloc) of each. The output is written to a stream
+that only counts it.
+
+Both produce the same output.
+
+Usage:
+    python3 tools/bench_output.py [--size-mb N] [--buffer N]
+"""
+
+import io
+import os
+import sys
+import time
+import argparse
+import tempfile
+import tracemalloc
+from collections import deque
+
+sys.path.insert(0, os.path.abspath(os.path.join(
+    os.path.dirname(__file__), "../src")))
+
+from executor.output import OutputSink  # noqa: E402
+from shell import eval  # noqa: E402
+
+COMMANDS = [
+    "cat big.log",
+    "cat big.log | grep x",
+    "cat big.log | sort | uniq",
+]
+
+
+class CountingStream(io.RawIOBase):
+    """Binary stream keeping only the size and time of the first write."""
+
+    def __init__(self):
+        super().__init__()
+        self.size = 0
+        self.first = None
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        if self.first is None and data:
+            self.first = time.perf_counter()
+        self.size += len(data)
+        return len(data)
+
+
+def generate(path, size_mb):
+    """Write a log of about `size_mb` megabytes, one line in 16 matching."""
+    block = "".join(
+        f"{i:08d} {'x' if i % 16 == 0 else 'o'} some log message\n"
+        for i in range(1000)
+    )
+    with open(path, "w") as f:
+        for _ in range(size_mb * 1024 * 1024 // len(block) + 1):
+            f.write(block)
+
+
+def run(cmdline, incremental, buffer_size):
+    """Run a command line; return the size of its output."""
+    stream = CountingStream()
+    if incremental:
+        out = OutputSink(stream, buffer_size)
+        eval(cmdline, out)
+        out.flush()
+    else:
+        out = deque()
+        eval(cmdline, out)
+        while out:
+            stream.write(out.popleft().encode())
+    return stream
+
+
+def measure(cmdline, incremental, buffer_size):
+    """Return output size, time to first byte, total time and peak."""
+    start = time.perf_counter()
+    stream = run(cmdline, incremental, buffer_size)
+    elapsed = time.perf_counter() - start
+
+    # Measured in a second run, as tracemalloc slows down allocations
+    tracemalloc.start()
+    run(cmdline, incremental, buffer_size)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return stream.size, stream.first - start, elapsed, peak
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(
+        description="Benchmark incremental output"
+    )
+    arg_parser.add_argument("--size-mb", type=int, default=50)
+    arg_parser.add_argument("--buffer", type=int, default=None)
+    opts = arg_parser.parse_args()
+
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        try:
+            generate("big.log", opts.size_mb)
+            print(f"=== {opts.size_mb} MB log ===")
+            for cmdline in COMMANDS:
+                collected = measure(cmdline, False, opts.buffer)
+                written = measure(cmdline, True, opts.buffer)
+                assert collected[0] == written[0], cmdline
+                print(cmdline)
+                for name, (_, first, elapsed, peak) in [
+                    ("deque", collected), ("sink", written)
+                ]:
+                    print(f"    {name:6} first byte {first * 1000:9.1f} ms"
+                          f"   total {elapsed * 1000:9.1f} ms"
+                          f"   peak {peak / 1024 / 1024:8.1f} MiB")
+        finally:
+            os.chdir(cwd)
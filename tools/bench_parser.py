@@ -0,0 +1,127 @@
+"""
+Parser Benchmark for PKU Shell
+
+Compares the Earley and LALR parser modes on:
+- cold start: time to start a fresh interpreter and import the parser,
+  as paid by every `sh -c` invocation;
+- per-line latency: average time to parse a sample line into its AST,
+  and of the fast-path lexer on the sample lines it accepts.
+
+Usage:
+    python3 tools/bench_parser.py [--runs N] [--iterations N]
+"""
+
+import os
+import sys
+import time
+import argparse
+import subprocess
+import tempfile
+
+SRC_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "../src"))
+sys.path.insert(0, SRC_DIR)
+
+from parser.fastpath import parse_simple  # noqa: E402
+from parser.lark_parser import build_parser, parse_to_ast  # noqa: E402
+
+SAMPLE_LINES = [
+    "echo foo",
+    "grep foo file.txt | sort | uniq",
+    "cat dir1/file1.txt dir1/file2.txt | sort -r | head -n 5",
+    "echo \"a `echo b` c\" > out.txt",
+    "cd dir1; cat < file1.txt | wc -l; echo done",
+    "find . -name '*.py' | grep test | tail -n 3",
+]
+
+
+def cold_start(mode, cache_file, runs):
+    """
+    Measure the average time to start Python and build the parser.
+
+    Args:
+        mode (str): Parser mode ("earley" or "lalr").
+        cache_file (str): Value for PKU_SHELL_PARSER_CACHE
+            ("" disables the table cache).
+        runs (int): Number of interpreter launches.
+
+    Returns:
+        float: Average wall time in milliseconds.
+    """
+    env = dict(os.environ)
+    env["PKU_SHELL_PARSER"] = mode
+    env["PKU_SHELL_PARSER_CACHE"] = cache_file
+    env["PYTHONPATH"] = SRC_DIR
+    cmd = [sys.executable, "-c", "import parser.lark_parser"]
+
+    total = 0.0
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(cmd, env=env, check=True)
+        total += time.perf_counter() - start
+    return total / runs * 1000
+
+
+def per_line(mode, iterations):
+    """
+    Measure the average parse time of one sample line.
+
+    Args:
+        mode (str): Parser mode ("earley" or "lalr").
+        iterations (int): Number of passes over SAMPLE_LINES.
+
+    Returns:
+        float: Average time per line in microseconds.
+    """
+    shell_parser = build_parser(mode, cache_file=None)
+    start = time.perf_counter()
+    for _ in range(iterations):
+        for line in SAMPLE_LINES:
+            parse_to_ast(shell_parser, line)
+    elapsed = time.perf_counter() - start
+    return elapsed / (iterations * len(SAMPLE_LINES)) * 1e6
+
+
+def fast_path(iterations):
+    """
+    Measure the average fast-path parse time of one simple sample line.
+
+    Args:
+        iterations (int): Number of passes over the simple SAMPLE_LINES.
+
+    Returns:
+        float: Average time per line in microseconds.
+    """
+    lines = [line for line in SAMPLE_LINES if parse_simple(line)]
+    start = time.perf_counter()
+    for _ in range(iterations):
+        for line in lines:
+            parse_simple(line)
+    elapsed = time.perf_counter() - start
+    return elapsed / (iterations * len(lines)) * 1e6
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Benchmark parsers")
+    arg_parser.add_argument("--runs", type=int, default=10)
+    arg_parser.add_argument("--iterations", type=int, default=200)
+    opts = arg_parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cache_file = os.path.join(tmp, "lalr.cache")
+        # Populate the table cache before timing warm starts
+        cold_start("lalr", cache_file, 1)
+
+        print("=== Cold start (interpreter + parser build) ===")
+        print(f"earley:            "
+              f"{cold_start('earley', '', opts.runs):8.1f} ms")
+        print(f"lalr (no cache):   "
+              f"{cold_start('lalr', '', opts.runs):8.1f} ms")
+        print(f"lalr (cached):     "
+              f"{cold_start('lalr', cache_file, opts.runs):8.1f} ms")
+
+    print("\n=== Per-line parse latency ===")
+    for mode in ("earley", "lalr"):
+        print(f"{mode + ':':19}"
+              f"{per_line(mode, opts.iterations):8.1f} us/line")
+    print(f"{'fast path:':19}"
+          f"{fast_path(opts.iterations):8.1f} us/line (simple lines only)")
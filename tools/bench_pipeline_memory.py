@@ -0,0 +1,82 @@
+"""
+Buffered Pipeline Memory Benchmark for PKU Shell
+
+Runs buffered pipelines (PKU_SHELL_STREAMING=0) whose stages pass a
+whole generated log to each other, and reports the time and the peak
+memory (tracemalloc) of each, also relative to the size of the log as
+a Python string. Stages hand their output to the next one without
+copying it, so the peak stays close to the few copies the apps
+themselves make (e.g. `cat` reading the file and `sort` its lines).
+
+Usage:
+    python3 tools/bench_pipeline_memory.py [--size-mb N]
+"""
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+import tracemalloc
+from collections import deque
+
+sys.path.insert(0, os.path.abspath(os.path.join(
+    os.path.dirname(__file__), "../src")))
+
+import executor.executor as executor  # noqa: E402
+from shell import eval  # noqa: E402
+
+COMMANDS = [
+    "cat big.log | wc -l",
+    "cat big.log | cat | cat | cat | wc -l",
+    "cat big.log | uniq | wc -c",
+    "cat big.log | sort -r | head -n 1",
+]
+
+
+def generate(path, size_mb):
+    """Write a log of about `size_mb` megabytes."""
+    block = "".join(f"{i:08d} some log message\n" for i in range(1000))
+    with open(path, "w") as f:
+        for _ in range(size_mb * 1024 * 1024 // len(block) + 1):
+            f.write(block)
+
+
+def measure(cmdline):
+    """Run a command line; return its output, time (s) and peak memory."""
+    out = deque()
+    start = time.perf_counter()
+    eval(cmdline, out)
+    elapsed = time.perf_counter() - start
+
+    # Measured in a second run, as tracemalloc slows down allocations
+    tracemalloc.start()
+    eval(cmdline, deque())
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return "".join(out), elapsed, peak
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(
+        description="Benchmark the peak memory of buffered pipelines"
+    )
+    arg_parser.add_argument("--size-mb", type=int, default=50)
+    opts = arg_parser.parse_args()
+
+    executor.STREAMING = False
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        try:
+            generate("big.log", opts.size_mb)
+            size = os.path.getsize("big.log")
+            print(f"=== {opts.size_mb} MB log, buffered stages ===")
+            for cmdline in COMMANDS:
+                _, elapsed, peak = measure(cmdline)
+                print(cmdline)
+                print(f"    {elapsed * 1000:10.1f} ms   "
+                      f"peak {peak / 1024 / 1024:10.1f} MiB "
+                      f"({peak / size:.1f}x the log)")
+        finally:
+            os.chdir(cwd)
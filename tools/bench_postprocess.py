@@ -0,0 +1,164 @@
+"""
+AST Post-processing Benchmark for PKU Shell
+
+ASTBuilder now flattens arguments and marks glob patterns while it builds
+each command. This script compares it with the previous approach, kept
+here as a reference: a transform that only merges arguments, followed by
+separate recursive flattening and glob-marking passes.
+
+Inputs are long pipelines and deeply nested `$()` substitutions. The Lark
+parse itself is shared and excluded from the timings.
+
+Usage:
+    python3 tools/bench_postprocess.py [--stages N] [--depth N] [--repeat N]
+"""
+
+import os
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.abspath(os.path.join(
+    os.path.dirname(__file__), "../src")))
+
+from lark import Token  # noqa: E402
+from parser.builder import word_arg  # noqa: E402
+from parser.lark_parser import ASTBuilder, build_parser  # noqa: E402
+from parser.nodes import (  # noqa: E402
+    Node, Arg, Call, Pipeline, Redirection, Sequence, Substitution
+)
+
+
+class LegacyASTBuilder(ASTBuilder):
+    """ASTBuilder whose commands only merge arguments, as before."""
+
+    def command(self, args_and_redirs):
+        merged_args = []
+        redirections = []
+        current = []
+
+        def flush():
+            if current:
+                if len(current) == 1:
+                    merged_args.append(current[0])
+                else:
+                    merged_args.append(Arg(tuple(current)))
+                current.clear()
+
+        for item in args_and_redirs:
+            if isinstance(item, Redirection):
+                flush()
+                redirections.append(item)
+            elif isinstance(item, Substitution):
+                flush()
+                merged_args.append(item)
+            elif isinstance(item, Arg):
+                current.append(item)
+            elif isinstance(item, Token):
+                current.append(word_arg(str(item)))
+        flush()
+        return Call(merged_args, redirections)
+
+
+def legacy_pass(ast, on_call):
+    """Rebuild an AST, applying `on_call` to the arguments of each Call."""
+    if isinstance(ast, Sequence):
+        return Sequence(legacy_pass(s, on_call) for s in ast.statements)
+    if isinstance(ast, Pipeline):
+        return Pipeline(legacy_pass(c, on_call) for c in ast.commands)
+    if isinstance(ast, Call):
+        args = [legacy_pass(a, on_call) for a in ast.args]
+        return Call(on_call(args), ast.redirections)
+    if isinstance(ast, Substitution):
+        return Substitution(legacy_pass(ast.command, on_call), ast.backtick)
+    if isinstance(ast, Arg) and type(ast.value) is tuple:
+        return Arg(tuple(legacy_pass(v, on_call) for v in ast.value))
+    if isinstance(ast, Arg) and isinstance(ast.value, Node):
+        return Arg(legacy_pass(ast.value, on_call), ast.glob)
+    return ast
+
+
+def flatten_args(args):
+    """Split arguments holding a tuple of parts, one argument per part."""
+    new_args = []
+    for arg in args:
+        if isinstance(arg, Arg) and type(arg.value) is tuple:
+            new_args.extend(Arg(part) for part in arg.value)
+        else:
+            new_args.append(arg)
+    return new_args
+
+
+def mark_args(args):
+    """Unwrap nested arguments and drop the glob flag after -name."""
+    new_args = []
+    after_name = seen_name = False
+    for arg in args:
+        core = arg
+        while isinstance(core, Arg) and isinstance(core.value, Node):
+            core = core.value
+        if isinstance(core, Arg):
+            arg = Arg(core.value, glob=core.glob and not after_name)
+            after_name = not seen_name and core.value == "-name"
+        else:
+            arg = core
+            after_name = False
+        seen_name = seen_name or after_name
+        new_args.append(arg)
+    return new_args
+
+
+def legacy(tree):
+    """Merge-only transform followed by flattening and marking passes."""
+    ast = LegacyASTBuilder().transform(tree)
+    ast = legacy_pass(ast, flatten_args)
+    return legacy_pass(ast, mark_args)
+
+
+def fused(tree):
+    """Single ASTBuilder transform."""
+    return ASTBuilder().transform(tree)
+
+
+def best_time(func, tree, repeat):
+    """Return the fastest of `repeat` runs of func(tree) in milliseconds."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(tree)
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def nested_substitution(depth):
+    """Build `echo "$(echo "$( ... echo x ... )" )"` nested `depth` deep."""
+    line = "echo x"
+    for _ in range(depth):
+        line = f'echo "$({line} )"'
+    return line
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(
+        description="Benchmark AST post-processing"
+    )
+    arg_parser.add_argument("--stages", type=int, default=500)
+    arg_parser.add_argument("--depth", type=int, default=40)
+    arg_parser.add_argument("--repeat", type=int, default=20)
+    opts = arg_parser.parse_args()
+
+    inputs = {
+        f"pipeline x{opts.stages}": " | ".join(
+            "grep -v foo *.txt dir/file.log" for _ in range(opts.stages)
+        ),
+        f"nested $() x{opts.depth}": nested_substitution(opts.depth),
+    }
+
+    shell_parser = build_parser("lalr", cache_file=None, inline=False)
+    for name, line in inputs.items():
+        tree = shell_parser.parse(line)
+        assert legacy(tree) == fused(tree)
+        old_ms = best_time(legacy, tree, opts.repeat)
+        new_ms = best_time(fused, tree, opts.repeat)
+        print(f"{name:20} legacy {old_ms:8.2f} ms   fused {new_ms:8.2f} ms"
+              f"   ({new_ms / old_ms:.0%})")
@@ -0,0 +1,82 @@
+"""
+Process Pool Benchmark for PKU Shell
+
+Runs CPU-bound pipelines on a generated log file, in-process and with
+the CPU-bound apps (grep, sort, uniq) in a pool of worker processes
+(PKU_SHELL_PROCESSES), and reports the wall-clock time of each. The
+time to start the pool is not included.
+
+Both produce the same output. Speedups need more than one CPU core.
+
+Usage:
+    python3 tools/bench_processes.py [--size-mb N] [--workers N]
+"""
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+from collections import deque
+
+sys.path.insert(0, os.path.abspath(os.path.join(
+    os.path.dirname(__file__), "../src")))
+
+from executor import processes  # noqa: E402
+from shell import eval  # noqa: E402
+
+PIPELINES = [
+    "cat big.log | grep '([a-z]+ ){2,}m[aeiou]+s{2}' | wc -l",
+    "cat big.log | grep 'x|y' | sort | uniq | wc -l",
+]
+
+
+def generate(path, size_mb):
+    """Write a log of about `size_mb` megabytes."""
+    block = "".join(
+        f"{i:08d} {'xyo'[i % 3]} some log message {i % 97}\n"
+        for i in range(1000)
+    )
+    with open(path, "w") as f:
+        for _ in range(size_mb * 1024 * 1024 // len(block) + 1):
+            f.write(block)
+
+
+def run(cmdline, workers):
+    """Return the output and time (ms) of a command line."""
+    processes.WORKERS = workers
+    out = deque()
+    start = time.perf_counter()
+    eval(cmdline, out)
+    return "".join(out), (time.perf_counter() - start) * 1000
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(
+        description="Benchmark the process pool"
+    )
+    arg_parser.add_argument("--size-mb", type=int, default=20)
+    arg_parser.add_argument("--workers", type=int,
+                            default=os.cpu_count() or 2)
+    opts = arg_parser.parse_args()
+
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        try:
+            generate("big.log", opts.size_mb)
+            processes.WORKERS = opts.workers
+            processes.get_pool()
+            print(f"=== {opts.size_mb} MB, {opts.workers} workers, "
+                  f"{os.cpu_count()} CPUs ===")
+            for cmdline in PIPELINES:
+                expected, local_ms = run(cmdline, 0)
+                output, pool_ms = run(cmdline, opts.workers)
+                assert output == expected
+                print(cmdline)
+                print(f"    in-process {local_ms:10.1f} ms")
+                print(f"    processes  {pool_ms:10.1f} ms"
+                      f"   ({pool_ms / local_ms:.0%})")
+        finally:
+            os.chdir(cwd)
+            processes.shutdown()
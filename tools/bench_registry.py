@@ -0,0 +1,71 @@
+"""
+App Instance Benchmark for PKU Shell
+
+Runs a loop of `echo` and `grep` commands through `run_command`, once
+with a fresh app instance per command, as the registry used to create,
+and once with the reused instances of `AppRegistry.get`, whose warm
+cache keeps the compiled `grep` patterns, and reports the time of each.
+
+Both produce the same output.
+
+Usage:
+    python3 tools/bench_registry.py [--iterations N]
+"""
+
+import io
+import os
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.abspath(os.path.join(
+    os.path.dirname(__file__), "../src")))
+
+from apps.loader import load_all_apps  # noqa: E402
+from apps.registry import AppRegistry  # noqa: E402
+from executor.executor import ExecutionContext, run_command  # noqa: E402
+
+PATTERNS = [r"(\w+) \1", r"^[a-f0-9]{8}-", r"log|err(or)?$"]
+INPUT = "some log message\nanother line\n" * 4
+
+
+def loop(iterations):
+    """Run the commands; return their joined output and the time (ms)."""
+    output = []
+    context = ExecutionContext()
+    start = time.perf_counter()
+    for i in range(iterations):
+        context.stdin = None
+        output.append(run_command("echo", ["hello", str(i)], context))
+        context.stdin = io.StringIO(INPUT)
+        pattern = PATTERNS[i % len(PATTERNS)]
+        output.append(run_command("grep", [pattern], context))
+    return "".join(output), (time.perf_counter() - start) * 1000
+
+
+def fresh_get(name):
+    """Create a new app instance, like the registry used to."""
+    return AppRegistry._registry[name]()
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(
+        description="Benchmark reused app instances"
+    )
+    arg_parser.add_argument("--iterations", type=int, default=100000)
+    opts = arg_parser.parse_args()
+
+    load_all_apps()
+    reused_get = AppRegistry.get
+    AppRegistry.get = fresh_get
+    try:
+        fresh = loop(opts.iterations)
+    finally:
+        AppRegistry.get = reused_get
+    reused = loop(opts.iterations)
+
+    assert fresh[0] == reused[0]
+    print(f"=== {opts.iterations} x echo + grep ===")
+    print(f"fresh instances  {fresh[1]:10.1f} ms")
+    print(f"reused instances {reused[1]:10.1f} ms   "
+          f"({reused[1] / fresh[1]:.0%})")
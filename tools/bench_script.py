@@ -0,0 +1,78 @@
+"""
+Script Streaming Benchmark for PKU Shell
+
+Generates a large script and runs it with `run_script`, which reads,
+parses and executes one top-level statement at a time. Reports:
+- time until the first statement has run;
+- peak memory (tracemalloc) while running the first statements.
+
+The whole script is not executed; only `--statements` statements are.
+
+Usage:
+    python3 tools/bench_script.py [--size-mb N] [--statements N]
+"""
+
+import os
+import sys
+import time
+import argparse
+import itertools
+import tempfile
+import tracemalloc
+from collections import deque
+
+sys.path.insert(0, os.path.abspath(os.path.join(
+    os.path.dirname(__file__), "../src")))
+
+from parser.script import iter_statements  # noqa: E402
+from shell import eval  # noqa: E402
+
+STATEMENTS = [
+    "echo hello world\n",
+    "echo \"a; b\" | cat; echo `echo c`\n",
+    "echo \"$(echo d; echo e )\" x\n",
+]
+
+
+def generate(path, size_mb):
+    """Write a script of about `size_mb` megabytes to `path`."""
+    block = "".join(STATEMENTS) * 1000
+    with open(path, "w") as f:
+        for _ in range(size_mb * 1024 * 1024 // len(block) + 1):
+            f.write(block)
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(
+        description="Benchmark streaming script execution"
+    )
+    arg_parser.add_argument("--size-mb", type=int, default=100)
+    arg_parser.add_argument("--statements", type=int, default=10000)
+    opts = arg_parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "script.sh")
+        generate(path, opts.size_mb)
+        size = os.path.getsize(path) / (1024 * 1024)
+
+        tracemalloc.start()
+        out = deque()
+        start = time.perf_counter()
+        with open(path, "r") as script:
+            statements = iter_statements(script)
+            eval(next(statements), out)
+            out.clear()
+            first = time.perf_counter() - start
+            for statement in itertools.islice(
+                statements, opts.statements - 1
+            ):
+                eval(statement, out)
+                out.clear()
+        elapsed = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+    print(f"script size:            {size:10.1f} MB")
+    print(f"first statement done:   {first * 1000:10.1f} ms")
+    print(f"{opts.statements} statements:     {elapsed * 1000:10.1f} ms")
+    print(f"peak traced memory:     {peak / 1024:10.1f} KiB")
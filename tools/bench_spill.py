@@ -0,0 +1,93 @@
+"""
+Spilling Pipeline Buffer Benchmark for PKU Shell
+
+Runs buffered pipelines on a generated log, once with their buffers in
+memory and once spilling them to temporary files past a small spill
+size (PKU_SHELL_SPILL_SIZE), and reports the time, the peak memory
+(tracemalloc) and the number of spills of each. Apps that need their
+whole input, such as `sort`, still read it into memory.
+
+Both produce the same output.
+
+Usage:
+    python3 tools/bench_spill.py [--size-mb N] [--spill-size N]
+"""
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+import tracemalloc
+from collections import deque
+
+sys.path.insert(0, os.path.abspath(os.path.join(
+    os.path.dirname(__file__), "../src")))
+
+import executor.buffers as buffers  # noqa: E402
+from shell import Session, eval  # noqa: E402
+
+COMMANDS = [
+    "cat big.log | sort | grep x | wc -l",
+    "cat big.log | sort | uniq | wc -l",
+    "cat big.log | _cat | grep x | wc -l",
+]
+
+
+def generate(path, size_mb):
+    """Write a log of about `size_mb` megabytes, one line in 16 matching."""
+    block = "".join(
+        f"{i:08d} {'x' if i % 16 == 0 else 'o'} some log message\n"
+        for i in range(1000)
+    )
+    with open(path, "w") as f:
+        for _ in range(size_mb * 1024 * 1024 // len(block) + 1):
+            f.write(block)
+
+
+def measure(cmdline, spill_size):
+    """Run a command line; return its output, time, peak and spills."""
+    buffers.SPILL_SIZE = spill_size
+    out = deque()
+    session = Session()
+    start = time.perf_counter()
+    eval(cmdline, out, session=session)
+    elapsed = time.perf_counter() - start
+
+    # Measured in a second run, as tracemalloc slows down allocations
+    tracemalloc.start()
+    eval(cmdline, deque())
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return "".join(out), elapsed, peak, session.budget.spills
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(
+        description="Benchmark spilling pipeline buffers"
+    )
+    arg_parser.add_argument("--size-mb", type=int, default=50)
+    arg_parser.add_argument("--spill-size", type=int, default=1024 * 1024)
+    opts = arg_parser.parse_args()
+
+    cwd = os.getcwd()
+    in_memory = buffers.SPILL_SIZE
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        try:
+            generate("big.log", opts.size_mb)
+            print(f"=== {opts.size_mb} MB log, spilling past "
+                  f"{opts.spill_size} characters ===")
+            for cmdline in COMMANDS:
+                memory = measure(cmdline, in_memory)
+                spilled = measure(cmdline, opts.spill_size)
+                assert memory[0] == spilled[0], cmdline
+                print(cmdline)
+                for name, (_, elapsed, peak, spills) in [
+                    ("memory", memory), ("spilled", spilled)
+                ]:
+                    print(f"    {name:8} {elapsed * 1000:9.1f} ms"
+                          f"   peak {peak / 1024 / 1024:8.1f} MiB"
+                          f"   spills {spills}")
+        finally:
+            os.chdir(cwd)
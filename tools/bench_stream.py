@@ -0,0 +1,80 @@
+"""
+Streaming Pipeline Benchmark for PKU Shell
+
+Runs `cat big.log | grep x | head` on a generated log file, once with
+buffered pipeline stages (PKU_SHELL_STREAMING=0) and once with streaming
+stages, and reports the time and the peak memory (tracemalloc) of each.
+
+Both produce the same output.
+
+Usage:
+    python3 tools/bench_stream.py [--size-mb N]
+"""
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+import tracemalloc
+from collections import deque
+
+sys.path.insert(0, os.path.abspath(os.path.join(
+    os.path.dirname(__file__), "../src")))
+
+import executor.executor as executor  # noqa: E402
+from shell import eval  # noqa: E402
+
+COMMAND = "cat big.log | grep x | head"
+
+
+def generate(path, size_mb):
+    """Write a log of about `size_mb` megabytes, one line in 16 matching."""
+    block = "".join(
+        f"{i:08d} {'x' if i % 16 == 0 else 'o'} some log message\n"
+        for i in range(1000)
+    )
+    with open(path, "w") as f:
+        for _ in range(size_mb * 1024 * 1024 // len(block) + 1):
+            f.write(block)
+
+
+def measure(streaming):
+    """Run the command; return its output, time (s) and peak memory."""
+    executor.STREAMING = streaming
+    out = deque()
+    start = time.perf_counter()
+    eval(COMMAND, out)
+    elapsed = time.perf_counter() - start
+
+    # Measured in a second run, as tracemalloc slows down allocations
+    tracemalloc.start()
+    eval(COMMAND, deque())
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return "".join(out), elapsed, peak
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(
+        description="Benchmark streaming pipelines"
+    )
+    arg_parser.add_argument("--size-mb", type=int, default=50)
+    opts = arg_parser.parse_args()
+
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        try:
+            generate("big.log", opts.size_mb)
+            buffered = measure(False)
+            streamed = measure(True)
+        finally:
+            os.chdir(cwd)
+
+    assert buffered[0] == streamed[0]
+    print(f"=== {COMMAND} ({opts.size_mb} MB) ===")
+    for name, (_, elapsed, peak) in [("buffered", buffered),
+                                     ("streaming", streamed)]:
+        print(f"{name:10} {elapsed * 1000:10.1f} ms   "
+              f"peak {peak / 1024:12.1f} KiB")
@@ -0,0 +1,88 @@
+"""
+Command Substitution Benchmark for PKU Shell
+
+Runs commands with several independent substitutions, once evaluating
+them one at a time (PKU_SHELL_SUBSTITUTIONS=0) and once concurrently,
+and reports the wall-clock time of each.
+
+Both produce the same output. Substitutions that wait on the file system
+overlap; CPU-bound ones still share the interpreter lock, so the speedup
+depends on the cores and on how much of the time is spent in system
+calls.
+
+Usage:
+    python3 tools/bench_substitution.py [--dirs N] [--files N] [--repeat N]
+"""
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+from collections import deque
+
+sys.path.insert(0, os.path.abspath(os.path.join(
+    os.path.dirname(__file__), "../src")))
+
+from executor import substitution  # noqa: E402
+from shell import eval  # noqa: E402
+
+
+def generate(root, dirs, files):
+    """Create `dirs` trees of `files` files each, under `root`."""
+    for d in range(dirs):
+        for f in range(files):
+            path = os.path.join(root, f"tree{d}", f"sub{f % 10}")
+            os.makedirs(path, exist_ok=True)
+            with open(os.path.join(path, f"file{f}.txt"), "w") as out:
+                out.write(f"tree {d} file {f}\n")
+
+
+def run(cmdline, workers, repeat):
+    """Return the output and best time (ms) of a command line."""
+    substitution.WORKERS = workers
+    best = float("inf")
+    for _ in range(repeat):
+        out = deque()
+        start = time.perf_counter()
+        eval(cmdline, out)
+        best = min(best, (time.perf_counter() - start) * 1000)
+    return "".join(out), best
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(
+        description="Benchmark concurrent command substitutions"
+    )
+    arg_parser.add_argument("--dirs", type=int, default=4)
+    arg_parser.add_argument("--files", type=int, default=2000)
+    arg_parser.add_argument("--repeat", type=int, default=3)
+    opts = arg_parser.parse_args()
+
+    finds = " ".join(
+        f"`find tree{d} -name file{d}.txt`" for d in range(opts.dirs)
+    )
+    commands = [
+        f"cat {finds}",
+        "echo " + " ".join(
+            f"`cat tree{d}/sub{d}/file{d}.txt`" for d in range(opts.dirs)
+        ),
+    ]
+    parallel = substitution.WORKERS if substitution.enabled() else 4
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        try:
+            generate(tmp, opts.dirs, opts.files)
+            print(f"=== {opts.dirs} trees of {opts.files} files ===")
+            for cmdline in commands:
+                # Warm up the page cache and the warm state of the apps
+                run(cmdline, 0, 1)
+                expected, serial_ms = run(cmdline, 0, opts.repeat)
+                output, parallel_ms = run(cmdline, parallel, opts.repeat)
+                assert output == expected
+                print(cmdline[:72] + ("..." if len(cmdline) > 72 else ""))
+                print(f"    one at a time {serial_ms:10.1f} ms")
+                print(f"    concurrent    {parallel_ms:10.1f} ms")
+        finally:
+            os.chdir(cwd)
@@ -0,0 +1,87 @@
+"""
+Concurrent Pipeline Benchmark for PKU Shell
+
+Compares the wall-clock time of multi-stage file pipelines run by:
+- buffered: each stage runs after the previous one has finished
+  (PKU_SHELL_STREAMING=0);
+- streaming: stages are chained generators on one thread;
+- threads: each stage runs on a worker thread (PKU_SHELL_THREADS=1).
+
+All three produce the same output.
+
+Usage:
+    python3 tools/bench_threads.py [--size-mb N] [--repeat N]
+"""
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+from collections import deque
+
+sys.path.insert(0, os.path.abspath(os.path.join(
+    os.path.dirname(__file__), "../src")))
+
+import executor.executor as executor  # noqa: E402
+from shell import eval  # noqa: E402
+
+PIPELINES = [
+    "cat a.log b.log c.log | grep x | wc -l",
+    "cat a.log b.log | grep 'x|y' | cut -b 1-8 | uniq | tail",
+    "cat a.log | cat | cat | cat | wc",
+]
+
+MODES = {
+    "buffered": (False, False),
+    "streaming": (True, False),
+    "threads": (True, True),
+}
+
+
+def generate(path, size_mb):
+    """Write a log of about `size_mb` megabytes."""
+    block = "".join(
+        f"{i:08d} {'xyo'[i % 3]} some log message\n" for i in range(1000)
+    )
+    with open(path, "w") as f:
+        for _ in range(size_mb * 1024 * 1024 // len(block) + 1):
+            f.write(block)
+
+
+def run(cmdline, mode, repeat):
+    """Return the output and best time (ms) of a command line."""
+    executor.STREAMING, executor.THREADED = MODES[mode]
+    best = float("inf")
+    for _ in range(repeat):
+        out = deque()
+        start = time.perf_counter()
+        eval(cmdline, out)
+        best = min(best, time.perf_counter() - start)
+    return "".join(out), best * 1000
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(
+        description="Benchmark concurrent pipelines"
+    )
+    arg_parser.add_argument("--size-mb", type=int, default=10)
+    arg_parser.add_argument("--repeat", type=int, default=3)
+    opts = arg_parser.parse_args()
+
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        try:
+            for name in ["a.log", "b.log", "c.log"]:
+                generate(name, opts.size_mb)
+            for cmdline in PIPELINES:
+                results = {
+                    mode: run(cmdline, mode, opts.repeat) for mode in MODES
+                }
+                assert len({out for out, _ in results.values()}) == 1
+                print(cmdline)
+                for mode, (_, ms) in results.items():
+                    print(f"    {mode:10} {ms:10.1f} ms")
+        finally:
+            os.chdir(cwd)
@@ -0,0 +1,72 @@
+"""
+Tracing Overhead Benchmark for PKU Shell
+
+Runs short command lines many times with tracing off, as the shell
+normally runs, and with tracing on, and reports the time per command
+line of each and the number of spans recorded per command line.
+
+Both produce the same output.
+
+Usage:
+    python3 tools/bench_tracing.py [--repeat N]
+"""
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+from collections import deque
+
+sys.path.insert(0, os.path.abspath(os.path.join(
+    os.path.dirname(__file__), "../src")))
+
+from executor import tracing  # noqa: E402
+from shell import eval  # noqa: E402
+
+
+def run(cmdline, repeat):
+    """Return the output and the time per run (us) of a command line."""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        out = deque()
+        eval(cmdline, out)
+    elapsed = time.perf_counter() - start
+    return "".join(out), elapsed / repeat * 1e6
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(
+        description="Benchmark the overhead of tracing"
+    )
+    arg_parser.add_argument("--repeat", type=int, default=2000)
+    opts = arg_parser.parse_args()
+
+    commands = [
+        "echo hello",
+        "cat a.txt | grep a | head -n 2",
+        "echo a; echo b; cat < a.txt > b.txt",
+        "echo `echo a` *.txt",
+    ]
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        try:
+            with open("a.txt", "w") as f:
+                f.write("a\nb\na\n")
+            for cmdline in commands:
+                run(cmdline, 100)
+                expected, off_us = run(cmdline, opts.repeat)
+                tracer = tracing.start()
+                try:
+                    output, on_us = run(cmdline, opts.repeat)
+                finally:
+                    tracing.stop()
+                assert output == expected
+                spans = len(tracer.events) / opts.repeat
+                print(cmdline)
+                print(f"    tracing off {off_us:10.1f} us")
+                print(f"    tracing on  {on_us:10.1f} us   "
+                      f"({spans:.0f} spans)")
+        finally:
+            os.chdir(cwd)